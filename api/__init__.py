@@ -1,2 +1,12 @@
 from api.market_data_api import MarketDataAPI, Attributes, Order, TradeResult, Position, TimeFrames
-from api.metatrader import MetaTrader5API, MT5Credentials
+from api.compact import CompactBars
+from api.position_book import PositionBook
+from api.prefetch import MarketData, MarketDataPrefetcher, MarketDataRequest
+from api.resample import Resampler
+from api.simulated import SimulatedMarketDataAPI, SimulatedSymbol
+from api.ticks import TickBars
+try:
+    from api.metatrader import MetaTrader5API, MT5Credentials
+except ImportError:
+    # The MetaTrader5 package only runs on Windows, the simulated API runs everywhere
+    pass
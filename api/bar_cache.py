@@ -0,0 +1,80 @@
+from __future__ import annotations
+import numpy as np
+import time
+from typing import Dict, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from api import TimeFrames
+
+
+class RatesBuffer:
+    """Bounded ring buffer with the raw rates (structured numpy array) of one symbol and timeframe"""
+    def __init__(self, rates: np.ndarray, capacity: int) -> None:
+        self.capacity = max(capacity, 1)
+        self.fetched_at = time.monotonic()
+        self._data = np.empty(self.capacity, dtype=rates.dtype)
+        self._start = 0
+        self._size = 0
+        self.extend(rates)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_time(self) -> int:
+        return int(self._data["time"][(self._start + self._size - 1) % self.capacity])
+
+    def extend(self, rates: np.ndarray) -> None:
+        """Append the rates at the end of the buffer, dropping the oldest bars when it is full"""
+        rates = rates[-self.capacity:]
+        count = len(rates)
+        if count == 0:
+            return None
+        positions = (self._start + self._size + np.arange(count)) % self.capacity
+        self._data[positions] = rates
+        if self._size + count > self.capacity:
+            self._start = (self._start + self._size + count) % self.capacity
+            self._size = self.capacity
+        else:
+            self._size += count
+        return None
+
+    def merge(self, rates: np.ndarray) -> None:
+        """Patch the still forming last bar and append the bars newer than it"""
+        self.fetched_at = time.monotonic()
+        if self._size == 0:
+            return self.extend(rates)
+        last_time = self.last_time
+        times = rates["time"]
+        forming = rates[times == last_time]
+        if len(forming) > 0:
+            self._data[(self._start + self._size - 1) % self.capacity] = forming[-1]
+        return self.extend(rates[times > last_time])
+
+    def tail(self, count: int) -> np.ndarray:
+        """Return a copy of the last bars in chronological order"""
+        count = min(count, self._size)
+        positions = (self._start + self._size - count + np.arange(count)) % self.capacity
+        return self._data[positions]
+
+
+class BarCache:
+    """Rates buffers by (symbol, timeframe), so only the new bars are requested to the broker"""
+    def __init__(self, capacity: int = 1000) -> None:
+        self.capacity = capacity
+        self._buffers: Dict[Tuple[str, TimeFrames], RatesBuffer] = {}
+
+    def get(self, symbol: str, timeframe: TimeFrames) -> RatesBuffer or None:
+        return self._buffers.get((symbol, timeframe))
+
+    def store(self, symbol: str, timeframe: TimeFrames, rates: np.ndarray) -> RatesBuffer:
+        buffer = RatesBuffer(rates, max(self.capacity, len(rates)))
+        self._buffers[(symbol, timeframe)] = buffer
+        return buffer
+
+    def remove(self, symbol: str, timeframe: TimeFrames) -> None:
+        self._buffers.pop((symbol, timeframe), None)
+        return None
+
+    def clear(self) -> None:
+        self._buffers.clear()
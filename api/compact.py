@@ -0,0 +1,103 @@
+from __future__ import annotations
+from api.market_data_api import MarketDataAPI
+from api.ticks import RATES_DTYPE
+import numpy as np
+import pandas as pd
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+PRICES = ["open", "high", "low", "close"]
+
+# -- NARROW TYPES OF THE COMPACT BARS, THE PRICES ARE int32 WHILE THEIR TICKS FIT IN IT
+VOLUME_DTYPES = {
+    "tick_volume": np.uint32,
+    "spread": np.uint16,
+    "real_volume": np.uint32,
+}
+
+
+def price_to_ticks(price: float or np.ndarray, digits: int) -> int or np.ndarray:
+    """Price in units of the last digit (points), exact for prices already rounded to the digits"""
+    ticks = np.rint(np.asarray(price, dtype=np.float64) * 10 ** digits).astype(np.int64)
+    return int(ticks) if ticks.ndim == 0 else ticks
+
+
+def ticks_to_price(ticks: int or np.ndarray, digits: int) -> float or np.ndarray:
+    """Price of the ticks, the same float of the price rounded to the digits"""
+    price = np.asarray(ticks, dtype=np.float64) / 10 ** digits
+    return float(price) if price.ndim == 0 else price
+
+
+def narrow(values: np.ndarray, dtype: type) -> np.ndarray:
+    """Values in a narrower integer type, an error if any of them does not fit"""
+    info = np.iinfo(dtype)
+    if len(values) > 0 and (values.min() < info.min or values.max() > info.max):
+        raise OverflowError(f"The values from {values.min()} to {values.max()} do not fit in {np.dtype(dtype).name}")
+    return values.astype(dtype)
+
+
+def price_dtype(ticks: np.ndarray) -> type:
+    info = np.iinfo(np.int32)
+    if len(ticks) == 0 or (ticks.min() >= info.min and ticks.max() <= info.max):
+        return np.int32
+    return np.int64
+
+
+class CompactBars:
+    """
+    Bars with the prices as integer ticks of the symbol digits (kept once, not per bar) and narrow volumes
+    About half of the memory of the MT5 rates, the prices are converted to float only at the edges
+    (to_rates, to_dataframe), and the comparisons between prices of the same digits are exact
+    """
+    def __init__(self, digits: int, columns: dict) -> None:
+        self.digits = digits
+        self.columns = columns
+
+    @classmethod
+    def from_rates(cls, rates: np.ndarray, digits: int) -> CompactBars:
+        """Compact the MT5 rates, the prices are rounded to the digits"""
+        columns = {"time": rates["time"].astype(np.int64)}
+        ticks = {field: price_to_ticks(rates[field], digits) for field in PRICES}
+        prices_dtype = max((price_dtype(values) for values in ticks.values()), key=lambda dtype: np.dtype(dtype).itemsize)
+        columns.update({field: values.astype(prices_dtype) for field, values in ticks.items()})
+        columns.update({field: narrow(rates[field], dtype) for field, dtype in VOLUME_DTYPES.items()})
+        return cls(digits, columns)
+
+    def __len__(self) -> int:
+        return len(self.columns["time"])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.columns.values())
+
+    def tail(self, count: int) -> CompactBars:
+        return CompactBars(self.digits, {field: values[-count:] for field, values in self.columns.items()})
+
+    def to_rates(self) -> np.ndarray:
+        """The MT5 rates (structured array) of the bars"""
+        rates = np.zeros(len(self), dtype=RATES_DTYPE)
+        rates["time"] = self.columns["time"]
+        for field in PRICES:
+            rates[field] = ticks_to_price(self.columns[field], self.digits)
+        for field in VOLUME_DTYPES:
+            rates[field] = self.columns[field]
+        return rates
+
+    def to_dataframe(self, delta_timezone: int) -> DataFrame:
+        """Same dataframe of rates_to_dataframe"""
+        count = len(self)
+        times = (self.columns["time"] + delta_timezone * 3600) * 1_000_000_000
+        index = pd.DatetimeIndex(times.view("datetime64[ns]"), name="Date")
+        columns = {
+            "_Digits": np.full(count, self.digits, dtype=np.int64),
+            "Open": ticks_to_price(self.columns["open"], self.digits),
+            "High": ticks_to_price(self.columns["high"], self.digits),
+            "Low": ticks_to_price(self.columns["low"], self.digits),
+            "Close": ticks_to_price(self.columns["close"], self.digits),
+            "Volume": self.columns["real_volume"].astype(np.int64),
+            "Trades": self.columns["tick_volume"].astype(np.int64),
+            "Spread": self.columns["spread"].astype(np.int64),
+        }
+        return pd.DataFrame(columns, index=index, columns=MarketDataAPI.DATAFRAME_COLUMNS, copy=False)
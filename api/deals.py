@@ -0,0 +1,35 @@
+from __future__ import annotations
+from api.market_data_api import TradeResult
+from typing import Callable, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+DEAL_COSTS = ["commission", "swap", "fee", "profit"]
+
+
+def trade_results_from_deals(deals: DataFrame, format_timestamp: Callable[[int], str]) -> Dict[int, TradeResult]:
+    """
+    Group the history deals (one row per deal, MT5 TradeDeal fields) by position
+    The costs are summed for each position, the first deal opens the trade and the second one closes it
+    """
+    deals = deals[deals["position_id"] != 0].sort_values(["position_id", "time"], kind="mergesort")
+    grouped = deals.groupby("position_id", sort=False)
+    costs = grouped[DEAL_COSTS].sum()
+    deal_number = grouped.cumcount()
+    opens = deals[deal_number == 0].set_index("position_id")
+    closes = deals[deal_number == 1].set_index("position_id")
+
+    results = {}
+    for ticket, cost in zip(costs.index.to_list(), costs.itertuples(index=False)):
+        is_closed = ticket in closes.index
+        results[ticket] = TradeResult(open_time=format_timestamp(opens.at[ticket, "time"]),
+                                      open_price=float(opens.at[ticket, "price"]),
+                                      close_time=format_timestamp(closes.at[ticket, "time"]) if is_closed else "",
+                                      close_price=float(closes.at[ticket, "price"]) if is_closed else 0.0,
+                                      ticket=ticket,
+                                      commission=float(cost.commission),
+                                      fee=float(cost.fee),
+                                      swap=float(cost.swap),
+                                      profit=float(cost.profit))
+    return results
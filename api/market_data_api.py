@@ -1,12 +1,14 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from api.position_book import PositionBook
 from dataclasses import dataclass
 from enum import Enum
 from shared_data_structures import OrderExecution, OrderSendRequest, OrderSendResponse
-from typing import Callable, List, Protocol, TYPE_CHECKING
+from typing import Callable, Dict, List, Protocol, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from datetime import datetime
+    import numpy as np
     from pandas import DataFrame
     from shared_data_structures import OrderType
 
@@ -30,6 +32,23 @@ class TimeFrames(Enum):
     W1 = "W1"
     MN1 = "MN1"
 
+    @property
+    def seconds(self) -> int:
+        """Duration of one bar in seconds (W1 and MN1 are the longest possible durations)"""
+        return TIMEFRAME_SECONDS[self]
+
+
+TIMEFRAME_SECONDS: dict[TimeFrames, int] = {
+    TimeFrames.M1: 60,
+    TimeFrames.M5: 5 * 60,
+    TimeFrames.M15: 15 * 60,
+    TimeFrames.H1: 60 * 60,
+    TimeFrames.H4: 4 * 60 * 60,
+    TimeFrames.D1: 24 * 60 * 60,
+    TimeFrames.W1: 7 * 24 * 60 * 60,
+    TimeFrames.MN1: 31 * 24 * 60 * 60,
+}
+
 
 @dataclass
 class TradeResult:
@@ -100,6 +119,7 @@ class MarketDataAPI(ABC):
 
     def __init__(self, delta_timezone: int) -> None:
         self.delta_timezone = delta_timezone
+        self._position_book: PositionBook or None = None
 
     @abstractmethod
     def connect(self, credentials: Credentials) -> bool:
@@ -111,6 +131,11 @@ class MarketDataAPI(ABC):
         """Disconnect from the API and return true if it was successful"""
         pass
 
+    def new_tick(self) -> None:
+        """Start a new iteration of the trading loop, invalidating the data cached for the previous one"""
+        self.invalidate_position_book()
+        return None
+
     @abstractmethod
     def create_dataframe_from_bars(self, symbol: str, timeframe: str or int, start_position: int,
                                    bars: int) -> DataFrame or None:
@@ -128,6 +153,16 @@ class MarketDataAPI(ABC):
         """Return the dataframe with standard column names"""
         pass
 
+    @abstractmethod
+    def get_ticks_from(self, symbol: str, date_from: int, count: int) -> np.ndarray or None:
+        """Return the ticks (MT5 structured array) from the server timestamp on"""
+        pass
+
+    @abstractmethod
+    def get_ticks_range(self, symbol: str, date_from: int, date_to: int) -> np.ndarray or None:
+        """Return the ticks (MT5 structured array) between two server timestamps"""
+        pass
+
     @abstractmethod
     def get_symbol_attributes(self, symbol: str) -> Attributes:
         """Return the symbol attributes"""
@@ -143,6 +178,17 @@ class MarketDataAPI(ABC):
         """Return the account open positions"""
         pass
 
+    def get_position_book(self) -> PositionBook:
+        """Return the account open positions indexed, fetched once per tick"""
+        if self._position_book is None:
+            self._position_book = PositionBook(self.get_positions())
+        return self._position_book
+
+    def invalidate_position_book(self) -> None:
+        """The open positions changed, fetch them again on the next access"""
+        self._position_book = None
+        return None
+
     @abstractmethod
     def get_orders(self) -> List[Order]:
         """Return the account placed orders"""
@@ -158,6 +204,11 @@ class MarketDataAPI(ABC):
         """Return the trade result for the current ticket"""
         pass
 
+    @abstractmethod
+    def get_trade_results(self, date_from: datetime, date_to: datetime) -> Dict[int, TradeResult]:
+        """Return the trade results by ticket of all the deals between two date times"""
+        pass
+
     def execute_action(self, action: OrderExecution) -> TradeActionExecutionFunction:
         """Selector to execute the correct action"""
         actions: dict[OrderExecution, TradeActionExecutionFunction] = {
@@ -1,14 +1,20 @@
 from __future__ import annotations
 from api import Attributes, MarketDataAPI, Order, Position, TimeFrames, TradeResult
+from api.bar_cache import BarCache
+from api.deals import trade_results_from_deals
+from api.rates import rates_to_dataframe, standardize_dataframe
+from api.symbol_snapshot import SymbolSnapshots
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
 import MetaTrader5 as mt5
 import numpy as np
 import pandas as pd
 from shared_data_structures import OrderType, OrderExecution, OrderSendResponse
-from typing import List, TYPE_CHECKING
+import time
+from typing import Dict, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from database import BarStore
     from shared_data_structures import OrderSendRequest
 
 
@@ -57,6 +63,13 @@ class MetaTrader5API(MarketDataAPI):
         mt5.POSITION_TYPE_SELL: OrderType.SELL
     }
 
+    def __init__(self, delta_timezone: int, bar_cache_size: int = 1000, snapshot_ttl: float = 1.0,
+                 bar_store: BarStore or None = None) -> None:
+        super().__init__(delta_timezone)
+        self._bar_cache = BarCache(bar_cache_size)
+        self.bar_store = bar_store
+        self.symbol_snapshots = SymbolSnapshots(mt5.symbol_info, snapshot_ttl)
+
     def connect(self, credentials: MT5Credentials) -> bool:
         """MT5 connection"""
         if not mt5.initialize(**credentials.__dict__):
@@ -68,54 +81,112 @@ class MetaTrader5API(MarketDataAPI):
         """MT5 connection shutdown"""
         return mt5.shutdown()
 
+    def new_tick(self) -> None:
+        """Invalidate the symbol info snapshots and the position book of the previous tick"""
+        super().new_tick()
+        self.symbol_snapshots.new_tick()
+        return None
+
+    def _symbol_info(self, symbol: str):
+        """MT5 symbol_info from the current tick snapshot"""
+        return self.symbol_snapshots.get(symbol)
+
     def create_dataframe_from_bars(self, symbol: str, timeframe: TimeFrames, start_position: int,
                                    bars: int) -> pd.DataFrame or None:
+        if start_position == 0:
+            rates = self._get_cached_rates(symbol, timeframe, bars)
+        else:
+            rates = mt5.copy_rates_from_pos(symbol, self.TIMEFRAMES[timeframe], start_position, bars)
+        return self._standardize_rates(rates, symbol)
+
+    def _get_cached_rates(self, symbol: str, timeframe: TimeFrames, bars: int) -> np.ndarray or None:
+        """
+        Return the last bars from the cache, requesting to MT5 only the bars newer than the last cached one
+        The last cached bar is still forming, so it is requested again and patched
+        If the new bars do not reach the cached ones (or the cache is too small) the whole window is requested
+        """
         tf = self.TIMEFRAMES[timeframe]
-        dataframe = pd.DataFrame(mt5.copy_rates_from_pos(symbol, tf, start_position, bars))
-        if not dataframe.empty:
-            return self._standardize_dataframe(dataframe, symbol)
-        return None
+        buffer = self._bar_cache.get(symbol, timeframe)
+        if buffer is not None and len(buffer) >= bars:
+            elapsed_bars = int((time.monotonic() - buffer.fetched_at) // timeframe.seconds)
+            new_rates = mt5.copy_rates_from_pos(symbol, tf, 0, elapsed_bars + 2)
+            if new_rates is not None and len(new_rates) > 0 and new_rates["time"][0] <= buffer.last_time:
+                buffer.merge(new_rates)
+                return buffer.tail(bars)
+
+        rates = mt5.copy_rates_from_pos(symbol, tf, 0, bars)
+        if rates is None or len(rates) == 0:
+            self._bar_cache.remove(symbol, timeframe)
+            return None
+        self._bar_cache.store(symbol, timeframe, rates)
+        return rates
 
     def create_dataframe_from_date(self, symbol: str, timeframe: TimeFrames, start_date: datetime,
                                    end_date: datetime) -> pd.DataFrame or None:
         tf = self.TIMEFRAMES[timeframe]
-        dataframe = pd.DataFrame(mt5.copy_rates_range(symbol, tf, start_date, end_date))
-        if not dataframe.empty:
-            return self._standardize_dataframe(dataframe, symbol)
-        return None
+        start, end = int(pd.Timestamp(start_date).timestamp()), int(pd.Timestamp(end_date).timestamp())
+        if self.bar_store is None:
+            return self._standardize_rates(mt5.copy_rates_range(symbol, tf, start_date, end_date), symbol)
+        first_stored = self.bar_store.first_time(symbol, timeframe)
+        if first_stored is not None and start >= first_stored:
+            return self._read_bar_store(symbol, timeframe, start, end)
+
+        # -- THE STORE ONLY GROWS FORWARD, AN OLDER RANGE IS REQUESTED TO MT5 AND ONLY SAVED IF THE STORE IS EMPTY
+        rates = mt5.copy_rates_range(symbol, tf, start_date, end_date)
+        if first_stored is None and rates is not None and len(rates) > 0:
+            self.bar_store.append(symbol, timeframe, self._closed_rates(symbol, timeframe, rates),
+                                  self._symbol_info(symbol).digits)
+        return self._standardize_rates(rates, symbol)
+
+    def _read_bar_store(self, symbol: str, timeframe: TimeFrames, start: int, end: int) -> pd.DataFrame or None:
+        """
+        Bars from the store, requesting to MT5 only the bars after the last stored one
+        The closed new bars are saved, the one still forming is only returned
+        """
+        digits = self._symbol_info(symbol).digits
+        tail = None
+        # -- FROM THE SECOND AFTER THE LAST STORED BAR: THE PERIOD OF A MONTH (OR A SESSION GAP) IS NOT FIXED
+        fetch_from = self.bar_store.last_time(symbol, timeframe) + 1
+        if fetch_from <= end:
+            rates = mt5.copy_rates_range(symbol, self.TIMEFRAMES[timeframe], datetime.utcfromtimestamp(fetch_from),
+                                         datetime.utcfromtimestamp(end))
+            if rates is not None and len(rates) > 0:
+                closed = self._closed_rates(symbol, timeframe, rates)
+                self.bar_store.append(symbol, timeframe, closed, digits)
+                tail = rates[len(closed):]
+        stored = self.bar_store.read(symbol, timeframe, start, end, digits, self.delta_timezone)
+        if tail is None or len(tail) == 0 or tail["time"][0] < start:
+            return stored
+        tail = rates_to_dataframe(tail, digits, self.delta_timezone)
+        return tail if stored is None else pd.concat([stored, tail])
+
+    def _closed_rates(self, symbol: str, timeframe: TimeFrames, rates: np.ndarray) -> np.ndarray:
+        """The rates without the last bar while it is forming: its close time is after the last tick (server time)"""
+        last_open = int(rates["time"][-1])
+        if timeframe == TimeFrames.MN1:
+            # -- THE PERIOD OF A MONTH IS NOT FIXED
+            close_time = int((pd.Timestamp(last_open, unit="s") + pd.DateOffset(months=1)).timestamp())
+        else:
+            close_time = last_open + timeframe.seconds
+        return rates if close_time <= self._symbol_info(symbol).time else rates[:-1]
+
+    def get_ticks_from(self, symbol: str, date_from: int, count: int) -> np.ndarray or None:
+        return mt5.copy_ticks_from(symbol, date_from, count, mt5.COPY_TICKS_ALL)
+
+    def get_ticks_range(self, symbol: str, date_from: int, date_to: int) -> np.ndarray or None:
+        return mt5.copy_ticks_range(symbol, date_from, date_to, mt5.COPY_TICKS_ALL)
 
     def _standardize_dataframe(self, dataframe: pd.DataFrame, symbol: str) -> pd.DataFrame:
-        dataframe["time"] = pd.to_datetime(dataframe["time"], unit="s")
-        dataframe["time"] = dataframe["time"] + timedelta(hours=self.delta_timezone)
-        dataframe.rename(columns={"time": "Date"}, inplace=True)
-        dataframe.set_index(dataframe["Date"], inplace=True)
-        dataframe.rename(columns={"open": "Open",
-                                  "high": "High",
-                                  "low": "Low",
-                                  "close": "Close",
-                                  "tick_volume": "Trades",
-                                  "real_volume": "Volume",
-                                  "spread": "Spread"}, inplace=True)
-        dataframe = dataframe.astype({
-            "Open": np.float64,
-            "High": np.float64,
-            "Low": np.float64,
-            "Close": np.float64,
-            "Volume": np.int64,
-            "Trades": np.int64,
-            "Spread": np.int64
-        })
-        digits = mt5.symbol_info(symbol).digits
-        dataframe["Open"] = round(dataframe["Open"], digits)
-        dataframe["High"] = round(dataframe["High"], digits)
-        dataframe["Low"] = round(dataframe["Low"], digits)
-        dataframe["Close"] = round(dataframe["Close"], digits)
-        dataframe["_Digits"] = digits
-        del dataframe["Date"]
-        return dataframe
+        return standardize_dataframe(dataframe, self._symbol_info(symbol).digits, self.delta_timezone)
+
+    def _standardize_rates(self, rates: np.ndarray or None, symbol: str) -> pd.DataFrame or None:
+        """Standard dataframe built directly from the MT5 rates, without the intermediate dataframe copies"""
+        if rates is None or len(rates) == 0:
+            return None
+        return rates_to_dataframe(rates, self._symbol_info(symbol).digits, self.delta_timezone)
 
     def get_symbol_attributes(self, symbol: str) -> Attributes:
-        symbol_info = mt5.symbol_info(symbol)
+        symbol_info = self._symbol_info(symbol)
         converter = self._usd_profit_converter(str(symbol_info.currency_profit))
         return Attributes(symbol=symbol,
                           ask=round(symbol_info.ask, symbol_info.digits),
@@ -142,59 +213,38 @@ class MetaTrader5API(MarketDataAPI):
         if currency_profit == "USD":
             return 1.0
         try:
-            return mt5.symbol_info(f"USD{currency_profit}").ask
+            return self._symbol_info(f"USD{currency_profit}").ask
         except AttributeError:
             try:
-                return mt5.symbol_info(f"{currency_profit}USD").ask
+                return self._symbol_info(f"{currency_profit}USD").ask
             except AttributeError:
                 return 0.0
 
     def get_positions(self) -> List[Position]:
-        positions = []
         mt5positions = mt5.positions_get()
         if mt5positions is None:
-            return positions
-
-        for position in mt5positions:
-            comment = position.comment.split(" ")
-            timeframe = comment[1] if len(comment) > 0 else ""
-            strategy = comment[0] if len(comment) > 0 else ""
-            time_string = self.format_timestamp(position.time)
-            positions.append(Position(symbol=position.symbol,
-                                      timeframe=timeframe,
-                                      strategy=strategy,
-                                      ticket=position.ticket,
-                                      price_open=position.price_open,
-                                      open_time=time_string,
-                                      type=self.POSITION_TYPES[position.type],
-                                      volume=position.volume,
-                                      stop_loss=position.sl,
-                                      stop_gain=position.tp,
-                                      magic=position.magic,
-                                      profit=position.profit))
-        return positions
-
-    def get_position(self, ticket: int) -> Position:
-        mt5positions = mt5.positions_get()
-
-        for position in mt5positions:
-            if position.ticket == ticket:
-                comment = position.comment.split(" ")
-                timeframe = comment[1] if len(comment) > 1 else ""
-                strategy = comment[0] if len(comment) > 0 else ""
-                datetime_string = self.format_timestamp(position.time)
-                return Position(symbol=position.symbol,
-                                timeframe=timeframe,
-                                strategy=strategy,
-                                ticket=position.ticket,
-                                price_open=position.price_open,
-                                open_time=datetime_string,
-                                type=self.POSITION_TYPES[position.type],
-                                volume=position.volume,
-                                stop_loss=position.sl,
-                                stop_gain=position.tp,
-                                magic=position.magic,
-                                profit=position.profit)
+            return []
+        return [self._to_position(position) for position in mt5positions]
+
+    def get_position(self, ticket: int) -> Position or None:
+        return self.get_position_book().get(ticket)
+
+    def _to_position(self, position) -> Position:
+        comment = position.comment.split(" ")
+        timeframe = comment[1] if len(comment) > 1 else ""
+        strategy = comment[0] if len(comment) > 0 else ""
+        return Position(symbol=position.symbol,
+                        timeframe=timeframe,
+                        strategy=strategy,
+                        ticket=position.ticket,
+                        price_open=position.price_open,
+                        open_time=self.format_timestamp(position.time),
+                        type=self.POSITION_TYPES[position.type],
+                        volume=position.volume,
+                        stop_loss=position.sl,
+                        stop_gain=position.tp,
+                        magic=position.magic,
+                        profit=position.profit)
 
     def format_timestamp(self, timestamp: int) -> str:
         return str(datetime.utcfromtimestamp(float(timestamp + self.delta_timezone * 3.6e3)))
@@ -241,11 +291,24 @@ class MetaTrader5API(MarketDataAPI):
                            swap=swap,
                            profit=profit)
 
+    def get_trade_results(self, date_from: datetime, date_to: datetime) -> Dict[int, TradeResult]:
+        deals = mt5.history_deals_get(date_from, date_to)
+        if deals is None or len(deals) == 0:
+            return {}
+        dataframe = pd.DataFrame(list(deals), columns=deals[0]._asdict().keys())
+        return trade_results_from_deals(dataframe, self.format_timestamp)
+
     def have_free_margin(self, order_type: OrderType, symbol: str, volume: float, price: float) -> bool:
         margin_free = mt5.account_info().margin_free
         margin_needed = mt5.order_calc_margin(self.ORDER_TYPES[order_type], symbol, volume, price)
         return margin_free > margin_needed or False
 
+    def _order_send(self, request: dict):
+        """Send the trade request to MT5. The open positions may change, so the position book is fetched again"""
+        result = mt5.order_send(request)
+        self.invalidate_position_book()
+        return result
+
     def _is_buy_or_sell_order(self, order_type: OrderType) -> bool:
         return (self.ORDER_TYPES[order_type] == self.ORDER_TYPES[OrderType.BUY.value] or
                 self.ORDER_TYPES[order_type] == self.ORDER_TYPES[OrderType.SELL.value])
@@ -257,9 +320,10 @@ class MetaTrader5API(MarketDataAPI):
         code = 0
         comment = ""
 
-        price = mt5.symbol_info(request.symbol).bid
+        symbol_info = self._symbol_info(request.symbol)
+        price = symbol_info.bid
         if request.order_type == mt5.ORDER_TYPE_BUY:
-            price = mt5.symbol_info(request.symbol).ask
+            price = symbol_info.ask
 
         if not self._is_buy_or_sell_order(request.order_type.value):
             comment = f"The Order Type ({request.order_type.value}) is neither BUY nor SELL"
@@ -284,7 +348,7 @@ class MetaTrader5API(MarketDataAPI):
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
-            result = mt5.order_send(request_position_open_atmarket)
+            result = self._order_send(request_position_open_atmarket)
             status = result.retcode == 10009
             ticket = result.order
             code = result.retcode
@@ -332,7 +396,7 @@ class MetaTrader5API(MarketDataAPI):
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
-            result = mt5.order_send(request_position_close)
+            result = self._order_send(request_position_close)
             status = result.retcode == 10009
             ticket = result.request.position
             code = result.retcode
@@ -354,7 +418,7 @@ class MetaTrader5API(MarketDataAPI):
             "sl": request.sl,
             "tp": request.tp
         }
-        result = mt5.order_send(request_position_modify)
+        result = self._order_send(request_position_modify)
         status = result.retcode == 10009
         return OrderSendResponse(symbol=request.symbol,
                                  action=request.action,
@@ -401,7 +465,7 @@ class MetaTrader5API(MarketDataAPI):
                 "type_time": mt5.ORDER_TIME_GTC,
                 "expiration": 0
             }
-            result = mt5.order_send(request_send_order_limit)
+            result = self._order_send(request_send_order_limit)
             status = result.retcode == 10009
             ticket = result.request.position
             code = result.retcode
@@ -427,7 +491,7 @@ class MetaTrader5API(MarketDataAPI):
             "type_time": 0,
             "expiration": 0
         }
-        result = mt5.order_send(request_order_modify)
+        result = self._order_send(request_order_modify)
         status = result.retcode == 10009
         return OrderSendResponse(symbol=request.symbol,
                                  action=request.action,
@@ -443,7 +507,7 @@ class MetaTrader5API(MarketDataAPI):
             "magic": request.magic,
             "order": request.ticket
         }
-        result = mt5.order_send(request_order_delete)
+        result = self._order_send(request_order_delete)
         status = result == 10009
         return OrderSendResponse(symbol=request.symbol,
                                  action=request.action,
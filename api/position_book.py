@@ -0,0 +1,42 @@
+from __future__ import annotations
+from collections import defaultdict
+from typing import Dict, Iterator, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from api import Position
+
+
+class PositionBook:
+    """Account open positions indexed by ticket, magic, symbol and (magic, timeframe)"""
+    def __init__(self, positions: List[Position]) -> None:
+        self.positions = positions
+        self._by_ticket: Dict[int, Position] = {}
+        self._by_magic: Dict[int, List[Position]] = defaultdict(list)
+        self._by_symbol: Dict[str, List[Position]] = defaultdict(list)
+        self._by_magic_timeframe: Dict[Tuple[int, str], List[Position]] = defaultdict(list)
+        for position in positions:
+            self._by_ticket[position.ticket] = position
+            self._by_magic[position.magic].append(position)
+            self._by_symbol[position.symbol].append(position)
+            self._by_magic_timeframe[(position.magic, position.timeframe)].append(position)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __iter__(self) -> Iterator[Position]:
+        return iter(self.positions)
+
+    def __contains__(self, ticket: int) -> bool:
+        return ticket in self._by_ticket
+
+    def get(self, ticket: int) -> Position or None:
+        return self._by_ticket.get(ticket)
+
+    def by_magic(self, magic: int) -> List[Position]:
+        return self._by_magic.get(magic, [])
+
+    def by_symbol(self, symbol: str) -> List[Position]:
+        return self._by_symbol.get(symbol, [])
+
+    def by_magic_timeframe(self, magic: int, timeframe: str) -> List[Position]:
+        return self._by_magic_timeframe.get((magic, timeframe), [])
@@ -0,0 +1,122 @@
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from api import Attributes, MarketDataAPI, Resampler, TimeFrames
+    from pandas import DataFrame
+
+
+@dataclass
+class MarketDataRequest:
+    symbol: str
+    timeframe: TimeFrames
+    bars: int
+
+
+@dataclass
+class MarketData:
+    request: MarketDataRequest
+    dataframe: DataFrame or None
+    attributes: Attributes or None
+
+
+class MarketDataPrefetcher:
+    """
+    Fetch the bars and the symbol attributes of the next batches on a bounded thread pool
+    while the current batch is being computed
+    The results of each batch keep the order of its requests. A request not finished before its timeout
+    (counted from the submission) returns no data. A request that is already running can not be stopped: its
+    result is dropped, and the next request of the same symbol and timeframe waits for it to finish, so the
+    bars it merges into the caches of the api are never merged at the same time as the newer ones
+    With a resampler, the requests of a batch with one symbol are served by one request of its base timeframe
+    """
+    def __init__(self, api: MarketDataAPI, max_workers: int = 8, timeout: float = 10.0, lookahead: int = 1,
+                 resampler: Resampler or None = None) -> None:
+        self._api = api
+        self.timeout = timeout
+        self.lookahead = lookahead
+        self.resampler = resampler
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._locks: Dict[Tuple[str, TimeFrames], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def iterate(self, batches: Iterable[List[MarketDataRequest]],
+                lookahead: int or None = None) -> Iterator[List[MarketData]]:
+        """
+        Yield the market data of each batch, with the next lookahead batches (self.lookahead by default) already
+        requested. A lookahead of len(batches) requests all of them at once
+        """
+        batches = iter(batches)
+        pending = deque()
+        for _ in range((self.lookahead if lookahead is None else lookahead) + 1):
+            batch = next(batches, None)
+            if batch is None:
+                break
+            pending.append(self._submit(batch))
+        while pending:
+            submitted = pending.popleft()
+            batch = next(batches, None)
+            if batch is not None:
+                pending.append(self._submit(batch))
+            yield self._collect(submitted)
+
+    def fetch(self, batch: List[MarketDataRequest]) -> List[MarketData]:
+        """Request one batch concurrently and wait for it"""
+        return self._collect(self._submit(batch))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        return None
+
+    def _submit(self, batch: List[MarketDataRequest]) -> List[Tuple[List[MarketDataRequest], float, Future]]:
+        submitted_at = time.monotonic()
+        if self.resampler is not None and len({(request.symbol, request.bars) for request in batch}) == 1:
+            return [(batch, submitted_at, self._executor.submit(self._request_resampled, batch))]
+        return [([request], submitted_at, self._executor.submit(self._request, request)) for request in batch]
+
+    def _collect(self, submitted: List[Tuple[List[MarketDataRequest], float, Future]]) -> List[MarketData]:
+        results = []
+        for requests, submitted_at, future in submitted:
+            try:
+                results.extend(future.result(timeout=max(submitted_at + self.timeout - time.monotonic(), 0)))
+            except TimeoutError:
+                if not future.cancel():
+                    future.add_done_callback(self._drop_late)
+                for request in requests:
+                    print(f"PREFETCH: {request.symbol} {request.timeframe.value} timed out after {self.timeout}s")
+                    results.append(MarketData(request=request, dataframe=None, attributes=None))
+        return results
+
+    @staticmethod
+    def _drop_late(future: Future) -> None:
+        """The request timed out while running, the data it got is not returned"""
+        if not future.cancelled() and future.exception() is None:
+            for data in future.result():
+                print(f"PREFETCH: {data.request.symbol} {data.request.timeframe.value} late result dropped")
+        return None
+
+    def _lock(self, symbol: str, timeframe: TimeFrames) -> threading.Lock:
+        """Lock of the symbol and timeframe, held across the request of their bars"""
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, timeframe), threading.Lock())
+
+    def _request(self, request: MarketDataRequest) -> List[MarketData]:
+        with self._lock(request.symbol, request.timeframe):
+            dataframe = self._api.create_dataframe_from_bars(request.symbol, request.timeframe, 0, request.bars)
+        attributes = self._api.get_symbol_attributes(request.symbol)
+        return [MarketData(request=request, dataframe=dataframe, attributes=attributes)]
+
+    def _request_resampled(self, batch: List[MarketDataRequest]) -> List[MarketData]:
+        """The timeframes of one symbol from its base timeframe"""
+        symbol, bars = batch[0].symbol, batch[0].bars
+        timeframes = [request.timeframe for request in batch]
+        with self._lock(symbol, self.resampler.base_timeframe(timeframes)):
+            dataframes = self.resampler.dataframes(symbol, timeframes, bars)
+        attributes = self._api.get_symbol_attributes(symbol)
+        return [MarketData(request=request, dataframe=dataframes[request.timeframe], attributes=attributes)
+                for request in batch]
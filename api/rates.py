@@ -0,0 +1,69 @@
+from __future__ import annotations
+from api.market_data_api import MarketDataAPI
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+RATES_PRICES = ["open", "high", "low", "close"]
+
+
+def standardize_dataframe(dataframe: DataFrame, digits: int, delta_timezone: int) -> DataFrame:
+    """Return the dataframe created from the MT5 rates with standard column names"""
+    dataframe["time"] = pd.to_datetime(dataframe["time"], unit="s")
+    dataframe["time"] = dataframe["time"] + timedelta(hours=delta_timezone)
+    dataframe.rename(columns={"time": "Date"}, inplace=True)
+    dataframe.set_index(dataframe["Date"], inplace=True)
+    dataframe.rename(columns={"open": "Open",
+                              "high": "High",
+                              "low": "Low",
+                              "close": "Close",
+                              "tick_volume": "Trades",
+                              "real_volume": "Volume",
+                              "spread": "Spread"}, inplace=True)
+    dataframe = dataframe.astype({
+        "Open": np.float64,
+        "High": np.float64,
+        "Low": np.float64,
+        "Close": np.float64,
+        "Volume": np.int64,
+        "Trades": np.int64,
+        "Spread": np.int64
+    })
+    dataframe["Open"] = round(dataframe["Open"], digits)
+    dataframe["High"] = round(dataframe["High"], digits)
+    dataframe["Low"] = round(dataframe["Low"], digits)
+    dataframe["Close"] = round(dataframe["Close"], digits)
+    dataframe["_Digits"] = digits
+    del dataframe["Date"]
+    return dataframe
+
+
+def rates_to_dataframe(rates: np.ndarray, digits: int, delta_timezone: int) -> DataFrame:
+    """
+    Build the standard dataframe straight from the structured array returned by copy_rates_*
+    The prices are copied once into a single block and rounded in place, the other columns are taken
+    from the rates fields without intermediate dataframes
+    """
+    count = len(rates)
+    prices = np.empty((4, count), dtype=np.float64)
+    for row, field in enumerate(RATES_PRICES):
+        prices[row] = rates[field]
+    np.round(prices, digits, out=prices)
+
+    index = pd.DatetimeIndex(((rates["time"] + delta_timezone * 3600) * 1_000_000_000).view("datetime64[ns]"),
+                             name="Date")
+    columns = {
+        "_Digits": np.full(count, digits, dtype=np.int64),
+        "Open": prices[0],
+        "High": prices[1],
+        "Low": prices[2],
+        "Close": prices[3],
+        "Volume": rates["real_volume"].astype(np.int64, copy=False),
+        "Trades": rates["tick_volume"].astype(np.int64, copy=False),
+        "Spread": rates["spread"].astype(np.int64, copy=False),
+    }
+    return pd.DataFrame(columns, index=index, columns=MarketDataAPI.DATAFRAME_COLUMNS, copy=False)
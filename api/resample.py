@@ -0,0 +1,130 @@
+from __future__ import annotations
+from api.market_data_api import MarketDataAPI, TimeFrames
+import math
+import numpy as np
+import pandas as pd
+from typing import Dict, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+WEEK_SECONDS = 7 * 24 * 60 * 60
+# -- THE EPOCH (1970-01-01) IS A THURSDAY, THE WEEKS OF THE TERMINAL START ON SUNDAY
+WEEK_OFFSET = 3 * 24 * 60 * 60
+# -- REQUESTS OF MORE BASE BARS WHEN A RESAMPLED TIMEFRAME IS SHORT, EACH ONE TWICE THE LAST
+MAX_TOP_UPS = 4
+
+
+def bucket_times(times: np.ndarray, timeframe: TimeFrames) -> np.ndarray:
+    """Start of the bar of the timeframe with each time (server time in seconds), aligned like the terminal"""
+    times = np.asarray(times, dtype=np.int64)
+    if timeframe == TimeFrames.MN1:
+        return times.astype("datetime64[s]").astype("datetime64[M]").astype("datetime64[s]").astype(np.int64)
+    if timeframe == TimeFrames.W1:
+        return (times - WEEK_OFFSET) // WEEK_SECONDS * WEEK_SECONDS + WEEK_OFFSET
+    return times // timeframe.seconds * timeframe.seconds
+
+
+def resample_rates(rates: np.ndarray, timeframe: TimeFrames) -> np.ndarray:
+    """
+    Aggregate the rates (MT5 rates dtype, sorted by time) into the bars of a higher timeframe
+    The buckets are in server time, the bars without rates (out of the sessions) do not exist
+    The spread is the lowest one and the volumes are added, like aggregate_ticks
+    """
+    if len(rates) == 0:
+        return rates.copy()
+    buckets = bucket_times(rates["time"], timeframe)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(rates)]
+    resampled = np.zeros(len(starts), dtype=rates.dtype)
+    resampled["time"] = buckets[starts]
+    resampled["open"] = rates["open"][starts]
+    resampled["high"] = np.maximum.reduceat(rates["high"], starts)
+    resampled["low"] = np.minimum.reduceat(rates["low"], starts)
+    resampled["close"] = rates["close"][ends - 1]
+    resampled["tick_volume"] = np.add.reduceat(rates["tick_volume"], starts)
+    resampled["spread"] = np.minimum.reduceat(rates["spread"], starts)
+    resampled["real_volume"] = np.add.reduceat(rates["real_volume"], starts)
+    return resampled
+
+
+def resample_dataframe(dataframe: DataFrame, timeframe: TimeFrames, delta_timezone: int,
+                       complete: bool = True) -> DataFrame:
+    """
+    Standard dataframe of a higher timeframe from the standard dataframe of a lower one
+    The index is shifted by delta_timezone, so the bars are bucketed in server time and shifted back
+    When complete, the first bar is dropped if the dataframe starts after its start (it may be missing bars)
+    """
+    shift = delta_timezone * 3600
+    times = dataframe.index.asi8 // 1_000_000_000 - shift
+    buckets = bucket_times(times, timeframe)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    if complete and len(starts) > 0 and times[0] != buckets[0]:
+        starts = starts[1:]
+        if len(starts) == 0:
+            return dataframe.iloc[:0].copy()
+        buckets, dataframe = buckets[starts[0]:], dataframe.iloc[starts[0]:]
+        starts = starts - starts[0]
+    ends = np.r_[starts[1:], len(buckets)]
+
+    index = pd.DatetimeIndex(((buckets[starts] + shift) * 1_000_000_000).view("datetime64[ns]"), name="Date")
+    columns = {
+        "_Digits": dataframe["_Digits"].to_numpy()[starts],
+        "Open": dataframe["Open"].to_numpy()[starts],
+        "High": np.maximum.reduceat(dataframe["High"].to_numpy(), starts),
+        "Low": np.minimum.reduceat(dataframe["Low"].to_numpy(), starts),
+        "Close": dataframe["Close"].to_numpy()[ends - 1],
+        "Volume": np.add.reduceat(dataframe["Volume"].to_numpy(), starts),
+        "Trades": np.add.reduceat(dataframe["Trades"].to_numpy(), starts),
+        "Spread": np.minimum.reduceat(dataframe["Spread"].to_numpy(), starts),
+    }
+    return pd.DataFrame(columns, index=index, columns=MarketDataAPI.DATAFRAME_COLUMNS, copy=False)
+
+
+class Resampler:
+    """
+    One base series per symbol (its lowest timeframe) requested to the broker, the higher timeframes are
+    resampled from it locally, so a symbol costs one request however many timeframes it has
+    """
+    def __init__(self, api: MarketDataAPI) -> None:
+        self._api = api
+
+    @staticmethod
+    def base_timeframe(timeframes: List[TimeFrames]) -> TimeFrames:
+        return min(timeframes, key=lambda timeframe: timeframe.seconds)
+
+    def base_bars(self, timeframes: List[TimeFrames], bars: int) -> int:
+        """Base bars for the last bars of every timeframe, one more bar of the highest one may be incomplete"""
+        base = self.base_timeframe(timeframes)
+        ratio = max(math.ceil(timeframe.seconds / base.seconds) for timeframe in timeframes)
+        return bars if ratio == 1 else (bars + 1) * ratio
+
+    def dataframes(self, symbol: str, timeframes: List[TimeFrames], bars: int) -> Dict[TimeFrames, DataFrame or None]:
+        """
+        The last bars of each timeframe. When the sessions leave a timeframe short, the base bars are requested
+        again (twice as many each time) until every timeframe has its bars or the history of the broker ends
+        """
+        base = self.base_timeframe(timeframes)
+        count = self.base_bars(timeframes, bars)
+        dataframe = self._api.create_dataframe_from_bars(symbol, base, 0, count)
+        results = self._resample(dataframe, timeframes, bars)
+        for _ in range(MAX_TOP_UPS):
+            if dataframe is None or len(dataframe) < count or all(len(result) >= bars for result in results.values()):
+                break
+            count *= 2
+            dataframe = self._api.create_dataframe_from_bars(symbol, base, 0, count)
+            results = self._resample(dataframe, timeframes, bars)
+        return results
+
+    def _resample(self, dataframe: DataFrame or None, timeframes: List[TimeFrames],
+                  bars: int) -> Dict[TimeFrames, DataFrame or None]:
+        base = self.base_timeframe(timeframes)
+        results = {}
+        for timeframe in timeframes:
+            if dataframe is None:
+                results[timeframe] = None
+            elif timeframe == base:
+                results[timeframe] = dataframe.iloc[-bars:]
+            else:
+                results[timeframe] = resample_dataframe(dataframe, timeframe, self._api.delta_timezone).iloc[-bars:]
+        return results
@@ -0,0 +1,662 @@
+from __future__ import annotations
+from api.market_data_api import Attributes, MarketDataAPI, Order, Position, TimeFrames, TradeResult
+from api.rates import rates_to_dataframe
+from api.ticks import RATES_DTYPE, TICKS_DTYPE
+from dataclasses import dataclass, field
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from shared_data_structures import BarFrame, OrderSendResponse, OrderType
+from typing import Dict, Iterable, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from shared_data_structures import OrderSendRequest
+
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_POSITION_CLOSED = 10036
+
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+
+
+def mt5_rates(count: int, start: int = 1659384000, seconds: int = 60, seed: int = 0) -> np.ndarray:
+    """Random walk rates with the same structured dtype returned by MT5 copy_rates_*"""
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 1e-4, count))
+    rates = np.zeros(count, dtype=RATES_DTYPE)
+    rates["time"] = start + np.arange(count) * seconds
+    rates["open"] = np.concatenate(([close[0]], close[:-1]))
+    rates["high"] = np.maximum(rates["open"], close) + rng.uniform(0, 1e-4, count)
+    rates["low"] = np.minimum(rates["open"], close) - rng.uniform(0, 1e-4, count)
+    rates["close"] = close
+    rates["tick_volume"] = rng.integers(1, 500, count)
+    rates["spread"] = rng.integers(0, 20, count)
+    rates["real_volume"] = 0
+    return rates
+
+
+def random_dataframe(bars: int = 300, seed: int = 0) -> pd.DataFrame:
+    """Random walk bars in the standard dataframe format"""
+    return rates_to_dataframe(mt5_rates(bars, seed=seed), 5, 0)
+
+
+@dataclass
+class SimulatedSymbol:
+    symbol: str
+    digits: int
+    contract_size: float = 100000.0
+    volume_min: float = 0.01
+    volume_max: float = 100.0
+    volume_step: float = 0.01
+    currency_base: str = ""
+    currency_profit: str = "USD"
+    usd_profit_converter: float = 1.0
+    commission_per_lot: float = 0.0
+
+
+@dataclass
+class SimulatedDeal:
+    """Same fields used from the MT5 TradeDeal"""
+    ticket: int
+    order: int
+    time: int
+    type: OrderType
+    entry: int
+    magic: int
+    position_id: int
+    volume: float
+    price: float
+    commission: float
+    swap: float
+    fee: float
+    profit: float
+    symbol: str
+    comment: str
+
+
+@dataclass
+class SimulatedPosition:
+    ticket: int
+    symbol: str
+    type: OrderType
+    volume: float
+    price_open: float
+    time: int
+    sl: float
+    tp: float
+    magic: int
+    comment: str
+
+
+@dataclass
+class SimulatedOrder:
+    ticket: int
+    symbol: str
+    type: OrderType
+    volume: float
+    price: float
+    sl: float
+    tp: float
+    magic: int
+    comment: str
+    time: int
+
+
+@dataclass
+class SymbolFeed:
+    """Replayable market data of one symbol and its current quote"""
+    spec: SimulatedSymbol
+    timeframe: TimeFrames
+    times: np.ndarray
+    opens: np.ndarray
+    highs: np.ndarray
+    lows: np.ndarray
+    closes: np.ndarray
+    spreads: np.ndarray
+    frames: Dict[TimeFrames, pd.DataFrame] = field(default_factory=dict)
+    frame_times: Dict[TimeFrames, np.ndarray] = field(default_factory=dict)
+    frame_columns: Dict[TimeFrames, Dict[str, np.ndarray]] = field(default_factory=dict)
+    tick_times: np.ndarray or None = None
+    tick_bids: np.ndarray or None = None
+    tick_asks: np.ndarray or None = None
+    cursor: int = 0
+    forming: int = -1
+    bid: float = 0.0
+    ask: float = 0.0
+
+    @property
+    def point(self) -> float:
+        return 10.0 ** -self.spec.digits
+
+
+class SimulatedMarketDataAPI(MarketDataAPI):
+    """
+    In-process MT5 terminal replaying bars (or ticks) loaded in the standard dataframe format
+    The clock only moves forward with advance/step. The last bar returned for each timeframe is the forming one,
+    built with the data seen until the current time, so nothing from the future leaks to the strategies
+    Inside a bar the price goes Open -> Low -> High -> Close on bullish bars and Open -> High -> Low -> Close
+    otherwise, triggering the pending orders and the stop loss / take profit of the positions on the way
+    """
+    def __init__(self, delta_timezone: int = 0, balance: float = 10000.0, leverage: float = 100.0) -> None:
+        super().__init__(delta_timezone)
+        self.balance = balance
+        self.leverage = leverage
+        self.time: pd.Timestamp or None = None
+        self._now = np.iinfo(np.int64).min
+        self._feeds: Dict[str, SymbolFeed] = {}
+        self._positions: Dict[int, SimulatedPosition] = {}
+        self._orders: Dict[int, SimulatedOrder] = {}
+        self._deals: List[SimulatedDeal] = []
+        self._last_ticket = 0
+        self._connected = False
+
+    # -- MARKET DATA REPLAY
+
+    def add_symbol(self, spec: SimulatedSymbol, timeframe: TimeFrames, bars: pd.DataFrame) -> None:
+        """Load the base bars of the symbol. The quotes and the order matching follow these bars"""
+        feed = SymbolFeed(spec=spec,
+                          timeframe=timeframe,
+                          times=self._to_ns(bars.index),
+                          opens=bars["Open"].to_numpy(dtype=np.float64),
+                          highs=bars["High"].to_numpy(dtype=np.float64),
+                          lows=bars["Low"].to_numpy(dtype=np.float64),
+                          closes=bars["Close"].to_numpy(dtype=np.float64),
+                          spreads=bars["Spread"].to_numpy(dtype=np.float64) * 10.0 ** -spec.digits)
+        self._feeds[spec.symbol] = feed
+        self.add_bars(spec.symbol, timeframe, bars)
+        return None
+
+    def add_bars(self, symbol: str, timeframe: TimeFrames, bars: pd.DataFrame) -> None:
+        """Load the bars of another timeframe for create_dataframe_from_*"""
+        feed = self._feeds[symbol]
+        if "_Digits" not in bars.columns:
+            bars = bars.assign(_Digits=feed.spec.digits)
+        feed.frames[timeframe] = bars[self.DATAFRAME_COLUMNS]
+        feed.frame_times[timeframe] = self._to_ns(bars.index)
+        feed.frame_columns[timeframe] = {column: feed.frames[timeframe][column].to_numpy()
+                                         for column in self.DATAFRAME_COLUMNS}
+        return None
+
+    def add_ticks(self, symbol: str, ticks: pd.DataFrame) -> None:
+        """Load the ticks (columns Bid and Ask) of the symbol. The quotes and the order matching follow the ticks"""
+        feed = self._feeds[symbol]
+        feed.tick_times = self._to_ns(ticks.index)
+        feed.tick_bids = ticks["Bid"].to_numpy(dtype=np.float64)
+        feed.tick_asks = ticks["Ask"].to_numpy(dtype=np.float64)
+        feed.cursor = 0
+        return None
+
+    def start(self, time: datetime) -> None:
+        """Set the clock before the first advance"""
+        self._now = pd.Timestamp(time).value
+        self.time = pd.Timestamp(self._now)
+        return None
+
+    def next_event_time(self) -> pd.Timestamp or None:
+        """Time of the next bar open (or tick) of any symbol"""
+        times = []
+        for feed in self._feeds.values():
+            event_times = feed.tick_times if feed.tick_times is not None else feed.times
+            if feed.cursor < len(event_times):
+                times.append(event_times[feed.cursor])
+        return pd.Timestamp(min(times)) if times else None
+
+    def step(self) -> bool:
+        """Advance the clock to the next event. Return False when the data is over"""
+        next_time = self.next_event_time()
+        if next_time is None:
+            return False
+        self.advance(next_time)
+        return True
+
+    def advance(self, time: datetime) -> None:
+        """Move the clock forward, replaying the market data of every symbol until the time"""
+        to = pd.Timestamp(time).value
+        for feed in self._feeds.values():
+            if feed.tick_times is not None:
+                self._replay_ticks(feed, to)
+            else:
+                self._replay_bars(feed, to)
+        self._now = max(self._now, to)
+        self.time = pd.Timestamp(self._now)
+        return None
+
+    def _replay_ticks(self, feed: SymbolFeed, to: int) -> None:
+        while feed.cursor < len(feed.tick_times) and feed.tick_times[feed.cursor] <= to:
+            i = feed.cursor
+            self._move(feed, feed.tick_bids[i], feed.tick_asks[i] - feed.tick_bids[i], False,
+                       self._timestamp(feed.tick_times[i]))
+            feed.cursor += 1
+        return None
+
+    def _replay_bars(self, feed: SymbolFeed, to: int) -> None:
+        period = feed.timeframe.seconds * 1_000_000_000
+        while True:
+            if feed.forming >= 0 and feed.times[feed.forming] + period <= to:
+                i = feed.forming
+                if feed.closes[i] > feed.opens[i]:
+                    path = [feed.lows[i], feed.highs[i], feed.closes[i]]
+                else:
+                    path = [feed.highs[i], feed.lows[i], feed.closes[i]]
+                for price in path:
+                    self._move(feed, price, feed.spreads[i], True, self._timestamp(feed.times[i] + period))
+                feed.forming = -1
+            elif feed.cursor < len(feed.times) and feed.times[feed.cursor] <= to:
+                i = feed.cursor
+                self._move(feed, feed.opens[i], feed.spreads[i], False, self._timestamp(feed.times[i]))
+                feed.forming = i
+                feed.cursor += 1
+            else:
+                break
+        return None
+
+    def _move(self, feed: SymbolFeed, bid: float, spread: float, continuous: bool, time: int) -> None:
+        """
+        The price moves from the current quote to the new one, triggering orders and stops on the way
+        A continuous move fills at the trigger price, a gap fills at the new price
+        """
+        last_bid, last_ask = feed.bid, feed.ask
+        feed.bid = round(float(bid), feed.spec.digits)
+        feed.ask = round(float(bid + spread), feed.spec.digits)
+        if last_bid == 0.0:
+            return None
+        symbol = feed.spec.symbol
+
+        for order in [order for order in self._orders.values() if order.symbol == symbol]:
+            is_buy = "BUY" in order.type.value
+            last, price = (last_ask, feed.ask) if is_buy else (last_bid, feed.bid)
+            goes_down = order.type in (OrderType.BUY_LIMIT, OrderType.SELL_STOP)
+            fill = self._trigger(last, price, order.price, goes_down, continuous)
+            if fill is not None:
+                self._fill_pending_order(order, fill, time)
+
+        for position in [position for position in self._positions.values() if position.symbol == symbol]:
+            is_buy = position.type == OrderType.BUY
+            last, price = (last_bid, feed.bid) if is_buy else (last_ask, feed.ask)
+            if position.sl > 0:
+                fill = self._trigger(last, price, position.sl, is_buy, continuous)
+                if fill is not None:
+                    self._close(position, fill, time, "sl")
+                    continue
+            if position.tp > 0:
+                fill = self._trigger(last, price, position.tp, not is_buy, continuous)
+                if fill is not None:
+                    self._close(position, fill, time, "tp")
+        return None
+
+    @staticmethod
+    def _trigger(last: float, price: float, level: float, goes_down: bool, continuous: bool) -> float or None:
+        """Return the fill price when the price reaches the level, otherwise None"""
+        if goes_down and price <= level:
+            return level if continuous and last > level else price
+        if not goes_down and price >= level:
+            return level if continuous and last < level else price
+        return None
+
+    # -- MarketDataAPI
+
+    def connect(self, credentials=None) -> bool:
+        self._connected = True
+        return True
+
+    def shutdown(self) -> bool:
+        self._connected = False
+        return True
+
+    def create_dataframe_from_bars(self, symbol: str, timeframe: TimeFrames, start_position: int,
+                                   bars: int) -> pd.DataFrame or None:
+        feed = self._feeds.get(symbol)
+        if feed is None or timeframe not in feed.frames:
+            return None
+        end = self._visible_end(feed, timeframe) - start_position
+        if end <= 0:
+            return None
+        return self._window(feed, timeframe, max(end - bars, 0), end)
+
+    def create_dataframe_from_date(self, symbol: str, timeframe: TimeFrames, start_date: datetime,
+                                   end_date: datetime) -> pd.DataFrame or None:
+        feed = self._feeds.get(symbol)
+        if feed is None or timeframe not in feed.frames:
+            return None
+        times = feed.frame_times[timeframe]
+        start = int(np.searchsorted(times, pd.Timestamp(start_date).value, side="left"))
+        end = min(int(np.searchsorted(times, pd.Timestamp(end_date).value, side="right")),
+                  self._visible_end(feed, timeframe))
+        if end <= start:
+            return None
+        return self._window(feed, timeframe, start, end)
+
+    def _visible_end(self, feed: SymbolFeed, timeframe: TimeFrames) -> int:
+        """Number of bars opened until now, the last one may still be forming"""
+        return int(np.searchsorted(feed.frame_times[timeframe], self._now, side="right"))
+
+    def create_bar_frame_from_bars(self, symbol: str, timeframe: TimeFrames, start_position: int, bars: int,
+                                   reserve: Iterable[str] = ()) -> BarFrame or None:
+        """Same bars of create_dataframe_from_bars as a BarFrame, sliced from the numpy columns without pandas"""
+        feed = self._feeds.get(symbol)
+        if feed is None or timeframe not in feed.frames:
+            return None
+        end = self._visible_end(feed, timeframe) - start_position
+        if end <= 0:
+            return None
+        start = max(end - bars, 0)
+        columns = {column: values[start:end].copy() for column, values in feed.frame_columns[timeframe].items()}
+        for column, value in self._forming_bar(feed, timeframe, end).items():
+            columns[column][-1] = value
+        frame = BarFrame(feed.frame_times[timeframe][start:end].view("datetime64[ns]"), columns)
+        frame.reserve(reserve)
+        return frame
+
+    def _window(self, feed: SymbolFeed, timeframe: TimeFrames, start: int, end: int) -> pd.DataFrame:
+        """Bars between the positions. The forming bar only has the prices seen until now"""
+        dataframe = feed.frames[timeframe].iloc[start:end].copy()
+        last = len(dataframe) - 1
+        for column, value in self._forming_bar(feed, timeframe, end).items():
+            dataframe.iat[last, dataframe.columns.get_loc(column)] = value
+        return dataframe
+
+    def _forming_bar(self, feed: SymbolFeed, timeframe: TimeFrames, end: int) -> dict:
+        """Values of the forming bar seen until now when it is the last bar before end, otherwise nothing"""
+        forming_time = feed.frame_times[timeframe][end - 1]
+        if end < self._visible_end(feed, timeframe) or forming_time + timeframe.seconds * 1_000_000_000 <= self._now:
+            return {}
+        open_ = feed.frame_columns[timeframe]["Open"][end - 1]
+        high, low = self._forming_range(feed, forming_time)
+        return {"High": max(high, feed.bid, open_), "Low": min(low, feed.bid, open_), "Close": feed.bid,
+                "Volume": 0, "Trades": 0}
+
+    def _forming_range(self, feed: SymbolFeed, since: int) -> tuple:
+        """High and low seen from since until now"""
+        if feed.tick_times is not None:
+            start = int(np.searchsorted(feed.tick_times, since, side="left"))
+            bids = feed.tick_bids[start:feed.cursor]
+            return (bids.max(), bids.min()) if len(bids) > 0 else (-np.inf, np.inf)
+        start = int(np.searchsorted(feed.times, since, side="left"))
+        closed = feed.cursor - 1 if feed.forming >= 0 else feed.cursor
+        if closed <= start:
+            return -np.inf, np.inf
+        return feed.highs[start:closed].max(), feed.lows[start:closed].min()
+
+    def _standardize_dataframe(self, dataframe: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        return dataframe[self.DATAFRAME_COLUMNS]
+
+    def get_ticks_from(self, symbol: str, date_from: int, count: int) -> np.ndarray or None:
+        feed = self._feeds.get(symbol)
+        if feed is None or feed.tick_times is None:
+            return None
+        start = int(np.searchsorted(feed.tick_times, self._ns(date_from), side="left"))
+        return self._ticks(feed, start, min(start + count, feed.cursor))
+
+    def get_ticks_range(self, symbol: str, date_from: int, date_to: int) -> np.ndarray or None:
+        feed = self._feeds.get(symbol)
+        if feed is None or feed.tick_times is None:
+            return None
+        start = int(np.searchsorted(feed.tick_times, self._ns(date_from), side="left"))
+        end = int(np.searchsorted(feed.tick_times, self._ns(date_to), side="right"))
+        return self._ticks(feed, start, min(end, feed.cursor))
+
+    def _ticks(self, feed: SymbolFeed, start: int, end: int) -> np.ndarray:
+        """Ticks already replayed between the positions, as the MT5 structured array"""
+        end = max(start, end)
+        ticks = np.zeros(end - start, dtype=TICKS_DTYPE)
+        time_msc = feed.tick_times[start:end] // 1_000_000 - self.delta_timezone * 3_600_000
+        ticks["time"] = time_msc // 1000
+        ticks["time_msc"] = time_msc
+        ticks["bid"] = feed.tick_bids[start:end]
+        ticks["ask"] = feed.tick_asks[start:end]
+        return ticks
+
+    def get_symbol_attributes(self, symbol: str) -> Attributes:
+        feed = self._feeds[symbol]
+        spec = feed.spec
+        return Attributes(symbol=symbol,
+                          ask=feed.ask,
+                          bid=feed.bid,
+                          usd_profit_converter=spec.usd_profit_converter,
+                          spread=round(abs(feed.ask - feed.bid), spec.digits),
+                          digits=spec.digits,
+                          tick=feed.point,
+                          contract_size=spec.contract_size,
+                          currency_base=spec.currency_base,
+                          currency_profit=spec.currency_profit,
+                          volume_max=spec.volume_max,
+                          volume_min=spec.volume_min,
+                          volume_step=spec.volume_step)
+
+    def get_positions(self) -> List[Position]:
+        return [self._to_position(position) for position in self._positions.values()]
+
+    def get_position(self, ticket: int) -> Position or None:
+        return self.get_position_book().get(ticket)
+
+    def _to_position(self, position: SimulatedPosition) -> Position:
+        comment = position.comment.split(" ")
+        timeframe = comment[1] if len(comment) > 1 else ""
+        strategy = comment[0] if len(comment) > 0 else ""
+        return Position(symbol=position.symbol,
+                        timeframe=timeframe,
+                        strategy=strategy,
+                        ticket=position.ticket,
+                        price_open=position.price_open,
+                        open_time=self.format_timestamp(position.time),
+                        type=position.type,
+                        volume=position.volume,
+                        stop_loss=position.sl,
+                        stop_gain=position.tp,
+                        magic=position.magic,
+                        profit=self._profit(position, self._close_price(position)))
+
+    def get_orders(self) -> List[Order]:
+        return [Order(symbol=order.symbol,
+                      ticket=order.ticket,
+                      placed_time=self.format_timestamp(order.time),
+                      type=order.type,
+                      volume=order.volume,
+                      price_open=order.price,
+                      price_stop_limit=0.0,
+                      stop_loss=order.sl,
+                      stop_gain=order.tp,
+                      magic=order.magic) for order in self._orders.values()]
+
+    def format_timestamp(self, timestamp: int) -> str:
+        return str(datetime.utcfromtimestamp(float(timestamp + self.delta_timezone * 3.6e3)))
+
+    def history_deals_get(self, date_from: datetime or None = None, date_to: datetime or None = None,
+                          position: int or None = None) -> List[SimulatedDeal]:
+        """Same filters of the MT5 history_deals_get"""
+        deals = self._deals
+        if position is not None:
+            deals = [deal for deal in deals if deal.position_id == position]
+        if date_from is not None and date_to is not None:
+            start, end = self._timestamp(pd.Timestamp(date_from).value), self._timestamp(pd.Timestamp(date_to).value)
+            deals = [deal for deal in deals if start <= deal.time <= end]
+        return deals
+
+    def get_trade_result(self, ticket: int) -> TradeResult or None:
+        return self._trade_results(self.history_deals_get(position=ticket)).get(ticket)
+
+    def get_trade_results(self, date_from: datetime, date_to: datetime) -> Dict[int, TradeResult]:
+        return self._trade_results(self.history_deals_get(date_from, date_to))
+
+    def _trade_results(self, deals: List[SimulatedDeal]) -> Dict[int, TradeResult]:
+        """
+        Same results of trade_results_from_deals, grouped without pandas
+        A backtest asks for the deals of one or two positions at every trade, a dataframe costs more than the deals
+        """
+        by_position: Dict[int, List[SimulatedDeal]] = {}
+        for deal in sorted((deal for deal in deals if deal.position_id != 0),
+                           key=lambda deal: (deal.position_id, deal.time)):
+            by_position.setdefault(deal.position_id, []).append(deal)
+
+        results = {}
+        for ticket, position_deals in by_position.items():
+            opened = position_deals[0]
+            closed = position_deals[1] if len(position_deals) > 1 else None
+            results[ticket] = TradeResult(open_time=self.format_timestamp(opened.time),
+                                          open_price=float(opened.price),
+                                          close_time=self.format_timestamp(closed.time) if closed else "",
+                                          close_price=float(closed.price) if closed else 0.0,
+                                          ticket=ticket,
+                                          commission=float(sum(deal.commission for deal in position_deals)),
+                                          fee=float(sum(deal.fee for deal in position_deals)),
+                                          swap=float(sum(deal.swap for deal in position_deals)),
+                                          profit=float(sum(deal.profit for deal in position_deals)))
+        return results
+
+    # -- ACCOUNT
+
+    @property
+    def equity(self) -> float:
+        return self.balance + sum(self._profit(position, self._close_price(position))
+                                  for position in self._positions.values())
+
+    @property
+    def margin(self) -> float:
+        return sum(self._margin(position.symbol, position.volume, position.price_open)
+                   for position in self._positions.values())
+
+    def _margin(self, symbol: str, volume: float, price: float) -> float:
+        spec = self._feeds[symbol].spec
+        return volume * spec.contract_size * price * spec.usd_profit_converter / self.leverage
+
+    def have_free_margin(self, order_type: OrderType, symbol: str, volume: float, price: float) -> bool:
+        return self.equity - self.margin > self._margin(symbol, volume, price)
+
+    # -- ORDERS
+
+    def open_position(self, request: OrderSendRequest) -> OrderSendResponse or None:
+        if request.order_type not in (OrderType.BUY, OrderType.SELL):
+            return self._response(request, TRADE_RETCODE_INVALID,
+                                  f"The Order Type ({request.order_type.value}) is neither BUY nor SELL")
+        feed = self._feeds[request.symbol]
+        price = feed.ask if request.order_type == OrderType.BUY else feed.bid
+        code, comment = self._check_volume(request, price)
+        if code != TRADE_RETCODE_DONE:
+            return self._response(request, code, comment)
+        position = self._open(request.symbol, request.order_type, request.volume, price, request.sl, request.tp,
+                              request.magic, request.comment, self._new_ticket(), self._timestamp(self._now))
+        return self._response(request, TRADE_RETCODE_DONE, "Request executed", position.ticket)
+
+    def close_position(self, request: OrderSendRequest) -> OrderSendResponse or None:
+        position = self._positions.get(request.ticket)
+        if position is None:
+            return self._response(request, TRADE_RETCODE_POSITION_CLOSED,
+                                  f"The Position ({request.ticket}) is already Closed", request.ticket)
+        self._close(position, self._close_price(position), self._timestamp(self._now), request.comment)
+        return self._response(request, TRADE_RETCODE_DONE, "Request executed", position.ticket)
+
+    def modify_position(self, request: OrderSendRequest) -> OrderSendResponse or None:
+        position = self._positions.get(request.ticket)
+        if position is None:
+            return self._response(request, TRADE_RETCODE_POSITION_CLOSED,
+                                  f"The Position ({request.ticket}) is already Closed", request.ticket)
+        position.sl, position.tp = request.sl, request.tp
+        return self._response(request, TRADE_RETCODE_DONE, "Request executed", position.ticket)
+
+    def send_pending_order_limit_stop(self, request: OrderSendRequest) -> OrderSendResponse or None:
+        if request.order_type not in (OrderType.BUY_LIMIT, OrderType.BUY_STOP,
+                                      OrderType.SELL_LIMIT, OrderType.SELL_STOP):
+            return self._response(request, TRADE_RETCODE_INVALID,
+                                  f"The Order Type ({request.order_type.value}) is not a supported Pending Order")
+        code, comment = self._check_volume(request, request.price)
+        if code != TRADE_RETCODE_DONE:
+            return self._response(request, code, comment)
+        order = SimulatedOrder(ticket=self._new_ticket(), symbol=request.symbol, type=request.order_type,
+                               volume=request.volume, price=request.price, sl=request.sl, tp=request.tp,
+                               magic=request.magic, comment=request.comment, time=self._timestamp(self._now))
+        self._orders[order.ticket] = order
+        return self._response(request, TRADE_RETCODE_DONE, "Request executed", order.ticket)
+
+    def modify_pending_order(self, request: OrderSendRequest) -> OrderSendResponse or None:
+        order = self._orders.get(request.ticket)
+        if order is None:
+            return self._response(request, TRADE_RETCODE_INVALID, f"The Order ({request.ticket}) does not exist")
+        order.price, order.sl, order.tp = request.price, request.sl, request.tp
+        return self._response(request, TRADE_RETCODE_DONE, "Request executed", order.ticket)
+
+    def delete_pending_order(self, request: OrderSendRequest) -> OrderSendResponse or None:
+        order = self._orders.pop(request.ticket, None)
+        if order is None:
+            return self._response(request, TRADE_RETCODE_INVALID, f"The Order ({request.ticket}) does not exist")
+        return self._response(request, TRADE_RETCODE_DONE, "Request executed", order.ticket)
+
+    def _check_volume(self, request: OrderSendRequest, price: float) -> tuple:
+        spec = self._feeds[request.symbol].spec
+        if not spec.volume_min <= request.volume <= spec.volume_max:
+            return TRADE_RETCODE_INVALID_VOLUME, f"Invalid volume {request.volume}"
+        if not self.have_free_margin(request.order_type, request.symbol, request.volume, price):
+            return (TRADE_RETCODE_NO_MONEY,
+                    f"{request.symbol} - Do not have free margin for volume {request.volume} at price {price}")
+        return TRADE_RETCODE_DONE, ""
+
+    def _fill_pending_order(self, order: SimulatedOrder, price: float, time: int) -> None:
+        del self._orders[order.ticket]
+        order_type = OrderType.BUY if "BUY" in order.type.value else OrderType.SELL
+        self._open(order.symbol, order_type, order.volume, price, order.sl, order.tp, order.magic, order.comment,
+                   order.ticket, time)
+        return None
+
+    def _open(self, symbol: str, order_type: OrderType, volume: float, price: float, sl: float, tp: float,
+              magic: int, comment: str, ticket: int, time: int) -> SimulatedPosition:
+        position = SimulatedPosition(ticket=ticket, symbol=symbol, type=order_type, volume=volume, price_open=price,
+                                     time=time, sl=sl, tp=tp, magic=magic, comment=comment)
+        self._positions[ticket] = position
+        self._add_deal(position, order_type, DEAL_ENTRY_IN, price, 0.0, time, comment)
+        return position
+
+    def _close(self, position: SimulatedPosition, price: float, time: int, comment: str) -> None:
+        del self._positions[position.ticket]
+        profit = self._profit(position, price)
+        order_type = OrderType.SELL if position.type == OrderType.BUY else OrderType.BUY
+        self._add_deal(position, order_type, DEAL_ENTRY_OUT, price, profit, time, comment)
+        return None
+
+    def _add_deal(self, position: SimulatedPosition, order_type: OrderType, entry: int, price: float,
+                  profit: float, time: int, comment: str) -> None:
+        commission = -self._feeds[position.symbol].spec.commission_per_lot * position.volume
+        self.balance += profit + commission
+        self._deals.append(SimulatedDeal(ticket=self._new_ticket(), order=position.ticket, time=time,
+                                         type=order_type, entry=entry, magic=position.magic,
+                                         position_id=position.ticket, volume=position.volume, price=price,
+                                         commission=commission, swap=0.0, fee=0.0, profit=profit,
+                                         symbol=position.symbol, comment=comment))
+        self.invalidate_position_book()
+        return None
+
+    def _close_price(self, position: SimulatedPosition) -> float:
+        feed = self._feeds[position.symbol]
+        return feed.bid if position.type == OrderType.BUY else feed.ask
+
+    def _profit(self, position: SimulatedPosition, price: float) -> float:
+        spec = self._feeds[position.symbol].spec
+        direction = 1.0 if position.type == OrderType.BUY else -1.0
+        profit = direction * (price - position.price_open) * position.volume * spec.contract_size
+        return round(profit * spec.usd_profit_converter, 2)
+
+    def _response(self, request: OrderSendRequest, code: int, comment: str, ticket: int = 0) -> OrderSendResponse:
+        return OrderSendResponse(symbol=request.symbol,
+                                 action=request.action,
+                                 order_type=request.order_type,
+                                 status=code == TRADE_RETCODE_DONE,
+                                 ticket=ticket,
+                                 code=code,
+                                 comment=comment)
+
+    def _new_ticket(self) -> int:
+        self._last_ticket += 1
+        return self._last_ticket
+
+    def _timestamp(self, time: int) -> int:
+        """Simulated time (already shifted by delta_timezone) as the MT5 server timestamp"""
+        return int(time // 1_000_000_000 - self.delta_timezone * 3600)
+
+    def _ns(self, timestamp: int) -> int:
+        """MT5 server timestamp as the simulated time"""
+        return (int(timestamp) + self.delta_timezone * 3600) * 1_000_000_000
+
+    @staticmethod
+    def _to_ns(index: pd.Index) -> np.ndarray:
+        return np.asarray(pd.DatetimeIndex(index), dtype="datetime64[ns]").view(np.int64)
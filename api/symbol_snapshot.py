@@ -0,0 +1,51 @@
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+
+class SymbolSnapshots:
+    """
+    One snapshot of the broker symbol info per symbol and per tick
+    A snapshot is valid until the next tick starts or until it is older than the TTL (in seconds)
+    Safe to share between the prefetch threads
+    """
+    def __init__(self, fetch: Callable[[str], Any], ttl: float = 1.0) -> None:
+        self._fetch = fetch
+        self.ttl = ttl
+        self._snapshots: Dict[str, Tuple[float, Any]] = {}
+        self.requests = 0
+        self.broker_calls = 0
+        self.saved_last_tick = 0
+        self._lock = threading.Lock()
+
+    @property
+    def saved(self) -> int:
+        """Broker calls saved in the current tick"""
+        return self.requests - self.broker_calls
+
+    def new_tick(self) -> None:
+        with self._lock:
+            self.saved_last_tick = self.saved
+            self.requests = 0
+            self.broker_calls = 0
+            self._snapshots.clear()
+        return None
+
+    def invalidate(self, symbol: str) -> None:
+        with self._lock:
+            self._snapshots.pop(symbol, None)
+        return None
+
+    def get(self, symbol: str) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            snapshot = self._snapshots.get(symbol)
+            if snapshot is not None and now - snapshot[0] <= self.ttl:
+                return snapshot[1]
+            self.broker_calls += 1
+        info = self._fetch(symbol)
+        with self._lock:
+            self._snapshots[symbol] = (now, info)
+        return info
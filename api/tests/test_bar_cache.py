@@ -0,0 +1,44 @@
+from api.bar_cache import BarCache, RatesBuffer
+from api.simulated import mt5_rates
+import numpy as np
+import pytest
+
+
+def make_rates(start: int, count: int, close: float = 1.0) -> np.ndarray:
+    rates = mt5_rates(count, start=start * 60)
+    rates["close"] = close
+    return rates
+
+
+@pytest.fixture
+def buffer() -> RatesBuffer:
+    return RatesBuffer(make_rates(0, 5), capacity=8)
+
+
+def test_tail(buffer: RatesBuffer) -> None:
+    assert len(buffer) == 5
+    assert buffer.last_time == 4 * 60
+    assert buffer.tail(3)["time"].tolist() == [120, 180, 240]
+
+
+def test_merge_patches_forming_bar(buffer: RatesBuffer) -> None:
+    buffer.merge(make_rates(4, 1, close=2.0))
+    assert len(buffer) == 5
+    assert buffer.tail(1)["close"][0] == 2.0
+
+
+def test_merge_appends_new_bars_and_drops_oldest(buffer: RatesBuffer) -> None:
+    buffer.merge(make_rates(4, 6, close=3.0))
+    assert len(buffer) == 8
+    assert buffer.last_time == 9 * 60
+    assert buffer.tail(8)["time"].tolist() == [i * 60 for i in range(2, 10)]
+    assert buffer.tail(8)["close"].tolist() == [1.0, 1.0, 3.0, 3.0, 3.0, 3.0, 3.0, 3.0]
+
+
+def test_cache_store_grows_capacity() -> None:
+    cache = BarCache(capacity=10)
+    buffer = cache.store("EURUSD", "M5", make_rates(0, 20))
+    assert buffer.capacity == 20
+    assert cache.get("EURUSD", "M5") is buffer
+    cache.remove("EURUSD", "M5")
+    assert cache.get("EURUSD", "M5") is None
@@ -0,0 +1,48 @@
+from api.compact import CompactBars, price_to_ticks, ticks_to_price
+from api.rates import rates_to_dataframe
+from api.simulated import mt5_rates
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def test_dataframe_is_the_api_dataframe() -> None:
+    rates = mt5_rates(1000)
+    bars = CompactBars.from_rates(rates, 5)
+    pd.testing.assert_frame_equal(bars.to_dataframe(-6), rates_to_dataframe(rates, 5, -6))
+    pd.testing.assert_frame_equal(bars.tail(10).to_dataframe(0), rates_to_dataframe(rates[-10:], 5, 0))
+
+
+def test_rates_round_trip() -> None:
+    rates = mt5_rates(100)
+    compact_rates = CompactBars.from_rates(rates, 5).to_rates()
+    for field in ["open", "high", "low", "close"]:
+        np.testing.assert_array_equal(compact_rates[field], np.round(rates[field], 5))
+    for field in ["time", "tick_volume", "spread", "real_volume"]:
+        np.testing.assert_array_equal(compact_rates[field], rates[field])
+
+
+def test_narrow_types() -> None:
+    rates = mt5_rates(1000)
+    bars = CompactBars.from_rates(rates, 5)
+    assert bars.columns["close"].dtype == np.int32
+    assert bars.columns["spread"].dtype == np.uint16
+    assert bars.nbytes < 0.6 * rates.nbytes
+    # -- THE TICKS OF A PRICE OF 100000 WITH 5 DIGITS DO NOT FIT IN int32
+    for field in ["open", "high", "low", "close"]:
+        rates[field] += 100000
+    assert CompactBars.from_rates(rates, 5).columns["close"].dtype == np.int64
+
+
+def test_volumes_out_of_the_narrow_types() -> None:
+    rates = mt5_rates(10)
+    rates["spread"][3] = 70000
+    with pytest.raises(OverflowError):
+        CompactBars.from_rates(rates, 5)
+
+
+def test_ticks_comparisons_are_exact() -> None:
+    assert 0.1 + 0.2 != 0.3
+    assert price_to_ticks(0.1 + 0.2, 5) == price_to_ticks(0.3, 5) == 30000
+    assert ticks_to_price(110013, 5) == 1.10013
+    np.testing.assert_array_equal(price_to_ticks(np.array([1.1, 1.10001]), 5), [110000, 110001])
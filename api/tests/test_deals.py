@@ -0,0 +1,37 @@
+from api.deals import trade_results_from_deals
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def deals() -> pd.DataFrame:
+    return pd.DataFrame({
+        "ticket": [10, 11, 12, 13, 14],
+        "time": [1000, 1100, 1500, 1200, 900],
+        "position_id": [1, 2, 1, 2, 0],
+        "price": [1.10, 25.0, 1.12, 24.0, 0.0],
+        "commission": [-1.0, -2.0, -1.0, -2.0, 0.0],
+        "swap": [0.0, 0.0, -0.5, 0.0, 0.0],
+        "fee": [0.0, -0.1, 0.0, -0.1, 0.0],
+        "profit": [0.0, 0.0, 20.0, -10.0, 5000.0],
+    })
+
+
+def test_trade_results_from_deals(deals: pd.DataFrame) -> None:
+    results = trade_results_from_deals(deals, str)
+    assert sorted(results.keys()) == [1, 2]
+    trade = results[1]
+    assert trade.open_time == "1000"
+    assert trade.open_price == 1.10
+    assert trade.close_time == "1500"
+    assert trade.close_price == 1.12
+    assert trade.commission == -2.0
+    assert trade.swap == -0.5
+    assert trade.profit == 20.0
+    assert results[2].fee == pytest.approx(-0.2)
+
+
+def test_open_trade_has_no_close(deals: pd.DataFrame) -> None:
+    results = trade_results_from_deals(deals[deals["ticket"] == 10], str)
+    assert results[1].close_time == ""
+    assert results[1].close_price == 0.0
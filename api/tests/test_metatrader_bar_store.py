@@ -0,0 +1,77 @@
+from api import TimeFrames
+from api.ticks import RATES_DTYPE
+from database import BarStore
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+from types import SimpleNamespace
+
+# -- THE MetaTrader5 PACKAGE ONLY INSTALLS ON WINDOWS, THE CONSTANTS READ BY api.metatrader ARE STUBBED
+MT5_CONSTANTS = ["TRADE_ACTION_DEAL", "TRADE_ACTION_SLTP", "TRADE_ACTION_PENDING", "TRADE_ACTION_MODIFY",
+                 "TRADE_ACTION_REMOVE", "ORDER_TYPE_BUY", "ORDER_TYPE_SELL", "ORDER_TYPE_BUY_LIMIT",
+                 "ORDER_TYPE_BUY_STOP", "ORDER_TYPE_BUY_STOP_LIMIT", "ORDER_TYPE_SELL_LIMIT", "ORDER_TYPE_SELL_STOP",
+                 "ORDER_TYPE_SELL_STOP_LIMIT", "TIMEFRAME_M1", "TIMEFRAME_M5", "TIMEFRAME_M15", "TIMEFRAME_H1",
+                 "TIMEFRAME_H4", "TIMEFRAME_D1", "TIMEFRAME_W1", "TIMEFRAME_MN1", "POSITION_TYPE_BUY",
+                 "POSITION_TYPE_SELL"]
+sys.modules["MetaTrader5"] = SimpleNamespace(symbol_info=lambda symbol: None,
+                                             **{name: code for code, name in enumerate(MT5_CONSTANTS)})
+from api import metatrader  # noqa: E402
+# -- ONLY api.metatrader READS THE STUB, FOR THE OTHER TESTS THE PACKAGE IS STILL MISSING
+del sys.modules["MetaTrader5"]
+
+# -- MONTH OPENS OF 2022 FROM JANUARY TO MAY, FEBRUARY HAS 28 DAYS
+MONTHS = [int(pd.Timestamp(f"2022-{month:02d}-01").timestamp()) for month in range(1, 6)]
+# -- LAST TICK (SERVER TIME) IN THE MIDDLE OF MAY
+MAY_15 = int(pd.Timestamp("2022-05-15").timestamp())
+
+
+def monthly_rates(times: list) -> np.ndarray:
+    rates = np.zeros(len(times), dtype=RATES_DTYPE)
+    rates["time"] = times
+    rates["open"] = rates["high"] = rates["low"] = rates["close"] = 1.1
+    return rates
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch) -> metatrader.MetaTrader5API:
+    requests = []
+
+    def copy_rates_range(symbol, timeframe, date_from: datetime, date_to: datetime) -> np.ndarray:
+        requests.append((date_from, date_to))
+        start, end = pd.Timestamp(date_from).timestamp(), pd.Timestamp(date_to).timestamp()
+        return monthly_rates([time for time in MONTHS if start <= time <= end])
+
+    monkeypatch.setattr(metatrader.mt5, "copy_rates_range", copy_rates_range, raising=False)
+    api = metatrader.MetaTrader5API(delta_timezone=0, bar_store=BarStore(str(tmp_path)))
+    api.last_tick = MAY_15
+    monkeypatch.setattr(api, "_symbol_info", lambda symbol: SimpleNamespace(digits=5, time=api.last_tick))
+    api.requests = requests
+    return api
+
+
+def test_new_month_after_a_short_month_is_stored(api: metatrader.MetaTrader5API) -> None:
+    # -- JANUARY AND FEBRUARY ARE STORED, MARCH OPENS 28 DAYS AFTER FEBRUARY
+    api.bar_store.append("EURUSD", TimeFrames.MN1, monthly_rates(MONTHS[:2]), 5)
+    end = datetime.utcfromtimestamp(MONTHS[-1])
+    dataframe = api.create_dataframe_from_date("EURUSD", TimeFrames.MN1, datetime(2022, 1, 1), end)
+    assert list(dataframe.index) == list(pd.to_datetime(MONTHS, unit="s"))
+    # -- MARCH AND APRIL ARE CLOSED AND STORED, MAY IS STILL FORMING AND ONLY RETURNED
+    assert api.bar_store.last_time("EURUSD", TimeFrames.MN1) == MONTHS[3]
+    assert api.requests[0][0] == datetime.utcfromtimestamp(MONTHS[1] + 1)
+
+    # -- THE NEXT READ ONLY REQUESTS THE BARS AFTER APRIL
+    dataframe = api.create_dataframe_from_date("EURUSD", TimeFrames.MN1, datetime(2022, 1, 1), end)
+    assert len(dataframe) == len(MONTHS)
+    assert api.requests[1][0] == datetime.utcfromtimestamp(MONTHS[3] + 1)
+
+
+def test_last_bar_is_stored_once_it_is_closed(api: metatrader.MetaTrader5API) -> None:
+    api.bar_store.append("EURUSD", TimeFrames.MN1, monthly_rates(MONTHS[:2]), 5)
+    # -- THE LAST TICK IS IN JUNE, MAY IS CLOSED
+    api.last_tick = int(pd.Timestamp("2022-06-01 00:05").timestamp())
+    end = datetime.utcfromtimestamp(MONTHS[-1])
+    dataframe = api.create_dataframe_from_date("EURUSD", TimeFrames.MN1, datetime(2022, 1, 1), end)
+    assert len(dataframe) == len(MONTHS)
+    assert api.bar_store.last_time("EURUSD", TimeFrames.MN1) == MONTHS[-1]
@@ -0,0 +1,32 @@
+from api.market_data_api import Position
+from api.position_book import PositionBook
+import pytest
+from shared_data_structures import OrderType
+
+
+def make_position(ticket: int, symbol: str, magic: int, timeframe: str) -> Position:
+    return Position(symbol=symbol, timeframe=timeframe, strategy="EMACrossover", ticket=ticket, price_open=1.0,
+                    open_time="2022-08-01 20:00:00", type=OrderType.BUY, volume=0.1, profit=0.0, stop_loss=0.0,
+                    stop_gain=0.0, magic=magic)
+
+
+@pytest.fixture
+def book() -> PositionBook:
+    return PositionBook([make_position(1, "EURUSD", 99, "M15"),
+                         make_position(2, "EURUSD", 99, "H1"),
+                         make_position(3, "BTCUSD", 99, "M15"),
+                         make_position(4, "BTCUSD", 7, "M15")])
+
+
+def test_get_by_ticket(book: PositionBook) -> None:
+    assert len(book) == 4
+    assert 3 in book
+    assert book.get(3).symbol == "BTCUSD"
+    assert book.get(5) is None
+
+
+def test_indexes(book: PositionBook) -> None:
+    assert [p.ticket for p in book.by_magic(99)] == [1, 2, 3]
+    assert [p.ticket for p in book.by_symbol("BTCUSD")] == [3, 4]
+    assert [p.ticket for p in book.by_magic_timeframe(99, "M15")] == [1, 3]
+    assert book.by_magic(0) == []
@@ -0,0 +1,84 @@
+from api.market_data_api import TimeFrames
+from api.prefetch import MarketDataPrefetcher, MarketDataRequest
+import pytest
+import time
+
+
+class SlowAPI:
+    """Each request takes the time set for its symbol"""
+    def __init__(self, delays: dict) -> None:
+        self.delays = delays
+
+    def create_dataframe_from_bars(self, symbol, timeframe, start_position, bars):
+        time.sleep(self.delays[symbol])
+        return f"{symbol} {timeframe.value} {bars}"
+
+    def get_symbol_attributes(self, symbol):
+        return symbol
+
+
+@pytest.fixture
+def batches() -> list:
+    return [[MarketDataRequest(symbol, timeframe, 100) for timeframe in (TimeFrames.M15, TimeFrames.H1)]
+            for symbol in ("EURUSD", "GBPUSD", "BTCUSD")]
+
+
+def test_results_keep_the_request_order(batches: list) -> None:
+    prefetcher = MarketDataPrefetcher(SlowAPI({"EURUSD": 0.03, "GBPUSD": 0.0, "BTCUSD": 0.01}), max_workers=6)
+    results = list(prefetcher.iterate(batches))
+    prefetcher.shutdown()
+    assert [[data.dataframe for data in batch] for batch in results] == [
+        [f"{r.symbol} {r.timeframe.value} 100" for r in batch] for batch in batches]
+
+
+def test_requests_run_concurrently(batches: list) -> None:
+    prefetcher = MarketDataPrefetcher(SlowAPI({"EURUSD": 0.1, "GBPUSD": 0.1, "BTCUSD": 0.1}), max_workers=6,
+                                      lookahead=2)
+    start = time.monotonic()
+    list(prefetcher.iterate(batches))
+    prefetcher.shutdown()
+    assert time.monotonic() - start < 0.3
+
+
+def test_request_timeout_returns_no_data(batches: list) -> None:
+    prefetcher = MarketDataPrefetcher(SlowAPI({"EURUSD": 0.5, "GBPUSD": 0.0, "BTCUSD": 0.0}), timeout=0.05)
+    results = prefetcher.fetch(batches[0] + batches[1])
+    prefetcher.shutdown()
+    assert [data.dataframe for data in results[:2]] == [None, None]
+    assert results[2].dataframe == "GBPUSD M15 100"
+
+
+class CountingAPI(SlowAPI):
+    """SlowAPI counting the requests of each symbol running at the same time"""
+    def __init__(self, delays: dict) -> None:
+        SlowAPI.__init__(self, delays)
+        self.running = {symbol: 0 for symbol in delays}
+        self.most_running = {symbol: 0 for symbol in delays}
+
+    def create_dataframe_from_bars(self, symbol, timeframe, start_position, bars):
+        self.running[symbol] += 1
+        self.most_running[symbol] = max(self.most_running[symbol], self.running[symbol])
+        try:
+            return SlowAPI.create_dataframe_from_bars(self, symbol, timeframe, start_position, bars)
+        finally:
+            self.running[symbol] -= 1
+
+
+def test_timed_out_request_finishes_before_the_next_one_of_its_timeframe() -> None:
+    api = CountingAPI({"EURUSD": 0.2})
+    prefetcher = MarketDataPrefetcher(api, timeout=0.05)
+    request = MarketDataRequest("EURUSD", TimeFrames.M15, 100)
+    assert prefetcher.fetch([request])[0].dataframe is None
+    prefetcher.timeout = 1.0
+    assert prefetcher.fetch([request])[0].dataframe == "EURUSD M15 100"
+    prefetcher.shutdown()
+    assert api.most_running["EURUSD"] == 1
+
+
+def test_lookahead_of_all_the_batches_requests_them_at_once(batches: list) -> None:
+    prefetcher = MarketDataPrefetcher(SlowAPI({"EURUSD": 0.1, "GBPUSD": 0.1, "BTCUSD": 0.1}), max_workers=6)
+    start = time.monotonic()
+    list(prefetcher.iterate(batches, lookahead=len(batches)))
+    prefetcher.shutdown()
+    # -- THE DEFAULT LOOKAHEAD OF 1 WAITS TWICE, ALL THE BATCHES AT ONCE ONLY FOR THE SLOWEST REQUEST
+    assert time.monotonic() - start < 0.18
@@ -0,0 +1,24 @@
+from api.market_data_api import MarketDataAPI
+from api.rates import rates_to_dataframe, standardize_dataframe
+from api.simulated import mt5_rates
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def rates() -> np.ndarray:
+    return mt5_rates(500)
+
+
+def test_rates_to_dataframe_columns(rates: np.ndarray) -> None:
+    dataframe = rates_to_dataframe(rates, 5, -6)
+    assert dataframe.columns.to_list() == MarketDataAPI.DATAFRAME_COLUMNS
+    assert dataframe.index.name == "Date"
+    assert len(dataframe) == len(rates)
+
+
+def test_rates_to_dataframe_matches_standardize_dataframe(rates: np.ndarray) -> None:
+    expected = standardize_dataframe(pd.DataFrame(rates), 5, -6)
+    dataframe = rates_to_dataframe(rates, 5, -6)
+    pd.testing.assert_frame_equal(dataframe, expected[MarketDataAPI.DATAFRAME_COLUMNS])
@@ -0,0 +1,137 @@
+from api.market_data_api import TimeFrames
+from api.prefetch import MarketDataPrefetcher, MarketDataRequest
+from api.rates import rates_to_dataframe
+from api.resample import Resampler, bucket_times, resample_dataframe, resample_rates
+from api.ticks import TICKS_DTYPE, aggregate_ticks
+import numpy as np
+import pandas as pd
+import pytest
+
+# -- MONDAY 2022-08-01 00:00 (SERVER TIME)
+MONDAY = 1659312000
+HOUR = 3600
+
+
+def session_ticks(days: int = 10, seed: int = 0) -> np.ndarray:
+    """Random ticks of a session from 01:05 to 23:00 on the weekdays, nothing on the weekends"""
+    rng = np.random.default_rng(seed)
+    times = []
+    for day in range(days):
+        start = MONDAY + day * 24 * HOUR
+        if (day % 7) in (5, 6):
+            continue
+        times.append(np.sort(rng.integers((start + HOUR + 300) * 1000, (start + 23 * HOUR) * 1000, 3000)))
+    times = np.concatenate(times)
+    ticks = np.zeros(len(times), dtype=TICKS_DTYPE)
+    ticks["time_msc"] = times
+    ticks["time"] = times // 1000
+    ticks["bid"] = np.round(1.1 + np.cumsum(rng.normal(0, 1e-4, len(times))), 5)
+    ticks["ask"] = ticks["bid"] + rng.integers(1, 20, len(times)) * 1e-5
+    ticks["volume"] = rng.integers(1, 10, len(times))
+    return ticks
+
+
+def test_bucket_times() -> None:
+    times = np.array([MONDAY + 5 * HOUR + 59, MONDAY + 2 * 24 * HOUR + 3 * HOUR])
+    assert list(bucket_times(times, TimeFrames.H4)) == [MONDAY + 4 * HOUR, MONDAY + 2 * 24 * HOUR]
+    assert list(bucket_times(times, TimeFrames.D1)) == [MONDAY, MONDAY + 2 * 24 * HOUR]
+    # -- THE WEEK STARTS ON SUNDAY AND THE MONTH ON ITS FIRST DAY
+    assert list(bucket_times(times, TimeFrames.W1)) == [MONDAY - 24 * HOUR] * 2
+    assert list(bucket_times(times, TimeFrames.MN1)) == [MONDAY] * 2
+
+
+@pytest.mark.parametrize("base, timeframe", [(TimeFrames.M1, TimeFrames.M15), (TimeFrames.M1, TimeFrames.H1),
+                                             (TimeFrames.M5, TimeFrames.H4), (TimeFrames.M15, TimeFrames.D1),
+                                             (TimeFrames.H1, TimeFrames.W1)])
+def test_resampled_rates_match_the_rates_of_the_ticks(base: TimeFrames, timeframe: TimeFrames) -> None:
+    ticks = session_ticks()
+    resampled = resample_rates(aggregate_ticks(ticks, base, 5), timeframe)
+    expected = aggregate_ticks(ticks, timeframe, 5) if timeframe != TimeFrames.W1 else None
+    if expected is None:
+        assert list(resampled["time"]) == [MONDAY - 24 * HOUR, MONDAY + 6 * 24 * HOUR]
+        assert resampled["tick_volume"].sum() == len(ticks)
+        return None
+    for field in ["time", "open", "high", "low", "close", "tick_volume", "spread", "real_volume"]:
+        np.testing.assert_array_equal(resampled[field], expected[field])
+
+
+@pytest.mark.parametrize("delta_timezone", [0, -6, 3])
+def test_resampled_dataframe_is_bucketed_in_server_time(delta_timezone: int) -> None:
+    ticks = session_ticks()
+    base = rates_to_dataframe(aggregate_ticks(ticks, TimeFrames.M15, 5), 5, delta_timezone)
+    # -- THE HISTORY STARTS AT THE FIRST SESSION, ITS FIRST DAY IS COMPLETE
+    resampled = resample_dataframe(base, TimeFrames.D1, delta_timezone, complete=False)
+    expected = rates_to_dataframe(aggregate_ticks(ticks, TimeFrames.D1, 5), 5, delta_timezone)
+    pd.testing.assert_frame_equal(resampled, expected, check_freq=False)
+
+
+def test_incomplete_first_bar_is_dropped() -> None:
+    base = rates_to_dataframe(aggregate_ticks(session_ticks(), TimeFrames.M15, 5), 5, 0)
+    # -- FROM 02:00 THE FIRST DAY IS INCOMPLETE, THE SECOND DAY ON IS THE SAME
+    partial = base[base.index >= pd.Timestamp(MONDAY + 2 * HOUR, unit="s")]
+    resampled = resample_dataframe(partial, TimeFrames.D1, 0)
+    expected = resample_dataframe(base, TimeFrames.D1, 0, complete=False)
+    pd.testing.assert_frame_equal(resampled, expected.iloc[1:])
+    assert len(resample_dataframe(partial, TimeFrames.D1, 0, complete=False)) == len(expected)
+
+
+class BaseAPI:
+    """Bars of M15 from the ticks, counting the requests"""
+    delta_timezone = -6
+
+    def __init__(self) -> None:
+        self.requests = []
+        self._rates = aggregate_ticks(session_ticks(), TimeFrames.M15, 5)
+
+    def create_dataframe_from_bars(self, symbol, timeframe, start_position, bars):
+        self.requests.append((symbol, timeframe, bars))
+        return rates_to_dataframe(self._rates[-bars:], 5, self.delta_timezone)
+
+    def get_symbol_attributes(self, symbol):
+        return symbol
+
+
+def test_prefetcher_requests_the_base_timeframe_once() -> None:
+    api = BaseAPI()
+    prefetcher = MarketDataPrefetcher(api, resampler=Resampler(api))
+    batch = [MarketDataRequest("EURUSD", timeframe, 20) for timeframe in (TimeFrames.H1, TimeFrames.M15)]
+    results = prefetcher.fetch(batch)
+    prefetcher.shutdown()
+    assert api.requests == [("EURUSD", TimeFrames.M15, 84)]
+    assert [data.request.timeframe for data in results] == [TimeFrames.H1, TimeFrames.M15]
+    assert [len(data.dataframe) for data in results] == [20, 20]
+    expected = resample_dataframe(api.create_dataframe_from_bars("EURUSD", TimeFrames.M15, 0, 2000),
+                                  TimeFrames.H1, api.delta_timezone)
+    pd.testing.assert_frame_equal(results[0].dataframe, expected.iloc[-20:])
+
+
+class SessionAPI(BaseAPI):
+    """Bars of M15 of sessions opening at 01:05, the first bar of each session is stamped at the open"""
+    delta_timezone = 0
+
+    def __init__(self, days: int) -> None:
+        BaseAPI.__init__(self)
+        self._rates = aggregate_ticks(session_ticks(days=days), TimeFrames.M15, 5)
+        opens = np.r_[True, np.diff(self._rates["time"]) > HOUR]
+        self._rates["time"][opens] += 5 * 60
+
+
+@pytest.mark.parametrize("bars", [1, 5, 17, 30])
+def test_resampled_timeframes_have_all_their_bars_with_a_non_aligned_session_open(bars: int) -> None:
+    api = SessionAPI(days=90)
+    timeframes = [TimeFrames.M15, TimeFrames.H1, TimeFrames.H4, TimeFrames.D1]
+    results = Resampler(api).dataframes("EURUSD", timeframes, bars)
+    assert [len(results[timeframe]) for timeframe in timeframes] == [bars] * 4
+    history = rates_to_dataframe(api._rates, 5, 0)
+    for timeframe in timeframes[1:]:
+        expected = resample_dataframe(history, timeframe, 0).iloc[-bars:]
+        pd.testing.assert_frame_equal(results[timeframe], expected)
+
+
+def test_base_bars_are_not_requested_again_past_the_history() -> None:
+    api = SessionAPI(days=12)
+    results = Resampler(api).dataframes("EURUSD", [TimeFrames.M15, TimeFrames.D1], 20)
+    # -- THE 10 SESSIONS ARE LESS THAN THE BASE BARS REQUESTED, THE HISTORY ENDED
+    assert [bars for _, _, bars in api.requests] == [21 * 96]
+    # -- THE FIRST SESSION OPENS AFTER THE START OF ITS DAY, IT IS DROPPED AS INCOMPLETE
+    assert len(results[TimeFrames.D1]) == 9
@@ -0,0 +1,118 @@
+from api.deals import trade_results_from_deals
+from api.market_data_api import TimeFrames
+from api.simulated import SimulatedMarketDataAPI, SimulatedSymbol
+import numpy as np
+import pandas as pd
+import pytest
+from shared_data_structures import OrderExecution, OrderSendRequest, OrderType
+
+
+def m15_bars() -> pd.DataFrame:
+    index = pd.date_range("2022-08-01 00:00", periods=6, freq="15min", name="Date")
+    return pd.DataFrame({
+        "_Digits": 5,
+        "Open": [1.10000, 1.10100, 1.10200, 1.10100, 1.09900, 1.09800],
+        "High": [1.10150, 1.10250, 1.10250, 1.10150, 1.10000, 1.09900],
+        "Low": [1.09950, 1.10050, 1.10050, 1.09850, 1.09750, 1.09700],
+        "Close": [1.10100, 1.10200, 1.10100, 1.09900, 1.09800, 1.09750],
+        "Volume": 0,
+        "Trades": 100,
+        "Spread": 10,
+    }, index=index)
+
+
+@pytest.fixture
+def api() -> SimulatedMarketDataAPI:
+    api = SimulatedMarketDataAPI(balance=10000.0)
+    api.add_symbol(SimulatedSymbol("EURUSD", digits=5), TimeFrames.M15, m15_bars())
+    api.start(pd.Timestamp("2022-08-01 00:00"))
+    api.advance(pd.Timestamp("2022-08-01 00:15"))
+    return api
+
+
+def request(action: OrderExecution, order_type: OrderType, **kwargs) -> OrderSendRequest:
+    values = dict(symbol="EURUSD", action=action, order_type=order_type, volume=0.1, price=0.0, sl=0.0, tp=0.0,
+                  magic=99, comment="EMACrossover M15")
+    values.update(kwargs)
+    return OrderSendRequest(**values)
+
+
+def test_forming_bar_has_no_future_data(api: SimulatedMarketDataAPI) -> None:
+    dataframe = api.create_dataframe_from_bars("EURUSD", TimeFrames.M15, 0, 100)
+    assert len(dataframe) == 2
+    last = dataframe.iloc[-1]
+    assert last["Open"] == last["High"] == last["Low"] == last["Close"] == 1.10100
+    assert dataframe["Close"].iloc[0] == 1.10100
+
+
+def test_quote_follows_the_bars(api: SimulatedMarketDataAPI) -> None:
+    attributes = api.get_symbol_attributes("EURUSD")
+    assert attributes.bid == 1.10100
+    assert attributes.ask == pytest.approx(1.10110)
+
+
+def test_open_and_close_position(api: SimulatedMarketDataAPI) -> None:
+    response = api.open_position(request(OrderExecution.OPEN_POSITION, OrderType.BUY))
+    assert response.status is True
+    assert api.get_position(response.ticket).price_open == pytest.approx(1.10110)
+    api.advance(pd.Timestamp("2022-08-01 00:30"))
+    response = api.close_position(request(OrderExecution.CLOSE_POSITION, OrderType.BUY, ticket=response.ticket))
+    assert response.status is True
+    assert api.get_positions() == []
+    trade = api.get_trade_result(response.ticket)
+    assert trade.close_price == 1.10200
+    assert trade.profit == pytest.approx(9.0)
+    assert api.balance == pytest.approx(10009.0)
+
+
+def test_stop_loss_is_triggered(api: SimulatedMarketDataAPI) -> None:
+    response = api.open_position(request(OrderExecution.OPEN_POSITION, OrderType.BUY, sl=1.10000))
+    while api.step():
+        pass
+    assert api.get_positions() == []
+    trade = api.get_trade_result(response.ticket)
+    assert trade.close_price == 1.10000
+    assert trade.profit == pytest.approx(-11.0)
+
+
+def test_pending_order_is_filled(api: SimulatedMarketDataAPI) -> None:
+    response = api.send_pending_order_limit_stop(request(OrderExecution.SEND_PENDING_ORDER, OrderType.SELL_LIMIT,
+                                                         price=1.10240, tp=1.10000))
+    assert len(api.get_orders()) == 1
+    api.advance(pd.Timestamp("2022-08-01 00:45"))
+    assert api.get_orders() == []
+    position = api.get_position(response.ticket)
+    assert position.type == OrderType.SELL
+    assert position.price_open == 1.10240
+    assert position.timeframe == "M15"
+    assert position.strategy == "EMACrossover"
+
+
+def test_trade_results_by_window(api: SimulatedMarketDataAPI) -> None:
+    first = api.open_position(request(OrderExecution.OPEN_POSITION, OrderType.BUY, tp=1.10200))
+    second = api.open_position(request(OrderExecution.OPEN_POSITION, OrderType.SELL, sl=1.10200))
+    while api.step():
+        pass
+    results = api.get_trade_results(pd.Timestamp("2022-07-31"), pd.Timestamp("2022-08-02"))
+    assert sorted(results.keys()) == [first.ticket, second.ticket]
+    assert np.isclose(results[first.ticket].profit + results[second.ticket].profit, api.balance - 10000.0)
+
+
+def test_trade_results_match_the_results_of_the_deals(api: SimulatedMarketDataAPI) -> None:
+    api.open_position(request(OrderExecution.OPEN_POSITION, OrderType.BUY, tp=1.10200))
+    api.open_position(request(OrderExecution.OPEN_POSITION, OrderType.SELL, sl=1.10200))
+    api.open_position(request(OrderExecution.OPEN_POSITION, OrderType.BUY))
+    while api.step():
+        pass
+    deals = api.history_deals_get()
+    expected = trade_results_from_deals(pd.DataFrame([deal.__dict__ for deal in deals]), api.format_timestamp)
+    assert api.get_trade_results(pd.Timestamp("2022-07-31"), pd.Timestamp("2022-08-02")) == expected
+
+
+@pytest.mark.parametrize("time", ["2022-08-01 00:15", "2022-08-01 00:40", "2022-08-01 01:30"])
+def test_bar_frame_has_the_bars_of_the_dataframe(api: SimulatedMarketDataAPI, time: str) -> None:
+    api.advance(pd.Timestamp(time))
+    frame = api.create_bar_frame_from_bars("EURUSD", TimeFrames.M15, 0, 3, reserve=["ATR20"])
+    dataframe = api.create_dataframe_from_bars("EURUSD", TimeFrames.M15, 0, 3)
+    pd.testing.assert_frame_equal(frame.to_pandas()[dataframe.columns], dataframe, check_freq=False)
+    assert np.isnan(frame["ATR20"]).all()
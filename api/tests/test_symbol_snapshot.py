@@ -0,0 +1,35 @@
+from api.symbol_snapshot import SymbolSnapshots
+from collections import namedtuple
+import pytest
+
+SymbolInfo = namedtuple("SymbolInfo", ["name", "ask", "bid", "digits"])
+
+
+@pytest.fixture
+def snapshots() -> SymbolSnapshots:
+    return SymbolSnapshots(lambda symbol: SymbolInfo(symbol, 1.1, 1.0, 5), ttl=60)
+
+
+def test_one_broker_call_per_symbol_per_tick(snapshots: SymbolSnapshots) -> None:
+    for _ in range(5):
+        snapshots.get("EURUSD")
+    snapshots.get("GBPUSD")
+    assert snapshots.requests == 6
+    assert snapshots.broker_calls == 2
+    assert snapshots.saved == 4
+
+
+def test_new_tick_invalidates_snapshots(snapshots: SymbolSnapshots) -> None:
+    first = snapshots.get("EURUSD")
+    snapshots.get("EURUSD")
+    snapshots.new_tick()
+    assert snapshots.saved_last_tick == 1
+    assert snapshots.get("EURUSD") is not first
+    assert snapshots.broker_calls == 1
+
+
+def test_expired_snapshot_is_fetched_again() -> None:
+    snapshots = SymbolSnapshots(lambda symbol: SymbolInfo(symbol, 1.1, 1.0, 5), ttl=-1)
+    snapshots.get("EURUSD")
+    snapshots.get("EURUSD")
+    assert snapshots.broker_calls == 2
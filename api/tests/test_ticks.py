@@ -0,0 +1,106 @@
+from api.market_data_api import TimeFrames
+from api.simulated import SimulatedMarketDataAPI, SimulatedSymbol
+from api.ticks import TICKS_DTYPE, TickBars, aggregate_ticks
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def mt5_ticks(times: list, bids: list, spreads: list) -> np.ndarray:
+    ticks = np.zeros(len(times), dtype=TICKS_DTYPE)
+    ticks["time_msc"] = times
+    ticks["time"] = ticks["time_msc"] // 1000
+    ticks["bid"] = bids
+    ticks["ask"] = np.array(bids) + np.array(spreads)
+    ticks["volume"] = 1
+    return ticks
+
+
+def test_aggregate_ticks_into_bars() -> None:
+    ticks = mt5_ticks([60_000, 70_500, 90_000, 119_999, 120_000],
+                      [1.10000, 1.10020, 1.09990, 1.10010, 1.10030],
+                      [0.00010, 0.00008, 0.00012, 0.00010, 0.00005])
+    rates = aggregate_ticks(ticks, TimeFrames.M1, 5)
+    assert list(rates["time"]) == [60, 120]
+    assert list(rates["open"]) == [1.10000, 1.10030]
+    assert list(rates["high"]) == [1.10020, 1.10030]
+    assert list(rates["low"]) == [1.09990, 1.10030]
+    assert list(rates["close"]) == [1.10010, 1.10030]
+    assert list(rates["tick_volume"]) == [4, 1]
+    assert list(rates["spread"]) == [8, 5]
+
+
+def test_aggregate_ticks_into_higher_timeframes() -> None:
+    ticks = mt5_ticks([60_000, 70_500, 90_000, 119_999, 120_000],
+                      [1.10000, 1.10020, 1.09990, 1.10010, 1.10030],
+                      [0.00010, 0.00008, 0.00012, 0.00010, 0.00005])
+    rates = aggregate_ticks(ticks, TimeFrames.M5, 5)
+    assert list(rates["time"]) == [0]
+    assert rates["tick_volume"][0] == 5
+    assert rates["close"][0] == 1.10030
+    with pytest.raises(ValueError):
+        aggregate_ticks(ticks, TimeFrames.W1, 5)
+
+
+@pytest.fixture
+def api() -> SimulatedMarketDataAPI:
+    m1_index = pd.date_range("2022-08-01 00:00", periods=10, freq="1min", name="Date")
+    m1_bars = pd.DataFrame({"Open": 1.1, "High": 1.1005, "Low": 1.0995, "Close": 1.1,
+                            "Volume": 0, "Trades": 6, "Spread": 10}, index=m1_index)
+    m5_index = pd.date_range("2022-08-01 00:00", periods=2, freq="5min", name="Date")
+    m5_bars = pd.DataFrame({"Open": 1.1, "High": 1.1005, "Low": 1.0995, "Close": 1.1,
+                            "Volume": 0, "Trades": 30, "Spread": 10}, index=m5_index)
+    tick_index = pd.date_range("2022-08-01 00:00", periods=60, freq="10s")
+    bids = 1.1 + np.round(np.sin(np.arange(60)) * 0.0004, 5)
+    api = SimulatedMarketDataAPI()
+    api.add_symbol(SimulatedSymbol("EURUSD", digits=5), TimeFrames.M1, m1_bars)
+    api.add_bars("EURUSD", TimeFrames.M5, m5_bars)
+    api.add_ticks("EURUSD", pd.DataFrame({"Bid": bids, "Ask": bids + 0.0001}, index=tick_index))
+    api.start(pd.Timestamp("2022-08-01 00:00"))
+    api.advance(pd.Timestamp("2022-08-01 00:05:30"))
+    return api
+
+
+def test_forming_bar_from_the_ticks(api: SimulatedMarketDataAPI) -> None:
+    tick_bars = TickBars(api)
+    assert tick_bars.seed("EURUSD", [TimeFrames.M1, TimeFrames.M5], bars=3)
+    assert tick_bars.update("EURUSD") == 4
+    dataframe = tick_bars.dataframe("EURUSD", TimeFrames.M1, 3)
+    assert list(dataframe.columns) == list(api.create_dataframe_from_bars("EURUSD", TimeFrames.M1, 0, 3).columns)
+    assert list(dataframe.index) == list(pd.date_range("2022-08-01 00:03", periods=3, freq="1min"))
+    forming = dataframe.iloc[-1]
+    ticks = api.get_ticks_range("EURUSD", pd.Timestamp("2022-08-01 00:05").value // 10 ** 9,
+                                pd.Timestamp("2022-08-01 00:05:30").value // 10 ** 9)
+    assert forming["Open"] == round(ticks["bid"][0], 5)
+    assert forming["High"] == round(ticks["bid"].max(), 5)
+    assert forming["Low"] == round(ticks["bid"].min(), 5)
+    assert forming["Close"] == round(ticks["bid"][-1], 5)
+    assert forming["Trades"] == 4
+    assert forming["Spread"] == 10
+
+
+def test_only_new_ticks_are_ingested(api: SimulatedMarketDataAPI) -> None:
+    tick_bars = TickBars(api)
+    tick_bars.seed("EURUSD", [TimeFrames.M1, TimeFrames.M5], bars=3)
+    tick_bars.update("EURUSD")
+    assert tick_bars.update("EURUSD") == 0
+
+    api.advance(pd.Timestamp("2022-08-01 00:07:05"))
+    assert tick_bars.update("EURUSD") == 9
+    m1 = tick_bars.dataframe("EURUSD", TimeFrames.M1, 3)
+    assert list(m1.index) == list(pd.date_range("2022-08-01 00:05", periods=3, freq="1min"))
+    assert list(m1["Trades"]) == [6, 6, 1]
+    m5 = tick_bars.dataframe("EURUSD", TimeFrames.M5, 2)
+    assert list(m5["Trades"]) == [30, 13]
+    assert m5["Close"].iloc[-1] == m1["Close"].iloc[-1]
+
+
+def test_remove_forgets_the_symbol(api: SimulatedMarketDataAPI) -> None:
+    tick_bars = TickBars(api)
+    tick_bars.seed("EURUSD", [TimeFrames.M1], bars=3)
+    assert tick_bars.is_seeded("EURUSD", [TimeFrames.M1])
+    assert not tick_bars.is_seeded("EURUSD", [TimeFrames.M1, TimeFrames.M5])
+    tick_bars.remove("EURUSD")
+    assert tick_bars.symbols == []
+    assert tick_bars.dataframe("EURUSD", TimeFrames.M1, 3) is None
+    assert tick_bars.update("EURUSD") == 0
@@ -0,0 +1,173 @@
+from __future__ import annotations
+from api.bar_cache import RatesBuffer
+from api.market_data_api import TimeFrames
+from api.rates import rates_to_dataframe
+import numpy as np
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from api import MarketDataAPI
+    from pandas import DataFrame
+
+TICKS_DTYPE = [("time", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"), ("volume", "<u8"),
+               ("time_msc", "<i8"), ("flags", "<u4"), ("volume_real", "<f8")]
+
+RATES_DTYPE = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+               ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")]
+
+
+def aggregate_ticks(ticks: np.ndarray, timeframe: TimeFrames, digits: int) -> np.ndarray:
+    """
+    Aggregate the ticks (sorted by time_msc) into bars with the MT5 rates dtype
+    The prices are the Bid, tick_volume counts the ticks and the spread is the lowest one in points
+    """
+    if timeframe in (TimeFrames.W1, TimeFrames.MN1):
+        raise ValueError(f"Ticks are only aggregated up to D1, not {timeframe.value}")
+    period = timeframe.seconds
+    buckets = ticks["time_msc"] // 1000 // period * period
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ticks)]
+    bid = ticks["bid"]
+    spread = np.rint((ticks["ask"] - bid) * 10 ** digits).astype(np.int64)
+
+    rates = np.zeros(len(starts), dtype=RATES_DTYPE)
+    rates["time"] = buckets[starts]
+    rates["open"] = bid[starts]
+    rates["high"] = np.maximum.reduceat(bid, starts)
+    rates["low"] = np.minimum.reduceat(bid, starts)
+    rates["close"] = bid[ends - 1]
+    rates["tick_volume"] = ends - starts
+    rates["spread"] = np.minimum.reduceat(spread, starts)
+    rates["real_volume"] = np.add.reduceat(ticks["volume"], starts)
+    return rates
+
+
+def combine_bars(first: np.void, second: np.void) -> np.void:
+    """Bar with the ticks of both bars of the same time, the first one happened before"""
+    bar = second.copy()
+    bar["open"] = first["open"]
+    bar["high"] = max(first["high"], second["high"])
+    bar["low"] = min(first["low"], second["low"])
+    bar["tick_volume"] = first["tick_volume"] + second["tick_volume"]
+    bar["spread"] = min(first["spread"], second["spread"])
+    bar["real_volume"] = first["real_volume"] + second["real_volume"]
+    return bar
+
+
+class TickBars:
+    """
+    Bars of every timeframe of a symbol built in memory from one tick stream
+    The closed bars are seeded from the broker once, the forming bar and the following ones come from the ticks
+    """
+    def __init__(self, api: MarketDataAPI, max_bars: int = 1000, ticks_per_request: int = 100000) -> None:
+        self._api = api
+        self.max_bars = max_bars
+        self.ticks_per_request = ticks_per_request
+        self._digits: Dict[str, int] = {}
+        self._timeframes: Dict[str, List[TimeFrames]] = {}
+        self._closed: Dict[Tuple[str, TimeFrames], RatesBuffer] = {}
+        self._forming: Dict[Tuple[str, TimeFrames], np.ndarray] = {}
+        # -- WATERMARK: time_msc of the last tick ingested and how many ticks had that time_msc
+        self._watermarks: Dict[str, Tuple[int, int]] = {}
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._timeframes)
+
+    def is_seeded(self, symbol: str, timeframes: List[TimeFrames]) -> bool:
+        return all(timeframe in self._timeframes.get(symbol, []) for timeframe in timeframes)
+
+    def seed(self, symbol: str, timeframes: List[TimeFrames], bars: int) -> bool:
+        """Load the closed bars of every timeframe. The ticks are requested from the oldest forming bar on"""
+        self.remove(symbol)
+        self._digits[symbol] = self._api.get_symbol_attributes(symbol).digits
+        forming_times = []
+        for timeframe in timeframes:
+            dataframe = self._api.create_dataframe_from_bars(symbol, timeframe, 0, bars + 1)
+            if dataframe is None or len(dataframe) < 2:
+                print(f"TICK BARS: Could not seed {symbol} {timeframe.value}")
+                self.remove(symbol)
+                return False
+            rates = self._to_rates(dataframe)
+            self._closed[(symbol, timeframe)] = RatesBuffer(rates[:-1], self.max_bars)
+            self._timeframes.setdefault(symbol, []).append(timeframe)
+            forming_times.append(int(rates["time"][-1]))
+        self._watermarks[symbol] = (min(forming_times) * 1000 - 1, 0)
+        return True
+
+    def remove(self, symbol: str) -> None:
+        """Forget the bars and the watermark of the symbol"""
+        for timeframe in self._timeframes.pop(symbol, []):
+            self._closed.pop((symbol, timeframe), None)
+            self._forming.pop((symbol, timeframe), None)
+        self._watermarks.pop(symbol, None)
+        return None
+
+    def update(self, symbol: str) -> int:
+        """Ingest the ticks after the watermark. Return the number of new ticks"""
+        if symbol not in self._watermarks:
+            print(f"TICK BARS: Seed {symbol} before requesting its ticks")
+            return 0
+        watermark, seen = self._watermarks[symbol]
+        ticks = self._api.get_ticks_from(symbol, watermark // 1000, self.ticks_per_request)
+        if ticks is None or len(ticks) == 0:
+            return 0
+        ticks = ticks[ticks["time_msc"] >= watermark]
+        at_watermark = np.flatnonzero(ticks["time_msc"] == watermark)
+        ticks = ticks[min(seen, len(at_watermark)):] if len(at_watermark) > 0 else ticks
+        self.ingest(symbol, ticks)
+        return len(ticks)
+
+    def ingest(self, symbol: str, ticks: np.ndarray) -> None:
+        if len(ticks) == 0:
+            return None
+        last_msc = int(ticks["time_msc"][-1])
+        watermark, seen = self._watermarks.get(symbol, (last_msc, 0))
+        same = int(np.count_nonzero(ticks["time_msc"] == last_msc))
+        self._watermarks[symbol] = (last_msc, same + seen if last_msc == watermark else same)
+        for timeframe in self._timeframes[symbol]:
+            self._ingest_bars(symbol, timeframe, aggregate_ticks(ticks, timeframe, self._digits[symbol]))
+        return None
+
+    def _ingest_bars(self, symbol: str, timeframe: TimeFrames, rates: np.ndarray) -> None:
+        key = (symbol, timeframe)
+        closed = self._closed[key]
+        forming = self._forming.get(key)
+        if forming is not None:
+            if rates["time"][0] == forming["time"][0]:
+                rates[0] = combine_bars(forming[0], rates[0])
+            else:
+                closed.extend(forming)
+        if len(closed) > 0:
+            rates = rates[rates["time"] > closed.last_time]
+        if len(rates) == 0:
+            return None
+        closed.extend(rates[:-1])
+        self._forming[key] = rates[-1:].copy()
+        return None
+
+    def dataframe(self, symbol: str, timeframe: TimeFrames, bars: int) -> DataFrame or None:
+        """Same dataframe returned by the MarketDataAPI, the last bar is the forming one"""
+        key = (symbol, timeframe)
+        if key not in self._closed:
+            return None
+        forming = self._forming.get(key)
+        if forming is None:
+            rates = self._closed[key].tail(bars)
+        else:
+            rates = np.concatenate((self._closed[key].tail(bars - 1), forming))
+        return rates_to_dataframe(rates, self._digits[symbol], self._api.delta_timezone)
+
+    def _to_rates(self, dataframe: DataFrame) -> np.ndarray:
+        """Back from the standard dataframe to the MT5 rates (server time)"""
+        rates = np.zeros(len(dataframe), dtype=RATES_DTYPE)
+        rates["time"] = dataframe.index.values.astype("datetime64[s]").astype(np.int64) \
+            - self._api.delta_timezone * 3600
+        rates["open"] = dataframe["Open"].to_numpy()
+        rates["high"] = dataframe["High"].to_numpy()
+        rates["low"] = dataframe["Low"].to_numpy()
+        rates["close"] = dataframe["Close"].to_numpy()
+        rates["tick_volume"] = dataframe["Trades"].to_numpy()
+        rates["spread"] = dataframe["Spread"].to_numpy()
+        rates["real_volume"] = dataframe["Volume"].to_numpy()
+        return rates
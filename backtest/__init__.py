@@ -0,0 +1,3 @@
+from backtest.engine import Backtester, BacktestReport, SimulatedClock
+from backtest.optimize import Optimizer, SharedBars, StrategyParameters, parameter_grid, random_parameters
+from backtest.vectorized import VectorizedBacktest, VectorizedResult, forming_atr
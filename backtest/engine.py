@@ -0,0 +1,254 @@
+from __future__ import annotations
+from api import Resampler, SimulatedMarketDataAPI, TimeFrames
+from api.resample import resample_dataframe
+import bot
+from broker_account import BrokerAccountMT5
+import copy
+from dataclasses import dataclass, replace
+from database import TradeDatabase
+from datetime import datetime
+import indicators
+from indicators.indicator import Bar
+import numpy as np
+import os
+from risk_management import AccountRiskManager, AccountRiskSettings, TradeRiskManager, TradeRiskSettings
+from shared_data_structures import BarFrame, StrategySettings
+import signals
+from symbols_info import can_check_new_position, SymbolsInfo, SymbolStrategyInfo
+import time
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from api import SimulatedSymbol
+    from database import BarStore
+    from pandas import DataFrame
+
+
+class SimulatedClock:
+    """Time of the simulated broker, in place of datetime.today in the live stack"""
+    def __init__(self, api: SimulatedMarketDataAPI) -> None:
+        self._api = api
+
+    def __call__(self) -> datetime:
+        return self._api.time.to_pydatetime()
+
+
+@dataclass
+class BacktestReport:
+    bars: int
+    seconds: float
+    trades: int
+    profit: float
+    balance: float
+
+    @property
+    def bars_per_second(self) -> float:
+        return self.bars / self.seconds if self.seconds > 0 else 0.0
+
+
+class Backtester:
+    """
+    Replay of the local history through the stack of main: indicators, signals, strategies, account and trade risk,
+    trade bot and broker account, with the simulated broker in place of the terminal and its clock in place of
+    datetime.today
+    The strategies run at each bar close of their timeframes, like the scheduler of main, once the indicators have
+    the bars they need. The stops and the pending orders are matched inside the bars by the simulated broker
+    The indicators are streamed (Manager.update) once per closed bar on a copy of the plan per symbol and timeframe,
+    so their values come from the whole history and not from the last bars recomputed at each close like in main
+    (they match within the WARMUP_TOLERANCE of required_bars)
+    The trades are written to their own TradeDatabase on one connection committed at the end of the replay. Its
+    file must not exist, an existing database (the live one of main) is never replaced
+    The strategies run on a copy of the symbols info, so the checks of the caller's configs are not changed
+    """
+    def __init__(self, symbols_info: SymbolsInfo, indicators_manager: indicators.Manager,
+                 signals_manager: signals.Manager, db_path: str, balance: float = 10000.0,
+                 delta_timezone: int = 0) -> None:
+        if os.path.exists(db_path):
+            raise FileExistsError(f"The backtest database {db_path} already exists")
+        self.api = SimulatedMarketDataAPI(delta_timezone=delta_timezone, balance=balance)
+        self.api.connect()
+        self.clock = SimulatedClock(self.api)
+        self.symbols_info = self._simulated_symbols_info(symbols_info)
+
+        self.db = TradeDatabase(db_path, self.symbols_info)
+        self.broker_acc = BrokerAccountMT5(self.api, self.db)
+        trade_bot = bot.TradeBot(self.api, self.db, self.symbols_info)
+        self.trade_risk = TradeRiskManager(trade_bot, self.symbols_info)
+        self.acc_risk = AccountRiskManager(self.db, self.trade_risk, self.symbols_info, clock=self.clock)
+
+        self.indicators_manager = indicators_manager
+        self.signals_cache = signals.SignalsCache(signals_manager)
+        self.signals_registry = signals.SignalRegistry()
+        self.bars = indicators_manager.required_bars()
+
+        self._balance = balance
+        self._base: Dict[str, TimeFrames] = {}
+        self._opens: Dict[Tuple[str, TimeFrames], np.ndarray] = {}
+        self._opened: Dict[Tuple[str, TimeFrames], int] = {}
+        # -- STREAMING STATE, MARKET INPUTS AND INDICATOR VALUES OF THE CLOSED BARS BY (symbol, timeframe)
+        self._streams: Dict[Tuple[str, TimeFrames], indicators.Manager] = {}
+        self._inputs: Dict[Tuple[str, TimeFrames], Dict[str, np.ndarray]] = {}
+        self._outputs: Dict[Tuple[str, TimeFrames], Dict[str, np.ndarray]] = {}
+        self._streamed: Dict[Tuple[str, TimeFrames], int] = {}
+        self._deals = 0
+
+    def _simulated_symbols_info(self, symbols_info: SymbolsInfo) -> SymbolsInfo:
+        """Copy of the symbols info on the simulated clock, with copies of the configs"""
+        simulated = SymbolsInfo()
+        for symbol in symbols_info.symbols:
+            for strategy_info in symbols_info.info[symbol]:
+                simulated.add(SymbolStrategyInfo(symbol, strategy_info.strategy,
+                                                 [replace(config) for config in strategy_info.configs],
+                                                 clock=self.clock))
+        return simulated
+
+    def timeframes(self, symbol: str) -> List[TimeFrames]:
+        """Timeframes of the strategies of the symbol"""
+        return list(dict.fromkeys(config.timeframe for strategy_info in self.symbols_info.info[symbol]
+                                  for config in strategy_info.configs))
+
+    def add_symbol(self, spec: SimulatedSymbol, timeframe: TimeFrames, bars: DataFrame) -> None:
+        """Base bars of the symbol, the higher timeframes of its strategies are resampled from them"""
+        timeframes = self.timeframes(spec.symbol)
+        if Resampler.base_timeframe(timeframes + [timeframe]) != timeframe:
+            raise ValueError(f"The bars of {spec.symbol} ({timeframe.value}) are above the timeframes of its strategies")
+        self.api.add_symbol(spec, timeframe, bars)
+        self._base[spec.symbol] = timeframe
+        for strategy_timeframe in timeframes:
+            frame = bars
+            if strategy_timeframe != timeframe:
+                frame = resample_dataframe(bars, strategy_timeframe, self.api.delta_timezone, complete=False)
+                self.api.add_bars(spec.symbol, strategy_timeframe, frame)
+            pair = (spec.symbol, strategy_timeframe)
+            self._opens[pair] = np.asarray(frame.index, dtype="datetime64[ns]").view(np.int64)
+            self._opened[pair] = 0
+            self._streams[pair] = copy.deepcopy(self.indicators_manager)
+            self._streams[pair].reset()
+            self._inputs[pair] = {column: frame[column].to_numpy(dtype=np.float64)
+                                  for column in self.indicators_manager.market_inputs}
+            self._outputs[pair] = {column: np.full(len(frame), np.nan) for column in self.indicators_manager.outputs}
+            self._streamed[pair] = 0
+        return None
+
+    def load(self, store: BarStore, spec: SimulatedSymbol, timeframe: TimeFrames, start: int, end: int) -> None:
+        """Base bars of the symbol from the local bar store, between the server timestamps"""
+        bars = store.read(spec.symbol, timeframe, start, end, spec.digits, self.api.delta_timezone)
+        if bars is None:
+            print(f"BACKTEST: No bars of {spec.symbol} {timeframe.value} in the bar store")
+            return None
+        return self.add_symbol(spec, timeframe, bars)
+
+    def run(self) -> BacktestReport:
+        """Replay all the bars and report the throughput and the results"""
+        self._reset_checks()
+        started = time.perf_counter()
+        with self.db.batch():
+            first = self.api.next_event_time()
+            if first is not None:
+                self.api.start(first)
+            while self.api.step():
+                self._on_bars(self.api.time.value)
+            self.broker_acc.sync_db()
+        seconds = time.perf_counter() - started
+
+        report = BacktestReport(bars=sum(len(self._opens[(symbol, base)]) for symbol, base in self._base.items()),
+                                seconds=seconds,
+                                trades=len(self.db.get_table("Trades")),
+                                profit=round(self.api.balance - self._balance, 2),
+                                balance=self.api.balance)
+        print(f"BACKTEST: {report.bars} bars in {report.seconds:.2f}s --- {report.bars_per_second:.0f} bars/s --- "
+              f"{report.trades} trades --- profit {report.profit:.2f}")
+        return report
+
+    def _reset_checks(self) -> None:
+        """The waits of the strategies start from no check at all"""
+        for symbol in self.symbols_info.symbols:
+            for strategy_info in self.symbols_info.info[symbol]:
+                for config in strategy_info.configs:
+                    config.last_check = datetime.min
+        return None
+
+    def _on_bars(self, now: int) -> None:
+        self.api.new_tick()
+        # -- THE DATABASE ONLY FALLS BEHIND THE BROKER WHEN THE STOPS OR THE PENDING ORDERS MADE DEALS
+        if len(self.api.history_deals_get()) != self._deals:
+            self.broker_acc.sync_db()
+
+        for symbol, timeframe in self._closed_bars(now):
+            # -- NUMPY COLUMNS, NO DATAFRAME PER BAR
+            frame = self.api.create_bar_frame_from_bars(symbol, timeframe, 0, self.bars)
+            if frame is None:
+                continue
+            self._stream_indicators(symbol, timeframe, frame)
+            if len(frame) < self.bars:
+                continue
+            self._run_strategies(symbol, timeframe, frame)
+
+        self._deals = len(self.api.history_deals_get())
+        return None
+
+    def _closed_bars(self, now: int) -> List[Tuple[str, TimeFrames]]:
+        """Pairs with a new bar opened until now, so the previous one closed"""
+        closed = []
+        for pair, opens in self._opens.items():
+            opened = int(np.searchsorted(opens, now, side="right"))
+            if opened != self._opened[pair]:
+                self._opened[pair] = opened
+                closed.append(pair)
+        return closed
+
+    def _stream_indicators(self, symbol: str, timeframe: TimeFrames, frame: BarFrame) -> None:
+        """
+        Indicator columns of the frame: the bars closed since the last close are streamed once and kept, the forming
+        bar (the last one) is streamed on top of them and replaced by its closed values on the next close
+        """
+        pair = (symbol, timeframe)
+        stream, inputs, outputs = self._streams[pair], self._inputs[pair], self._outputs[pair]
+        opens, opened = self._opens[pair], self._opened[pair]
+        for i in range(self._streamed[pair], opened - 1):
+            bar = stream.update(Bar(opens[i], {column: values[i] for column, values in inputs.items()}))
+            for column, values in outputs.items():
+                values[i] = bar[column]
+        self._streamed[pair] = max(self._streamed[pair], opened - 1)
+        forming = stream.update(Bar(opens[opened - 1], {column: frame[column][-1] for column in inputs}))
+        for column, values in outputs.items():
+            window = values[opened - len(frame):opened].copy()
+            window[-1] = forming[column]
+            frame[column] = window
+        return None
+
+    def _run_strategies(self, symbol: str, timeframe: TimeFrames, dataframe: BarFrame) -> None:
+        """Same steps of each strategy configuration in main"""
+        attributes = self.api.get_symbol_attributes(symbol)
+        for strategy_info in self.symbols_info.info[symbol]:
+            strategy = strategy_info.strategy
+            for config in strategy_info.configs:
+                if config.timeframe != timeframe:
+                    continue
+                self.acc_risk.risk_settings = AccountRiskSettings(capital=config.capital,
+                                                                  day_goal=config.day_goal,
+                                                                  day_stop=config.day_stop,
+                                                                  op_per_day=config.op_per_day)
+                self.trade_risk.symbol_attributes = attributes
+                self.trade_risk.risk_settings = TradeRiskSettings(timeframe=config.timeframe,
+                                                                  op_goal=config.op_goal,
+                                                                  op_stop=config.op_stop)
+
+                signals_results = self.signals_cache.compute_signals(symbol, timeframe, dataframe,
+                                                                     strategy.required_signals)
+                self.signals_registry.update(signals_results)
+
+                strategy.subscribe(self.acc_risk)
+                strategy.set_strategy_settings(StrategySettings(timeframe=timeframe.value,
+                                                                max_volume=config.max_volume,
+                                                                can_open_multiple_positions=config.multiple_positions))
+
+                for position in self.broker_acc.get_positions_by(strategy.magic, timeframe.value):
+                    if position.symbol != symbol:
+                        continue
+                    strategy.check_protect(position, self.api, self.trade_risk, dataframe)
+                    strategy.check_close(position, self.api, self.trade_risk, dataframe)
+
+                if can_check_new_position(config.last_check, config.wait_to_check, self.clock):
+                    strategy.check_new_position(symbol, timeframe, dataframe, self.signals_registry)
+        return None
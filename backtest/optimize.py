@@ -0,0 +1,242 @@
+from __future__ import annotations
+from api import SimulatedSymbol, TimeFrames
+from backtest.engine import Backtester
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+from dataclasses import asdict, dataclass, replace
+import indicators
+import io
+import itertools
+from multiprocessing import shared_memory
+from multiprocessing.util import Finalize
+import numpy as np
+import os
+import pandas as pd
+import random
+import signals
+import strategies
+from symbols_info import SymbolsInfo, SymbolStrategyInfo
+import tempfile
+from typing import Dict, List, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+    from symbols_info import SymbolStrategyConfig
+
+
+@dataclass(frozen=True)
+class StrategyParameters:
+    """Parameters of the EMACrossover strategy tuned by the optimizer"""
+    fast: int
+    slow: int
+    stop_atr: float
+    op_goal: float
+    op_stop: float
+
+    @property
+    def valid(self) -> bool:
+        return 0 < self.fast < self.slow and self.stop_atr >= 0 and self.op_goal > 0 and self.op_stop > 0
+
+
+def parameter_grid(fast: Sequence[int], slow: Sequence[int], stop_atr: Sequence[float],
+                   op_goal: Sequence[float], op_stop: Sequence[float]) -> List[StrategyParameters]:
+    """All the combinations of the values, without the ones with the fast period not below the slow one"""
+    grid = [StrategyParameters(*values) for values in itertools.product(fast, slow, stop_atr, op_goal, op_stop)]
+    return [parameters for parameters in grid if parameters.valid]
+
+
+def random_parameters(count: int, fast: Sequence[int], slow: Sequence[int], stop_atr: Sequence[float],
+                      op_goal: Sequence[float], op_stop: Sequence[float], seed: int = 0) -> List[StrategyParameters]:
+    """Up to count different combinations drawn from the grid of the values"""
+    grid = parameter_grid(fast, slow, stop_atr, op_goal, op_stop)
+    return random.Random(seed).sample(grid, min(count, len(grid)))
+
+
+# -- COLUMNS OF THE RESULT TABLE: THE PARAMETERS AND THE METRICS OF EACH BACKTEST
+RESULT_COLUMNS = list(StrategyParameters.__dataclass_fields__) + ["trades", "profit", "win_rate", "max_drawdown",
+                                                                  "seconds"]
+
+
+@dataclass(frozen=True)
+class SharedBarsSpec:
+    """What a process needs to attach the bars: the name of the block and where each column is in it"""
+    name: str
+    rows: int
+    index_name: str or None
+    # -- (COLUMN, DTYPE, OFFSET), THE INDEX IS THE FIRST ONE, ITS NANOSECONDS AS int64
+    columns: Tuple[Tuple[str, str, int], ...]
+
+
+class SharedBars:
+    """
+    Columns of the bars copied once into a block of shared memory, the processes of the pool attach them by name
+    instead of receiving a pickled copy of the bars with each backtest
+    The process that published the bars removes the block on close
+    """
+    INDEX = "__index__"
+
+    def __init__(self, memory: shared_memory.SharedMemory, spec: SharedBarsSpec, owner: bool) -> None:
+        self._memory = memory
+        self.spec = spec
+        self._owner = owner
+
+    @classmethod
+    def publish(cls, bars: DataFrame) -> SharedBars:
+        arrays = {cls.INDEX: np.asarray(bars.index, dtype="datetime64[ns]").view(np.int64)}
+        arrays.update({column: bars[column].to_numpy() for column in bars.columns})
+        columns, size = [], 0
+        for column, array in arrays.items():
+            # -- EACH COLUMN STARTS ALIGNED ON 8 BYTES
+            size += -size % 8
+            columns.append((column, array.dtype.str, size))
+            size += array.nbytes
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        spec = SharedBarsSpec(name=memory.name, rows=len(bars), index_name=bars.index.name, columns=tuple(columns))
+        shared = cls(memory, spec, owner=True)
+        for (column, dtype, offset), array in zip(columns, arrays.values()):
+            shared.array(column)[:] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec: SharedBarsSpec) -> SharedBars:
+        # -- THE PROCESSES OF THE POOL SHARE THE RESOURCE TRACKER OF THE PUBLISHER, THE BLOCK IS TRACKED ONCE
+        return cls(shared_memory.SharedMemory(name=spec.name), spec, owner=False)
+
+    def array(self, column: str) -> np.ndarray:
+        """Column as a view of the shared block, no copy"""
+        for name, dtype, offset in self.spec.columns:
+            if name == column:
+                return np.ndarray((self.spec.rows,), dtype=np.dtype(dtype), buffer=self._memory.buf, offset=offset)
+        raise KeyError(column)
+
+    def to_dataframe(self) -> DataFrame:
+        """Bars as they were published, the columns and the index are read only views of the shared block"""
+        index = pd.DatetimeIndex(self._read_only(self.INDEX).view("datetime64[ns]"), name=self.spec.index_name)
+        return pd.DataFrame({name: self._read_only(name) for name, dtype, offset in self.spec.columns
+                             if name != self.INDEX}, index=index, copy=False)
+
+    def _read_only(self, column: str) -> np.ndarray:
+        array = self.array(column)
+        array.flags.writeable = False
+        return array
+
+    def close(self) -> None:
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+        return None
+
+    def __enter__(self) -> SharedBars:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+        return None
+
+
+@dataclass(frozen=True)
+class OptimizationTask:
+    """One backtest of the pool, small to pickle: the bars are already in the process"""
+    parameters: StrategyParameters
+    spec: SimulatedSymbol
+    timeframe: TimeFrames
+    config: SymbolStrategyConfig
+    balance: float
+
+
+# -- BARS OF THE PROCESS, ATTACHED ONCE BY THE INITIALIZER OF THE POOL AND KEPT UNTIL THE PROCESS ENDS
+_process_bars: Dict[str, DataFrame] = {}
+_process_shared: Dict[str, SharedBars] = {}
+
+
+def _attach_bars(spec: SharedBarsSpec) -> None:
+    shared = SharedBars.attach(spec)
+    _process_shared["bars"] = shared
+    _process_bars["bars"] = shared.to_dataframe()
+    # -- THE FINALIZERS RUN WHEN THE POOL SHUTS ITS PROCESSES DOWN, atexit DOES NOT
+    Finalize(shared, _detach_bars, exitpriority=10)
+    return None
+
+
+def _detach_bars() -> None:
+    _process_bars.clear()
+    shared = _process_shared.pop("bars", None)
+    if shared is not None:
+        try:
+            shared.close()
+        except BufferError:
+            # -- A VIEW OF THE BARS IS STILL REFERENCED, THE BLOCK IS UNMAPPED WITH THE PROCESS
+            pass
+    return None
+
+
+def backtest_parameters(task: OptimizationTask, bars: DataFrame) -> dict:
+    """Backtest of the EMACrossover strategy with the parameters, its metrics as a row of the result table"""
+    parameters = task.parameters
+    crossover = f"EMACrossover{parameters.fast}_{parameters.slow}"
+    symbols_info = SymbolsInfo()
+    symbols_info.add(SymbolStrategyInfo(task.spec.symbol,
+                                        strategies.EMACrossover("EMACrossover", magic_number=99,
+                                                                stop_atr=parameters.stop_atr),
+                                        [replace(task.config, op_goal=parameters.op_goal,
+                                                 op_stop=parameters.op_stop)]))
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR20", 20))
+    indicators_manager.add(indicators.EMACrossover(crossover, parameters.fast, parameters.slow))
+    signals_manager = signals.Manager()
+    signals_manager.add(signals.EMACrossover("EMACrossover", crossover, shift=1))
+
+    with tempfile.TemporaryDirectory() as folder:
+        backtester = Backtester(symbols_info, indicators_manager, signals_manager,
+                                os.path.join(folder, "optimize.db"), balance=task.balance)
+        backtester.add_symbol(task.spec, task.timeframe, bars)
+        # -- THE STACK PRINTS EVERY TRADE, THE POOL ONLY RETURNS THE METRICS
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = backtester.run()
+        trades = backtester.db.get_table("Trades")
+
+    return {**asdict(parameters),
+            "trades": report.trades,
+            "profit": report.profit,
+            **trade_metrics(trades.sort_values("close_time")["profit"].to_numpy(dtype=np.float64)),
+            "seconds": report.seconds}
+
+
+def trade_metrics(profits: np.ndarray) -> dict:
+    """Win rate and largest drop of the cumulative profit of the trades, in the order they closed"""
+    equity = np.cumsum(profits)
+    drawdown = np.max(np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:] - equity, initial=0.0)
+    return {"win_rate": float(np.mean(profits > 0)) if len(profits) else 0.0,
+            "max_drawdown": round(float(drawdown), 2)}
+
+
+def _run_task(task: OptimizationTask) -> dict:
+    return backtest_parameters(task, _process_bars["bars"])
+
+
+class Optimizer:
+    """
+    Backtests of the EMACrossover strategy for each set of parameters, spread across a pool of processes
+    The bars are published once in shared memory and each process keeps them attached, reading its backtests from
+    views of the block, so the tasks only carry the parameters and the bars are in memory once for all the cores
+    The backtests are independent and should scale with the cores up to the number of tasks, but the scaling was
+    only measured with one worker (benchmarks/bench_optimize.py on a single core), not on a many-core machine
+    """
+    def __init__(self, spec: SimulatedSymbol, timeframe: TimeFrames, bars: DataFrame, config: SymbolStrategyConfig,
+                 balance: float = 10000.0, workers: int or None = None) -> None:
+        self.spec = spec
+        self.timeframe = timeframe
+        self.bars = bars
+        self.config = config
+        self.balance = balance
+        self.workers = workers or os.cpu_count() or 1
+
+    def run(self, parameters: List[StrategyParameters]) -> DataFrame:
+        """Result table, one row of parameters and metrics per backtest, in the order of the parameters"""
+        tasks = [OptimizationTask(parameters=params, spec=self.spec, timeframe=self.timeframe, config=self.config,
+                                  balance=self.balance) for params in parameters]
+        with SharedBars.publish(self.bars) as shared:
+            with ProcessPoolExecutor(max_workers=min(self.workers, max(len(tasks), 1)), initializer=_attach_bars,
+                                     initargs=(shared.spec,)) as pool:
+                rows = list(pool.map(_run_task, tasks))
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
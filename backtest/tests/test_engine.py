@@ -0,0 +1,109 @@
+from api import SimulatedSymbol, TimeFrames
+from api.rates import rates_to_dataframe
+from api.simulated import mt5_rates
+from backtest import Backtester
+import indicators
+import os
+import pandas as pd
+import pytest
+import signals
+import strategies
+from symbols_info import SymbolsInfo, SymbolStrategyConfig, SymbolStrategyInfo
+
+BARS = 1500
+
+
+def config(timeframe: TimeFrames, op_per_day: int = 0) -> SymbolStrategyConfig:
+    return SymbolStrategyConfig(timeframe=timeframe, capital=5000, day_goal=0, day_stop=0, op_per_day=op_per_day,
+                                op_goal=10, op_stop=5, max_volume=1.0, multiple_positions=False, wait_to_check=5)
+
+
+def backtester(path: str, timeframes: tuple = (TimeFrames.M15, TimeFrames.H1), op_per_day: int = 0) -> Backtester:
+    symbols_info = SymbolsInfo()
+    symbols_info.add(SymbolStrategyInfo("EURUSD", strategies.EMACrossover("EMACrossover", magic_number=99),
+                                        [config(timeframe, op_per_day) for timeframe in timeframes]))
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR20", 20))
+    indicators_manager.add(indicators.EMA("EMA72", 72))
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    signals_manager = signals.Manager()
+    signals_manager.add(signals.EMACrossover("EMACrossover", "EMACrossover3_21", shift=1))
+    backtester = Backtester(symbols_info, indicators_manager, signals_manager, path)
+    backtester.add_symbol(SimulatedSymbol("EURUSD", digits=5), TimeFrames.M15,
+                          rates_to_dataframe(mt5_rates(BARS, seconds=15 * 60), 5, 0))
+    return backtester
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    return str(tmp_path / "backtest.db")
+
+
+def test_trades_of_the_replay_are_in_its_database(db_path: str) -> None:
+    engine = backtester(db_path)
+    report = engine.run()
+    assert report.bars == BARS
+    assert report.bars_per_second > 0
+    trades = engine.db.get_table("Trades")
+    assert len(trades) == report.trades > 0
+    # -- THE POSITIONS CLOSED BY THE STRATEGY ARE SAVED WITH THE TIMEFRAME "NA" OF ITS CLOSE STATE
+    assert {"M15", "H1"} <= set(trades["timeframe"])
+    # -- THE DEALS OF THE BROKER ARE THE TRADES AND THE POSITIONS STILL OPEN
+    positions = engine.db.get_table("Positions")
+    assert sorted(positions["ticket"]) == sorted(position.ticket for position in engine.api.get_positions())
+    costs = sum(trade.commission + trade.profit for trade in engine.api.get_trade_results(
+        pd.Timestamp(0).to_pydatetime(), engine.api.time.to_pydatetime()).values())
+    assert report.balance == pytest.approx(10000.0 + costs)
+    assert report.profit == pytest.approx(costs, abs=0.01)
+
+
+def test_stack_runs_on_the_simulated_clock(db_path: str) -> None:
+    engine = backtester(db_path)
+    engine.run()
+    first, last = engine.api.create_dataframe_from_bars("EURUSD", TimeFrames.M15, 0, BARS).index[[0, -1]]
+    open_times = pd.to_datetime(engine.db.get_table("Trades")["open_time"])
+    assert open_times.min() >= first and open_times.max() <= last
+    checks = [config.last_check for config in engine.symbols_info.info["EURUSD"][0].configs]
+    assert all(first <= check <= last for check in checks)
+
+
+def test_trades_per_day_are_counted_on_the_simulated_day(db_path: str) -> None:
+    engine = backtester(db_path, timeframes=(TimeFrames.M15,), op_per_day=1)
+    report = engine.run()
+    days = pd.to_datetime(engine.db.get_table("Trades")["open_time"]).dt.date
+    assert report.trades > 0
+    assert days.value_counts().max() == 1
+
+
+def test_existing_database_is_not_replaced(db_path: str) -> None:
+    backtester(db_path).run()
+    size = os.path.getsize(db_path)
+    with pytest.raises(FileExistsError):
+        backtester(db_path)
+    assert os.path.getsize(db_path) == size
+
+
+def test_configs_of_the_caller_are_not_changed(db_path: str) -> None:
+    symbols_info = SymbolsInfo()
+    strategy_info = SymbolStrategyInfo("EURUSD", strategies.EMACrossover("EMACrossover", magic_number=99),
+                                       [config(TimeFrames.M15)])
+    symbols_info.add(strategy_info)
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR20", 20))
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    signals_manager = signals.Manager()
+    signals_manager.add(signals.EMACrossover("EMACrossover", "EMACrossover3_21", shift=1))
+    engine = Backtester(symbols_info, indicators_manager, signals_manager, db_path)
+    engine.add_symbol(SimulatedSymbol("EURUSD", digits=5), TimeFrames.M15,
+                      rates_to_dataframe(mt5_rates(BARS, seconds=15 * 60), 5, 0))
+    clock, last_check = strategy_info.clock, strategy_info.configs[0].last_check
+    assert engine.run().trades > 0
+    assert strategy_info.clock is clock
+    assert strategy_info.configs[0].last_check == last_check
+
+
+def test_base_bars_above_the_strategies_are_rejected(db_path: str) -> None:
+    engine = backtester(db_path)
+    with pytest.raises(ValueError):
+        engine.add_symbol(SimulatedSymbol("EURUSD", digits=5), TimeFrames.H4,
+                          rates_to_dataframe(mt5_rates(10, seconds=4 * 3600), 5, 0))
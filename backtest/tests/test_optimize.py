@@ -0,0 +1,72 @@
+from api import SimulatedSymbol, TimeFrames
+from api.rates import rates_to_dataframe
+from api.simulated import mt5_rates
+from backtest import Optimizer, SharedBars, StrategyParameters, parameter_grid, random_parameters
+from backtest.optimize import OptimizationTask, backtest_parameters
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import pytest
+from symbols_info import SymbolStrategyConfig
+
+BARS = 600
+CONFIG = SymbolStrategyConfig(timeframe=TimeFrames.M15, capital=5000, day_goal=0, day_stop=0, op_per_day=0,
+                              op_goal=10, op_stop=5, max_volume=1.0, multiple_positions=False, wait_to_check=5)
+SPEC = SimulatedSymbol("EURUSD", digits=5)
+
+
+@pytest.fixture
+def bars() -> pd.DataFrame:
+    return rates_to_dataframe(mt5_rates(BARS, seconds=15 * 60), 5, 0)
+
+
+def test_grid_has_no_fast_period_above_the_slow_one() -> None:
+    grid = parameter_grid(fast=[3, 21], slow=[21, 50], stop_atr=[0.5], op_goal=[10, 20], op_stop=[5])
+    assert len(grid) == 6
+    assert all(parameters.fast < parameters.slow for parameters in grid)
+    assert StrategyParameters(21, 21, 0.5, 10, 5) not in grid
+
+
+def test_random_parameters_are_different_and_repeatable() -> None:
+    values = dict(fast=[3, 5, 8], slow=[21, 34], stop_atr=[0.25, 0.5, 1.0], op_goal=[10, 20], op_stop=[5, 10])
+    samples = random_parameters(10, seed=1, **values)
+    assert len(set(samples)) == 10
+    assert samples == random_parameters(10, seed=1, **values)
+    assert set(samples) <= set(parameter_grid(**values))
+    assert len(random_parameters(1000, **values)) == len(parameter_grid(**values))
+
+
+def test_shared_bars_are_the_published_ones(bars: pd.DataFrame) -> None:
+    with SharedBars.publish(bars) as shared:
+        attached = SharedBars.attach(shared.spec)
+        frame = attached.to_dataframe()
+        pd.testing.assert_frame_equal(frame, bars)
+        # -- THE FRAME READS THE BLOCK, IT IS NOT A COPY
+        assert np.shares_memory(frame["Close"].to_numpy(), attached.array("Close"))
+        assert np.shares_memory(frame.index.asi8, attached.array(SharedBars.INDEX))
+        del frame
+        attached.close()
+        name = shared.spec.name
+    # -- THE PUBLISHER REMOVES THE BLOCK
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_pool_results_are_the_backtests_of_the_parameters(bars: pd.DataFrame) -> None:
+    grid = parameter_grid(fast=[3, 5], slow=[21], stop_atr=[0.5, 1.0], op_goal=[10], op_stop=[5])
+    results = Optimizer(SPEC, TimeFrames.M15, bars, CONFIG, workers=2).run(grid)
+    assert len(results) == len(grid)
+    assert [StrategyParameters(*row) for row in results[["fast", "slow", "stop_atr", "op_goal", "op_stop"]]
+            .itertuples(index=False)] == grid
+    assert (results["trades"] > 0).all()
+    assert (results["max_drawdown"] >= 0).all()
+    serial = backtest_parameters(OptimizationTask(grid[-1], SPEC, TimeFrames.M15, CONFIG, 10000.0), bars)
+    for metric in ("trades", "profit", "win_rate", "max_drawdown"):
+        assert results[metric].iloc[-1] == pytest.approx(serial[metric])
+
+
+def test_stop_offset_changes_the_backtest(bars: pd.DataFrame) -> None:
+    near, far = (backtest_parameters(OptimizationTask(StrategyParameters(3, 21, stop_atr, 10, 5), SPEC,
+                                                      TimeFrames.M15, CONFIG, 10000.0), bars)
+                 for stop_atr in (0.1, 2.0))
+    assert near["profit"] != far["profit"]
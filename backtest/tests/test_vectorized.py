@@ -0,0 +1,139 @@
+from api import SimulatedSymbol, TimeFrames
+from api.rates import rates_to_dataframe
+from api.simulated import mt5_rates
+from backtest import Backtester, VectorizedBacktest, forming_atr, parameter_grid
+from backtest.vectorized import vectorized_grid
+import contextlib
+import indicators
+from indicators.sweep import crossover_sweep
+import io
+import numpy as np
+import pytest
+import signals
+import strategies
+from symbols_info import SymbolsInfo, SymbolStrategyConfig, SymbolStrategyInfo
+
+SPEC = SimulatedSymbol("EURUSD", digits=5)
+
+
+def simple_bars(opens: list, lows: list) -> VectorizedBacktest:
+    """Bars without spread that go up from their open to their close, with the lows given"""
+    opens, lows = np.array(opens), np.array(lows)
+    closes = np.append(opens[1:], opens[-1] + 0.0001)
+    highs = np.maximum(opens, closes) + 0.0001
+    return VectorizedBacktest(opens, highs, lows, closes, np.zeros(len(opens)), SPEC)
+
+
+def buy_at(bar: int, count: int) -> np.ndarray:
+    signal = np.zeros(count, dtype=np.int8)
+    signal[bar] = 1
+    return signal
+
+
+def test_position_is_closed_at_the_open_that_reaches_op_goal() -> None:
+    # -- STOP 1.09990 (LOW 1.1000 - 0.5 * 0.0002), VOLUME 5 / (100000 * 0.0011) = 0.05, op_goal 10 IS 0.0020 AWAY
+    backtest = simple_bars([1.1005, 1.1008, 1.1010, 1.1020, 1.1035, 1.1040],
+                           [1.1000, 1.1000, 1.1010, 1.1018, 1.1030, 1.1035])
+    result = backtest.run(buy_at(2, 6), np.full(6, 0.0002), op_goal=10, op_stop=5)
+    trade = result.trades.iloc[0]
+    assert len(result.trades) == 1
+    assert (trade["entry"], trade["exit"], trade["reason"]) == (2, 4, "goal")
+    assert trade["volume"] == pytest.approx(0.05)
+    assert trade["stop_loss"] == pytest.approx(1.0999)
+    assert trade["profit"] == pytest.approx(12.5)
+    assert result.pnl[4] == pytest.approx(12.5) and result.profit == pytest.approx(12.5)
+
+
+def test_stop_loss_is_filled_at_the_stop_inside_the_bar() -> None:
+    backtest = simple_bars([1.1005, 1.1008, 1.1010, 1.1005, 1.1000], [1.1000, 1.1000, 1.0990, 1.1000, 1.0995])
+    trade = backtest.run(buy_at(2, 5), np.full(5, 0.0002), op_goal=10, op_stop=5).trades.iloc[0]
+    # -- THE STOP IS HIT IN THE BAR 2, THE POSITION IS CLOSED BEFORE THE OPEN OF THE BAR 3
+    assert (trade["exit"], trade["reason"]) == (3, "sl")
+    assert trade["close_price"] == pytest.approx(1.0999)
+    assert trade["profit"] == pytest.approx(-5.5)
+
+
+def test_stop_goes_to_the_open_price_at_a_third_of_op_goal() -> None:
+    # -- PROFIT 5 AT THE OPEN OF THE BAR 3 (ABOVE 10 / 3), THE LOW OF THE BAR 3 GOES BACK TO THE OPEN PRICE
+    backtest = simple_bars([1.1005, 1.1008, 1.1010, 1.1020, 1.1015, 1.1015],
+                           [1.1000, 1.1000, 1.1010, 1.1009, 1.1010, 1.1010])
+    trade = backtest.run(buy_at(2, 6), np.full(6, 0.0002), op_goal=10, op_stop=5).trades.iloc[0]
+    assert (trade["exit"], trade["reason"]) == (4, "sl")
+    assert trade["close_price"] == pytest.approx(1.1010)
+    assert trade["profit"] == pytest.approx(0.0)
+
+
+def test_one_position_at_a_time() -> None:
+    backtest = simple_bars([1.1005, 1.1008, 1.1010, 1.1005, 1.1000, 1.1000, 1.1000],
+                           [1.1000, 1.1000, 1.0990, 1.1000, 1.0995, 1.0995, 1.0995])
+    signal = np.zeros(7, dtype=np.int8)
+    # -- THE SIGNAL OF THE BAR 3 (EXIT OF THE FIRST POSITION) OPENS THE SECOND ONE, THE ONE OF THE BAR 4 DOES NOT
+    signal[[2, 3, 4]] = 1
+    result = backtest.run(signal, np.full(7, 0.0002), op_goal=10, op_stop=5)
+    assert list(result.trades["entry"]) == [2, 3]
+    # -- THE LAST POSITION IS STILL OPEN AT THE END, ITS PROFIT IS NOT BOOKED
+    assert list(result.trades["exit"]) == [3, -1]
+    assert list(result.trades["reason"]) == ["sl", "open"]
+    assert result.profit == pytest.approx(-5.5)
+
+
+def test_forming_atr_is_the_atr_of_the_dataframe_of_the_strategies() -> None:
+    bars = rates_to_dataframe(mt5_rates(200, seconds=15 * 60), 5, 0)
+    atr = forming_atr(bars["Open"], bars["High"], bars["Low"], bars["Close"], 20)
+    for bar in (20, 21, 57, 199):
+        # -- THE BAR STILL FORMING HAS ONLY ITS OPEN
+        frame = bars.iloc[:bar + 1].copy()
+        frame.iloc[-1, frame.columns.get_indexer(["High", "Low", "Close"])] = frame["Open"].iloc[-1]
+        assert atr[bar] == pytest.approx(indicators.ATR("ATR20", 20).calculate(frame)["ATR20"].iloc[-1], abs=1e-12)
+    assert (atr[:20] == 0).all()
+
+
+def history_signals(close: np.ndarray, fast: int, slow: int) -> np.ndarray:
+    """Crossover of the bar before each open, on the EMA's of the whole history like the streams of the Backtester"""
+    signal = np.zeros(len(close), dtype=np.int8)
+    signal[1:] = next(crossover_sweep(close, [fast], [slow]))[1][:-1, 0]
+    return signal
+
+
+@pytest.mark.parametrize("stop_atr, op_goal", [(0.5, 10), (1.0, 10), (2.0, 6)])
+def test_trades_are_the_ones_of_the_backtester(tmp_path, stop_atr: float, op_goal: float) -> None:
+    bars = rates_to_dataframe(mt5_rates(1500, seconds=15 * 60), 5, 0)
+    symbols_info = SymbolsInfo()
+    symbols_info.add(SymbolStrategyInfo("EURUSD", strategies.EMACrossover("EMACrossover", 99, stop_atr=stop_atr),
+                                        [SymbolStrategyConfig(timeframe=TimeFrames.M15, capital=5000, day_goal=0,
+                                                              day_stop=0, op_per_day=0, op_goal=op_goal, op_stop=5,
+                                                              max_volume=1.0, multiple_positions=False,
+                                                              wait_to_check=0)]))
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR20", 20))
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    signals_manager = signals.Manager()
+    signals_manager.add(signals.EMACrossover("EMACrossover", "EMACrossover3_21", shift=1))
+    backtester = Backtester(symbols_info, indicators_manager, signals_manager, str(tmp_path / "backtest.db"))
+    backtester.add_symbol(SPEC, TimeFrames.M15, bars)
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = backtester.run()
+    expected = backtester.db.get_table("Trades").sort_values("open_time")
+
+    backtest = VectorizedBacktest.from_bars(bars, SPEC)
+    signal = history_signals(backtest.close, 3, 21)
+    result = backtest.run(signal, forming_atr(backtest.open, backtest.high, backtest.low, backtest.close),
+                          op_goal, 5, stop_atr, start=indicators_manager.required_bars() - 1)
+    trades = result.trades[result.trades["exit"] >= 0]
+
+    assert len(trades) == report.trades > 0
+    assert list(bars.index[trades["entry"]].astype(str)) == list(expected["open_time"])
+    assert list(bars.index[trades["exit"]].astype(str)) == list(expected["close_time"])
+    np.testing.assert_allclose(trades["profit"], expected["profit"], atol=0.011)
+    assert result.profit == pytest.approx(report.profit, abs=0.01)
+
+
+def test_grid_has_the_columns_of_the_optimizer() -> None:
+    bars = rates_to_dataframe(mt5_rates(3000, seconds=15 * 60), 5, 0)
+    grid = parameter_grid(fast=[3, 8], slow=[21, 34], stop_atr=[0.5, 1.0], op_goal=[10], op_stop=[5])
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = vectorized_grid(bars, SPEC, grid)
+    assert list(results.columns[:5]) == ["fast", "slow", "stop_atr", "op_goal", "op_stop"]
+    assert len(results) == len(grid)
+    assert (results["trades"] > 0).all()
+    assert results["profit"].nunique() > 1
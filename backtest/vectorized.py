@@ -0,0 +1,258 @@
+from __future__ import annotations
+from backtest.optimize import RESULT_COLUMNS, StrategyParameters, trade_metrics
+from dataclasses import asdict, dataclass
+import indicators
+from indicators.atr import true_range
+from indicators.sweep import crossover_sweep
+import numpy as np
+import pandas as pd
+import time
+from typing import List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from api import SimulatedSymbol
+    from pandas import DataFrame
+
+# -- BARS AHEAD OF EACH OPEN POSITION LOOKED AT ONCE, THE POSITIONS STILL OPEN LOOK AT THE NEXT ONES
+WINDOW = 32
+
+# -- EXITS OF THE POSITIONS
+NO_EXIT = 0
+STOP_LOSS = 1
+OP_GOAL = 2
+# -- THE PROFIT AT AN OPEN REACHED THE TARGET OF THE SEARCH (op_goal / 3 TO PROTECT, op_goal TO CLOSE)
+TARGET = 3
+
+
+def forming_atr(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                period: int = 20) -> np.ndarray:
+    """
+    ATR read by the strategies at the open of each bar: the bar still forming is the last one of their dataframe,
+    its true range is the gap from the previous close. The first period bars have none (0, like indicators.ATR)
+    """
+    open_, high, low, close = (np.asarray(values, dtype=np.float64) for values in (open_, high, low, close))
+    atr = np.zeros(len(close), dtype=np.float64)
+    if len(close) <= period:
+        return atr
+    # -- TRUE RANGES OF THE CLOSED BARS 1..i-1 AND OF THE FORMING BAR i
+    closed = np.concatenate(([0.0], np.cumsum(true_range(high, low, close)[1:])))
+    gaps = np.abs(open_[1:] - close[:-1])
+    atr[period:] = (closed[period - 1:-1] - closed[:-period] + gaps[period - 1:]) / period
+    return atr
+
+
+@dataclass
+class VectorizedResult:
+    """Trades of a vectorized backtest (bar positions of the entry and of the exit) and the profit booked per bar"""
+    trades: DataFrame
+    pnl: np.ndarray
+
+    @property
+    def profit(self) -> float:
+        return round(float(self.pnl.sum()), 2)
+
+    @property
+    def equity(self) -> np.ndarray:
+        """Balance change at the open of each bar"""
+        return np.cumsum(self.pnl)
+
+
+class VectorizedBacktest:
+    """
+    Backtest of the EMACrossover strategy with array operations on the bars of one timeframe, the same trades of
+    the Backtester for one config without the day limits (op_per_day, day_goal, day_stop):
+    - A position opens at the open of a bar with a signal (BUY at the ask, SELL at the bid), its stop loss is
+      stop_atr ATR's beyond the Low/High of the previous bar and its volume risks op_stop, like TradeRiskManager
+    - The stop is matched inside the bars by the path of the simulated broker (Open, Low/High, High/Low, Close)
+      and at the gaps of the opens
+    - At each bar open the stop goes to the open price when the profit reaches op_goal / 3 and the position is
+      closed when it reaches op_goal
+    - Only one position at a time: a signal opens a position only once the previous one is closed
+      (wait_to_check shorter than a bar, so a refused signal does not delay the next one)
+    - No intra-bar trailing stop (the strategy built without trail_atr)
+    The exits of every possible entry are found at once, WINDOW bars at a time, only the chain of the positions
+    taken (each entry after the exit of the previous one) goes trade by trade
+    """
+    def __init__(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                 spread: np.ndarray, spec: SimulatedSymbol) -> None:
+        self.spec = spec
+        self.open, self.high, self.low, self.close = (np.asarray(values, dtype=np.float64)
+                                                      for values in (open_, high, low, close))
+        spread = np.asarray(spread, dtype=np.float64) * 10.0 ** -spec.digits
+        # -- PRICES OF THE SIMULATED BROKER: THE BID PATH OF EACH BAR AND ITS ASK, ROUNDED TO THE DIGITS
+        up = self.close > self.open
+        self.bid_path = np.round(np.column_stack((self.open, np.where(up, self.low, self.high),
+                                                  np.where(up, self.high, self.low), self.close)), spec.digits)
+        self.ask_path = np.round(self.bid_path + spread[:, None], spec.digits)
+        # -- BY SIDE (0 BUY, 1 SELL): THE QUOTE OF THE OPENS AND THE WORST ONE OF THE PATH AFTER THE OPEN
+        self.quote_open = np.stack((self.bid_path[:, 0], self.ask_path[:, 0]))
+        self.worst_path = np.stack((self.bid_path[:, 1:].min(axis=1), self.ask_path[:, 1:].max(axis=1)))
+        self.bars = len(self.close)
+
+    @classmethod
+    def from_bars(cls, bars: DataFrame, spec: SimulatedSymbol) -> VectorizedBacktest:
+        return cls(bars["Open"].to_numpy(), bars["High"].to_numpy(), bars["Low"].to_numpy(), bars["Close"].to_numpy(),
+                   bars["Spread"].to_numpy(), spec)
+
+    def run(self, signal: np.ndarray, atr: np.ndarray, op_goal: float, op_stop: float, stop_atr: float = 0.5,
+            start: int = 0) -> VectorizedResult:
+        """
+        signal and atr are the values read at the open of each bar (1 BUY, -1 SELL, 0 none), start is the first bar
+        the strategy runs at (the indicators have the bars they need)
+        """
+        signal = np.asarray(signal)
+        atr = np.asarray(atr, dtype=np.float64)
+        spec = self.spec
+        entries = np.flatnonzero(signal[max(start, 1):]) + max(start, 1)
+
+        # -- STOP LOSS AND VOLUME OF EACH POSSIBLE ENTRY, THE ONES WITHOUT VOLUME ARE NOT TAKEN
+        direction = np.sign(signal[entries]).astype(np.float64)
+        is_buy = direction > 0
+        price = np.where(is_buy, self.ask_path[entries, 0], self.bid_path[entries, 0])
+        stop_loss = np.where(is_buy, self.low[entries - 1] - atr[entries] * stop_atr,
+                             self.high[entries - 1] + atr[entries] * stop_atr)
+        delta = np.where(is_buy, self.ask_path[entries, 0] - stop_loss, stop_loss - self.bid_path[entries, 0])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            volume = np.round(op_stop / (spec.contract_size * spec.usd_profit_converter * delta) / spec.volume_step)
+        volume = np.minimum(volume * spec.volume_step, spec.volume_max)
+        taken = (delta > 0) & (volume >= spec.volume_min)
+        entries, direction, price, stop_loss, volume = (values[taken] for values in
+                                                        (entries, direction, price, stop_loss, volume))
+
+        # -- FIRST THE INITIAL STOP UNTIL op_goal / 3, THEN THE STOP AT THE OPEN PRICE UNTIL op_goal
+        steps, exits, fills = self._exits(entries, np.zeros(len(entries), dtype=np.int64), direction, price,
+                                          stop_loss, volume, op_goal / 3)
+        protected = np.flatnonzero((exits == TARGET) & (self._profit(direction, price, fills, volume) < op_goal))
+        if len(protected):
+            steps[protected], exits[protected], fills[protected] = self._exits(
+                entries[protected], steps[protected] + 1, direction[protected], price[protected], price[protected],
+                volume[protected], op_goal)
+        exits[exits == TARGET] = OP_GOAL
+
+        # -- ONE POSITION AT A TIME: THE NEXT ENTRY IS THE FIRST ONE AT OR AFTER THE EXIT OF THE POSITION
+        # -- (THE STOPS OF THE BAR AND THE CLOSE AT THE OPEN ARE DONE BEFORE THE STRATEGY LOOKS FOR A NEW ONE)
+        chain = []
+        free = entries + steps + 1
+        position = 0
+        while position < len(entries):
+            chain.append(position)
+            if exits[position] == NO_EXIT:
+                break
+            position = int(np.searchsorted(entries, free[position], side="left"))
+        chain = np.asarray(chain, dtype=np.int64)
+        return self._result(entries[chain], free[chain], exits[chain], direction[chain], price[chain],
+                            fills[chain], stop_loss[chain], volume[chain])
+
+    def _exits(self, entries: np.ndarray, first: np.ndarray, direction: np.ndarray, price: np.ndarray,
+               stop_loss: np.ndarray, volume: np.ndarray, target: float) -> tuple:
+        """
+        First step (the path of the bar entry + step, the open of the next one) with the stop hit or the profit at
+        the open reaching the target, the exit and its price for each entry
+        """
+        steps = first.copy()
+        exits = np.full(len(entries), NO_EXIT, dtype=np.int64)
+        fills = np.zeros(len(entries), dtype=np.float64)
+        pending = np.arange(len(entries))
+        last = self.bars - 1
+        while len(pending):
+            bar = entries[pending, None] + steps[pending, None] + np.arange(WINDOW)
+            inside = bar < last
+            bar = np.minimum(bar, last - 1)
+            is_buy = (direction[pending] > 0)[:, None]
+            side = (direction[pending, None] < 0).astype(np.int64)
+            # -- A STOP IS HIT WHEN THE PRICE IS AT OR BEYOND IT: sign * (price - stop) <= 0
+            sign, sl = direction[pending, None], stop_loss[pending, None]
+            # -- THE PATH OF THE BAR AFTER ITS OPEN, THEN THE GAP AND THE PROFIT AT THE OPEN OF THE NEXT ONE
+            path_hit = sign * (self.worst_path[side, bar] - sl) <= 0
+            next_open = self.quote_open[side, bar + 1]
+            gap_hit = sign * (next_open - sl) <= 0
+            reached = self._profit(direction[pending, None], price[pending, None], next_open,
+                                   volume[pending, None]) >= target
+            event = (path_hit | gap_hit | reached) & inside
+            found = event.any(axis=1)
+
+            rows = pending[found]
+            step = np.argmax(event[found], axis=1)
+            steps[rows] += step
+            hit_bar = bar[found, step]
+            stopped = path_hit[found, step]
+            fills[rows] = np.where(stopped, self._path_fill(hit_bar, is_buy[found, 0], stop_loss[rows]),
+                                   next_open[found, step])
+            exits[rows] = np.where(stopped | gap_hit[found, step], STOP_LOSS, TARGET)
+
+            # -- THE POSITIONS STILL OPEN AT THE LAST BAR STAY OPEN
+            ended = ~found & ~inside[:, -1]
+            steps[pending[ended]] = last - entries[pending[ended]]
+            pending = pending[~found & ~ended]
+            steps[pending] += WINDOW
+        return steps, exits, fills
+
+    def _path_fill(self, bar: np.ndarray, is_buy: np.ndarray, stop_loss: np.ndarray) -> np.ndarray:
+        """Price of the stop in the path of the bar: the stop itself, or the first price beyond it after a gap"""
+        path = np.where(is_buy[:, None], self.bid_path[bar], self.ask_path[bar])
+        beyond = np.where(is_buy[:, None], path <= stop_loss[:, None], path >= stop_loss[:, None])
+        point = np.argmax(beyond[:, 1:], axis=1) + 1
+        rows = np.arange(len(bar))
+        return np.where(beyond[rows, point - 1], path[rows, point], stop_loss)
+
+    def _profit(self, direction: np.ndarray, price: np.ndarray, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+        spec = self.spec
+        return np.round(direction * (close - price) * volume * spec.contract_size * spec.usd_profit_converter, 2)
+
+    def _result(self, entries: np.ndarray, free: np.ndarray, exits: np.ndarray, direction: np.ndarray,
+                price: np.ndarray, fills: np.ndarray, stop_loss: np.ndarray, volume: np.ndarray) -> VectorizedResult:
+        closed = exits != NO_EXIT
+        profit = np.where(closed, self._profit(direction, price, fills, volume), 0.0)
+        commission = -self.spec.commission_per_lot * volume
+        # -- THE COMMISSIONS ARE BOOKED AT THE ENTRY AND AT THE EXIT, THE PROFIT AT THE EXIT
+        pnl = np.zeros(self.bars, dtype=np.float64)
+        np.add.at(pnl, entries, commission)
+        np.add.at(pnl, free[closed], profit[closed] + commission[closed])
+        trades = pd.DataFrame({"entry": entries,
+                               "exit": np.where(closed, free, -1),
+                               "type": np.where(direction > 0, "BUY", "SELL"),
+                               "volume": volume,
+                               "open_price": price,
+                               "close_price": np.where(closed, fills, np.nan),
+                               "stop_loss": stop_loss,
+                               "profit": profit,
+                               "commission": np.where(closed, 2 * commission, commission),
+                               "reason": np.select([exits == STOP_LOSS, exits == OP_GOAL], ["sl", "goal"], "open")})
+        return VectorizedResult(trades=trades, pnl=pnl)
+
+
+def vectorized_grid(bars: DataFrame, spec: SimulatedSymbol, parameters: List[StrategyParameters]) -> DataFrame:
+    """
+    Result table of the Optimizer for the parameters, from vectorized backtests
+    The crossovers of all the (fast, slow) pairs come from one sweep of the EMA's and the ATR is computed once
+    """
+    started = time.perf_counter()
+    backtest = VectorizedBacktest.from_bars(bars, spec)
+    atr = forming_atr(backtest.open, backtest.high, backtest.low, backtest.close, 20)
+    fast = sorted({params.fast for params in parameters})
+    slow = sorted({params.slow for params in parameters})
+    signals = {}
+    for pairs, crossovers in crossover_sweep(backtest.close, fast, slow):
+        for column, (fast_span, slow_span) in enumerate(pairs):
+            # -- THE SIGNAL AT THE OPEN OF A BAR IS THE CROSSOVER OF THE BAR BEFORE (signals.EMACrossover, shift 1)
+            signal = np.zeros(len(crossovers), dtype=np.int8)
+            signal[1:] = crossovers[:-1, column]
+            signals[(int(fast_span), int(slow_span))] = signal
+
+    rows = []
+    for params in parameters:
+        manager = indicators.Manager()
+        manager.add(indicators.ATR("ATR20", 20))
+        manager.add(indicators.EMACrossover(f"EMACrossover{params.fast}_{params.slow}", params.fast, params.slow))
+        run_started = time.perf_counter()
+        result = backtest.run(signals[(params.fast, params.slow)], atr, params.op_goal, params.op_stop,
+                              params.stop_atr, start=manager.required_bars() - 1)
+        closed = result.trades[result.trades["exit"] >= 0].sort_values("exit", kind="stable")
+        rows.append({**asdict(params),
+                     "trades": len(closed),
+                     "profit": result.profit,
+                     **trade_metrics(closed["profit"].to_numpy(dtype=np.float64)),
+                     "seconds": time.perf_counter() - run_started})
+    print(f"VECTORIZED BACKTEST: {len(parameters)} backtests of {len(bars)} bars in "
+          f"{time.perf_counter() - started:.2f}s")
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
@@ -0,0 +1,56 @@
+"""
+ATR kernel against the previous per-bar loop
+    python -m benchmarks.bench_atr
+"""
+from api.rates import rates_to_dataframe
+from api.simulated import mt5_rates
+from benchmarks.bench_standardize import best_of
+import indicators
+import numpy as np
+from pandas import DataFrame
+
+BARS = [100, 10_000, 1_000_000, 10_000_000]
+# -- THE LOOP TAKES MINUTES ABOVE THIS SIZE
+LOOP_MAX_BARS = 1_000_000
+
+
+def loop_atr(data: DataFrame, period: int) -> list:
+    """Previous ATR._atr_values, helper columns and a Python loop over the bars"""
+    df = data[["High", "Low", "Close"]].copy()
+    df["Closeshift"] = df["Close"].shift(1)
+    df["Highshift"] = df["High"].shift(1)
+    df["Lowshift"] = df["Low"].shift(1)
+    df["TRmax"] = np.where(df["Close"] >= df["Highshift"], df["Close"], df["Highshift"])
+    df["TRmin"] = np.where(df["Close"] <= df["Lowshift"], df["Close"], df["Lowshift"])
+    df["TR"] = df["TRmax"] - df["TRmin"]
+    high, low, close, tr = df["High"].to_list(), df["Low"].to_list(), df["Close"].to_list(), df["TR"].to_list()
+    atr = df["TR"].rolling(period).mean().to_list()
+    atr_values = []
+    for i in range(len(df)):
+        if i < period:
+            atr_values.append(0)
+        elif i == period:
+            atr_values.append(atr[i])
+        else:
+            tr[i] = max(high[i], close[i - 1]) - min(low[i], close[i - 1])
+            atr_values.append(atr_values[i - 1] + ((tr[i] - tr[i - period]) / period))
+    return atr_values
+
+
+def main() -> None:
+    atr = indicators.ATR("ATR20", 20)
+    print(f"{'bars':>10} {'loop (ms)':>12} {'numpy (ms)':>12} {'speedup':>9}")
+    for bars in BARS:
+        dataframe = rates_to_dataframe(mt5_rates(bars), 5, 0)
+        repeat = 5 if bars < LOOP_MAX_BARS else 1
+        new = best_of(lambda: atr.calculate(dataframe), repeat)
+        if bars > LOOP_MAX_BARS:
+            print(f"{bars:>10} {'-':>12} {new * 1e3:>12.3f} {'-':>9}")
+            continue
+        old = best_of(lambda: loop_atr(dataframe, 20), repeat)
+        print(f"{bars:>10} {old * 1e3:>12.3f} {new * 1e3:>12.3f} {old / new:>8.1f}x")
+    return None
+
+
+if __name__ == "__main__":
+    main()
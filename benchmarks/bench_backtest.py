@@ -0,0 +1,53 @@
+"""
+Backtest of one symbol-year of M15 through the stack of main.py (the M15 and H1 configs of its EURUSD)
+    python -m benchmarks.bench_backtest
+"""
+from api import SimulatedSymbol, TimeFrames
+from api.rates import rates_to_dataframe
+from api.simulated import mt5_rates
+from backtest import Backtester
+import contextlib
+import indicators
+import io
+import os
+import signals
+import strategies
+from symbols_info import SymbolsInfo, SymbolStrategyConfig, SymbolStrategyInfo
+import tempfile
+
+M15_BARS_PER_YEAR = 260 * 24 * 4
+
+
+def config(timeframe: TimeFrames, op_goal: float, op_stop: float) -> SymbolStrategyConfig:
+    return SymbolStrategyConfig(timeframe=timeframe, capital=5000, day_goal=0, day_stop=0, op_per_day=0,
+                                op_goal=op_goal, op_stop=op_stop, max_volume=1.0, multiple_positions=False,
+                                wait_to_check=5)
+
+
+def main() -> None:
+    symbols_info = SymbolsInfo()
+    symbols_info.add(SymbolStrategyInfo("EURUSD", strategies.EMACrossover("EMACrossover", magic_number=99),
+                                        [config(TimeFrames.M15, 10, 5), config(TimeFrames.H1, 20, 10)]))
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR20", 20))
+    indicators_manager.add(indicators.EMA("EMA3", 3))
+    indicators_manager.add(indicators.EMA("EMA21", 21))
+    indicators_manager.add(indicators.EMA("EMA72", 72))
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    signals_manager = signals.Manager()
+    signals_manager.add(signals.EMACrossover("EMACrossover", "EMACrossover3_21", shift=1))
+
+    with tempfile.TemporaryDirectory() as folder:
+        backtester = Backtester(symbols_info, indicators_manager, signals_manager, os.path.join(folder, "backtest.db"))
+        backtester.add_symbol(SimulatedSymbol("EURUSD", digits=5), TimeFrames.M15,
+                              rates_to_dataframe(mt5_rates(M15_BARS_PER_YEAR, seconds=15 * 60), 5, 0))
+        # -- THE STACK PRINTS EVERY TRADE, ONLY THE REPORT IS SHOWN
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = backtester.run()
+    print(f"{report.bars} M15 bars in {report.seconds:.1f} s --- {report.bars_per_second:.0f} bars/s --- "
+          f"{report.trades} trades")
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+One iteration of the main.py pipeline on 100 bars (indicators, signals and the reads of the strategy)
+on a pandas DataFrame against a BarFrame, without the caches
+    python -m benchmarks.bench_bar_frame
+"""
+from api import TimeFrames
+from api.simulated import random_dataframe
+from benchmarks.bench_standardize import best_of
+import indicators
+from shared_data_structures import BarFrame
+import signals
+
+CALLS = 200
+
+
+def main() -> None:
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR20", 20))
+    indicators_manager.add(indicators.EMA("EMA72", 72))
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    signals_manager = signals.Manager()
+    signals_manager.add(signals.EMACrossover("EMACrossover", "EMACrossover3_21"))
+    dataframe = random_dataframe(100)
+
+    def pipeline(bars) -> float:
+        bars = indicators_manager.compute_all(bars)
+        signals_manager.compute_signals("EURUSD", TimeFrames.M15, bars)
+        return bars["Low"].iloc[-2] - bars["ATR20"].iloc[-1] * 0.5 + bars["Close"].iloc[-1]
+
+    def pandas_pipeline() -> None:
+        pipeline(dataframe.copy())
+        return None
+
+    def bar_frame_pipeline() -> None:
+        pipeline(BarFrame.from_pandas(dataframe, reserve=indicators_manager.outputs))
+        return None
+
+    pandas_time = best_of(lambda: [pandas_pipeline() for _ in range(CALLS)]) / CALLS
+    bar_frame_time = best_of(lambda: [bar_frame_pipeline() for _ in range(CALLS)]) / CALLS
+    print(f"{'DataFrame':>10} {pandas_time * 1e6:>10.1f} us")
+    print(f"{'BarFrame':>10} {bar_frame_time * 1e6:>10.1f} us   {pandas_time / bar_frame_time:.1f}x")
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Load multi-year M1 histories from the BarStore
+    python -m benchmarks.bench_bar_store
+"""
+from api import TimeFrames
+from api.simulated import mt5_rates
+from benchmarks.bench_standardize import best_of
+from database import BarStore
+import tempfile
+import timeit
+
+YEARS = [1, 3, 5]
+M1_BARS_PER_YEAR = 260 * 24 * 60
+
+
+def main() -> None:
+    print(f"{'years':>6} {'bars':>10} {'save (ms)':>10} {'full read (ms)':>15} {'last month (ms)':>16}")
+    for years in YEARS:
+        rates = mt5_rates(years * M1_BARS_PER_YEAR)
+        with tempfile.TemporaryDirectory() as path:
+            store = BarStore(path)
+            save = timeit.timeit(lambda: store.append("EURUSD", TimeFrames.M1, rates, 5), number=1)
+            start, end = int(rates["time"][0]), int(rates["time"][-1])
+            full = best_of(lambda: store.read("EURUSD", TimeFrames.M1, start, end, 5, -6))
+            month = best_of(lambda: store.read("EURUSD", TimeFrames.M1, end - 31 * 86400, end, 5, -6))
+            print(f"{years:>6} {len(rates):>10} {save * 1e3:>10.1f} {full * 1e3:>15.2f} {month * 1e3:>16.3f}")
+    return None
+
+
+if __name__ == "__main__":
+    main()
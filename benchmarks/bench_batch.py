@@ -0,0 +1,37 @@
+"""
+Indicators of main.py for many symbols of one timeframe (100 bars each): one compute_all per symbol
+against one compute_batch
+    python -m benchmarks.bench_batch
+"""
+from api.simulated import random_dataframe
+from benchmarks.bench_standardize import best_of
+import indicators
+from shared_data_structures import BarFrame
+
+SYMBOLS = [10, 100, 500]
+
+
+def main() -> None:
+    manager = indicators.Manager()
+    manager.add(indicators.ATR("ATR20", 20))
+    manager.add(indicators.EMA("EMA72", 72))
+    manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    outputs = manager.outputs
+    dataframes = {f"SYMBOL{seed}": random_dataframe(100, seed=seed) for seed in range(max(SYMBOLS))}
+
+    for count in SYMBOLS:
+        symbols = list(dataframes)[:count]
+
+        def frames() -> dict:
+            return {symbol: BarFrame.from_pandas(dataframes[symbol], reserve=outputs) for symbol in symbols}
+
+        conversion = best_of(frames)
+        per_symbol = best_of(lambda: [manager.compute_all(frame) for frame in frames().values()]) - conversion
+        batch = best_of(lambda: manager.compute_batch(frames())) - conversion
+        print(f"{count:>5} symbols   compute_all {per_symbol * 1e3:>8.2f} ms   compute_batch {batch * 1e3:>8.2f} ms"
+              f"   {per_symbol / batch:.1f}x")
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Indicators of main.py on 100 bars: compute_all against the IndicatorsCache paths
+    python -m benchmarks.bench_cache
+"""
+from api.simulated import random_dataframe
+from benchmarks.bench_standardize import best_of
+import indicators
+
+CALLS = 1000
+
+
+def main() -> None:
+    manager = indicators.Manager()
+    manager.add(indicators.ATR("ATR20", 20))
+    manager.add(indicators.EMA("EMA72", 72))
+    manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    cache = indicators.IndicatorsCache(manager)
+    dataframe = random_dataframe(100)
+    closes = dataframe["Close"].to_numpy()
+    cache.compute_all("EURUSD", "M15", dataframe)
+
+    def new_tick() -> None:
+        closes[-1] += 1e-5
+        cache.compute_all("EURUSD", "M15", dataframe)
+
+    batch = best_of(lambda: [manager.compute_all(dataframe.copy()) for _ in range(CALLS // 10)]) / (CALLS // 10)
+    unchanged = best_of(lambda: [cache.compute_all("EURUSD", "M15", dataframe) for _ in range(CALLS)]) / CALLS
+    forming = best_of(lambda: [new_tick() for _ in range(CALLS // 10)]) / (CALLS // 10)
+    print(f"{'compute_all':>22} {batch * 1e6:>10.1f} us")
+    print(f"{'cache, unchanged bars':>22} {unchanged * 1e6:>10.1f} us")
+    print(f"{'cache, forming bar':>22} {forming * 1e6:>10.1f} us")
+    return None
+
+
+if __name__ == "__main__":
+    main()
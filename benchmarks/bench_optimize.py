@@ -0,0 +1,38 @@
+"""
+Parameter optimization of the EMACrossover strategy on a pool of processes, the time of the same grid with one worker
+and with all the cores
+    python -m benchmarks.bench_optimize
+"""
+from api import SimulatedSymbol, TimeFrames
+from api.rates import rates_to_dataframe
+from api.simulated import mt5_rates
+from backtest import Optimizer, parameter_grid
+import os
+from symbols_info import SymbolStrategyConfig
+import time
+
+M15_BARS = 4 * 24 * 20
+CONFIG = SymbolStrategyConfig(timeframe=TimeFrames.M15, capital=5000, day_goal=0, day_stop=0, op_per_day=0,
+                              op_goal=10, op_stop=5, max_volume=1.0, multiple_positions=False, wait_to_check=5)
+
+
+def main() -> None:
+    bars = rates_to_dataframe(mt5_rates(M15_BARS, seconds=15 * 60), 5, 0)
+    cores = os.cpu_count() or 1
+    grid = parameter_grid(fast=[3, 5, 8, 13], slow=[21, 34], stop_atr=[0.5, 1.0], op_goal=[10, 20], op_stop=[5])
+    print(f"{len(grid)} backtests of {M15_BARS} M15 bars")
+    print(f"{'workers':>8} {'seconds':>9} {'backtests/s':>12} {'speedup':>9}")
+    serial = None
+    for workers in sorted({1, cores}):
+        started = time.perf_counter()
+        results = Optimizer(SimulatedSymbol("EURUSD", digits=5), TimeFrames.M15, bars, CONFIG,
+                            workers=workers).run(grid)
+        seconds = time.perf_counter() - started
+        serial = serial or seconds
+        print(f"{workers:>8} {seconds:>9.2f} {len(grid) / seconds:>12.2f} {serial / seconds:>8.1f}x")
+    print(results.sort_values("profit", ascending=False).head(5).to_string(index=False))
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+EMACrossover signal of every bar of a million bars: get_signal per bar against one get_signal_series call
+    python -m benchmarks.bench_signal_series
+"""
+from api import TimeFrames
+from api.simulated import random_dataframe
+from benchmarks.bench_standardize import best_of
+import indicators
+import signals
+
+BARS = 1_000_000
+# -- THE PER BAR PATH IS TIMED ON FEWER BARS AND SCALED
+LOOP_BARS = 2000
+
+
+def main() -> None:
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    dataframe = indicators_manager.compute_all(random_dataframe(BARS))
+    signal = signals.EMACrossover("EMACrossover", "EMACrossover3_21", shift=1)
+
+    loop = best_of(lambda: [signal.get_signal("EURUSD", TimeFrames.M1, dataframe.iloc[:bar + 1])
+                            for bar in range(1, LOOP_BARS + 1)], repeat=1) * BARS / LOOP_BARS
+    series = best_of(lambda: signal.get_signal_series(dataframe))
+    print(f"{BARS} bars   per bar {loop:>8.1f} s (estimated)   series {series * 1e3:>6.2f} ms")
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Compare the bar normalisation paths of MetaTrader5API
+    python -m benchmarks.bench_standardize
+"""
+from api.rates import rates_to_dataframe, standardize_dataframe
+from api.simulated import mt5_rates
+import pandas as pd
+import timeit
+
+BARS = [100, 10_000, 1_000_000]
+
+
+def best_of(statement, repeat: int = 5) -> float:
+    """Best wall time of one call, in seconds"""
+    return min(timeit.repeat(statement, number=1, repeat=repeat))
+
+
+def main() -> None:
+    print(f"{'bars':>10} {'dataframe (ms)':>16} {'rates (ms)':>12} {'speedup':>9}")
+    for bars in BARS:
+        rates = mt5_rates(bars)
+        old = best_of(lambda: standardize_dataframe(pd.DataFrame(rates), 5, -6))
+        new = best_of(lambda: rates_to_dataframe(rates, 5, -6))
+        print(f"{bars:>10} {old * 1e3:>16.3f} {new * 1e3:>12.3f} {old / new:>8.1f}x")
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Parameter sweeps on 10000 bars: one indicator object and dataframe per parameter against indicators.sweep
+    python -m benchmarks.bench_sweep
+"""
+from api.simulated import random_dataframe
+from benchmarks.bench_standardize import best_of
+import indicators
+from indicators.sweep import atr_sweep, crossover_sweep, ema_sweep
+import time
+
+SPANS = list(range(2, 201))
+PERIODS = [5, 10, 14, 20, 30, 50]
+
+
+def main() -> None:
+    dataframe = random_dataframe(10000)
+    close, high, low = (dataframe[column].to_numpy() for column in ["Close", "High", "Low"])
+
+    ema_loop = best_of(lambda: [indicators.EMA(f"EMA{span}", span).calculate(dataframe.copy()) for span in SPANS])
+    ema = best_of(lambda: ema_sweep(close, SPANS))
+    atr_loop = best_of(lambda: [indicators.ATR(f"ATR{period}", period).calculate(dataframe.copy())
+                                for period in PERIODS])
+    atr = best_of(lambda: atr_sweep(high, low, close, PERIODS))
+    print(f"{'EMA, 199 spans':>22} loop {ema_loop * 1e3:>9.1f} ms   sweep {ema * 1e3:>8.1f} ms")
+    print(f"{'ATR, 6 periods':>22} loop {atr_loop * 1e3:>9.1f} ms   sweep {atr * 1e3:>8.1f} ms")
+
+    start = time.perf_counter()
+    pairs = sum(len(chunk_pairs) for chunk_pairs, _ in crossover_sweep(close, SPANS, SPANS))
+    elapsed = time.perf_counter() - start
+    print(f"{'crossovers':>22} {pairs} pairs in {elapsed:.2f} s")
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Full parameter grid of the EMACrossover strategy on years of M15 bars with the vectorized backtest
+    python -m benchmarks.bench_vectorized
+"""
+from api import SimulatedSymbol
+from api.rates import rates_to_dataframe
+from api.simulated import mt5_rates
+from backtest import parameter_grid
+from backtest.vectorized import vectorized_grid
+import contextlib
+import io
+import time
+
+YEARS = 3
+M15_BARS_PER_YEAR = 260 * 24 * 4
+
+
+def main() -> None:
+    bars = rates_to_dataframe(mt5_rates(YEARS * M15_BARS_PER_YEAR, seconds=15 * 60), 5, 0)
+    grid = parameter_grid(fast=[3, 5, 8, 13, 21], slow=[21, 34, 55, 89], stop_atr=[0.25, 0.5, 1.0, 1.5, 2.0],
+                          op_goal=[10, 20, 30], op_stop=[5, 10])
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = vectorized_grid(bars, SimulatedSymbol("EURUSD", digits=5), grid)
+    seconds = time.perf_counter() - started
+    print(f"{len(grid)} backtests of {len(bars)} M15 bars ({YEARS} years) in {seconds:.1f} s --- "
+          f"{len(grid) / seconds:.1f} backtests/s --- {results['trades'].sum()} trades")
+    print(results.sort_values("profit", ascending=False).head(5).to_string(index=False))
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 from __future__ import annotations
 from broker_account import BrokerAccount
+from datetime import datetime, timedelta
+import pandas as pd
 from shared_data_structures import NewTradeDatabase, CanceledOrderDatabase
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from api import Position, TradeResult, Order
+    from pandas import DataFrame
 
 
 class BrokerAccountMT5(BrokerAccount):
@@ -12,29 +15,40 @@ class BrokerAccountMT5(BrokerAccount):
         return self._api.get_orders()
 
     def get_positions(self) -> List[Position]:
-        return self._api.get_positions()
+        return self._api.get_position_book().positions
 
-    def get_positions_by(self, magic: int) -> List[Position]:
-        return [position for position in self._api.get_positions() if position.magic == magic]
+    def get_positions_by(self, magic: int, timeframe: str or None = None) -> List[Position]:
+        book = self._api.get_position_book()
+        if timeframe is None:
+            return book.by_magic(magic)
+        return book.by_magic_timeframe(magic, timeframe)
 
     def get_trade(self, ticket: int) -> TradeResult:
         return self._api.get_trade_result(ticket)
 
+    def get_trades(self, date_from: datetime, date_to: datetime) -> Dict[int, TradeResult]:
+        return self._api.get_trade_results(date_from, date_to)
+
     def sync_db(self) -> None:
         self._sync_db_positions()
         self._sync_db_orders()
         return None
 
     def _sync_db_positions(self) -> None:
-        acc_positions = self.get_positions()
-        acc_tickets = [position.ticket for position in acc_positions]
+        acc_positions = self._api.get_position_book()
         db_positions = self._db.get_table("Positions")
-        db_tickets = db_positions["ticket"].to_list()
-        for ticket in db_tickets:
-            if ticket in acc_tickets:
+        closed_positions = db_positions[~db_positions["ticket"].isin([position.ticket for position in acc_positions])]
+        if closed_positions.empty:
+            return None
+        trade_results = self.get_trades(*self._history_window(closed_positions))
+        for db_ticket_row in closed_positions.to_dict(orient="records"):
+            ticket = db_ticket_row["ticket"]
+            trade_result = trade_results.get(ticket)
+            if trade_result is None or not trade_result.close_time:
+                # -- THE POSITION IS GONE BUT ITS CLOSING DEAL IS NOT IN THE HISTORY YET, IT IS SYNCED ON A NEXT CALL
+                # -- NO REQUEST PER TICKET, THE NEXT CALL READS IT FROM THE HISTORY WINDOW
+                print(f"BROKER ACCOUNT: No closing deal of ticket {ticket} yet --- Syncing it later")
                 continue
-            trade_result = self.get_trade(ticket)
-            db_ticket_row = db_positions[db_positions["ticket"] == ticket].to_dict(orient="records")[0]
             self._db.update(NewTradeDatabase(symbol=db_ticket_row["symbol"],
                                              timeframe=db_ticket_row["timeframe"],
                                              strategy=db_ticket_row["strategy"],
@@ -52,6 +66,12 @@ class BrokerAccountMT5(BrokerAccount):
                                              fee=trade_result.fee,
                                              magic=db_ticket_row["magic"],
                                              ticket=trade_result.ticket))
+        return None
+
+    def _history_window(self, positions: DataFrame) -> Tuple[datetime, datetime]:
+        """Time window with all the deals of the positions. One day of margin covers the timezone difference"""
+        open_times = pd.to_datetime(positions["open_time"])
+        return open_times.min().to_pydatetime() - timedelta(days=1), datetime.now() + timedelta(days=1)
 
     def _sync_db_orders(self) -> None:
         acc_orders = self.get_orders()
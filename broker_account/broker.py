@@ -1,9 +1,10 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from api import MarketDataAPI, Position, Order
+    from api import MarketDataAPI, Position, Order, TradeResult
+    from datetime import datetime
     from database import Database
 
 
@@ -18,13 +19,17 @@ class BrokerAccount(ABC):
         pass
 
     @abstractmethod
-    def get_positions_by(self, magic: int) -> List[Position]:
+    def get_positions_by(self, magic: int, timeframe: str or None = None) -> List[Position]:
         pass
 
     @abstractmethod
     def get_trade(self, ticket: int):
         pass
 
+    @abstractmethod
+    def get_trades(self, date_from: datetime, date_to: datetime) -> Dict[int, TradeResult]:
+        pass
+
     @abstractmethod
     def get_orders(self) -> List[Order]:
         pass
@@ -0,0 +1,51 @@
+from api import PositionBook, TradeResult
+from broker_account import BrokerAccountMT5
+from database import TradeDatabase
+from dataclasses import replace
+import pytest
+from shared_data_structures import NewPositionDatabase
+from symbols_info import SymbolsInfo
+
+CLOSED = TradeResult(open_time="2022-08-01 10:00:00", open_price=1.1, close_time="2022-08-01 11:00:00",
+                     close_price=1.2, ticket=1, commission=-0.5, fee=0.0, swap=0.0, profit=10.0)
+
+
+class DealsAPI:
+    """No open positions, the trade results of the deals already in the history"""
+    def __init__(self, results: dict) -> None:
+        self.results = results
+
+    def get_position_book(self) -> PositionBook:
+        return PositionBook([])
+
+    def get_orders(self) -> list:
+        return []
+
+    def get_trade_results(self, date_from, date_to) -> dict:
+        return dict(self.results)
+
+    def get_trade_result(self, ticket: int) -> TradeResult or None:
+        raise AssertionError(f"Round trip to the broker for the ticket {ticket}")
+
+
+@pytest.fixture
+def db(tmp_path) -> TradeDatabase:
+    db = TradeDatabase(str(tmp_path / "trades.db"), SymbolsInfo())
+    for ticket in (1, 2):
+        db.update(NewPositionDatabase(symbol="EURUSD", timeframe="M15", strategy="EMACrossover",
+                                      open_time="2022-08-01 10:00:00", open_price=1.1, volume=0.1,
+                                      position_type="buy", stop_loss=1.0, stop_gain=0.0, magic=99, ticket=ticket))
+    return db
+
+
+def test_closed_positions_without_a_closing_deal_are_synced_later(db: TradeDatabase) -> None:
+    api = DealsAPI({1: CLOSED})
+    account = BrokerAccountMT5(api, db)
+    account.sync_db()
+    assert list(db.get_table("Trades")["ticket"]) == [1]
+    assert list(db.get_table("Positions")["ticket"]) == [2]
+    # -- THE CLOSING DEAL OF THE TICKET 2 REACHES THE HISTORY
+    api.results[2] = replace(CLOSED, ticket=2)
+    account.sync_db()
+    assert sorted(db.get_table("Trades")["ticket"]) == [1, 2]
+    assert db.get_table("Positions").empty
@@ -1,2 +1,3 @@
+from database.bar_store import BarStore
 from database.database import Database
 from database.trade_database import TradeDatabase, Order, Position, Trade
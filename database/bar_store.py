@@ -0,0 +1,201 @@
+from __future__ import annotations
+from api.compact import CompactBars
+from bisect import bisect_left, bisect_right
+import json
+import numpy as np
+import os
+import pandas as pd
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from api import TimeFrames
+    from pandas import DataFrame
+
+# -- ONE .npy FILE PER COLUMN, WITH THE MT5 RATES FIELD NAMES
+COLUMNS = {
+    "time": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "tick_volume": np.int64,
+    "spread": np.int64,
+    "real_volume": np.int64,
+}
+
+DATAFRAME_COLUMNS = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "real_volume",
+    "Trades": "tick_volume",
+    "Spread": "spread",
+}
+
+
+class BarStore:
+    """
+    On-disk bars by (symbol, timeframe) in append-only column segments, read back as memory-mapped numpy arrays
+    Each (symbol, timeframe) folder has an index.json with the time range (MT5 server timestamps) of its segments
+    A range inside one segment is sliced into the dataframe without copying the columns
+    With compact_bars, the new (symbol, timeframe) folders keep the bars as CompactBars columns (integer ticks
+    and narrow volumes), with the digits in their index.json. Their dataframes are converted when read
+    """
+    def __init__(self, path: str, compact_bars: bool = False) -> None:
+        self.path = path
+        self.compact_bars = compact_bars
+        self._indexes: Dict[Tuple[str, TimeFrames], List[dict]] = {}
+        # -- DIGITS OF THE COMPACT FOLDERS, None FOR THE FLOAT ONES
+        self._digits: Dict[Tuple[str, TimeFrames], int or None] = {}
+        self._segments: Dict[Tuple[str, TimeFrames, str], Dict[str, np.ndarray]] = {}
+
+    def _folder(self, symbol: str, timeframe: TimeFrames) -> str:
+        return os.path.join(self.path, symbol, timeframe.value)
+
+    def _index(self, symbol: str, timeframe: TimeFrames) -> List[dict]:
+        key = (symbol, timeframe)
+        if key not in self._indexes:
+            index_path = os.path.join(self._folder(symbol, timeframe), "index.json")
+            if os.path.exists(index_path):
+                with open(index_path) as file:
+                    index = json.load(file)
+                self._indexes[key] = index["segments"]
+                self._digits[key] = index.get("digits")
+            else:
+                self._indexes[key] = []
+                self._digits[key] = None
+        return self._indexes[key]
+
+    def _write_index(self, symbol: str, timeframe: TimeFrames, segments: List[dict], digits: int or None) -> None:
+        index_path = os.path.join(self._folder(symbol, timeframe), "index.json")
+        index = {"segments": segments}
+        if digits is not None:
+            index["digits"] = digits
+        with open(f"{index_path}.tmp", "w") as file:
+            json.dump(index, file)
+        os.replace(f"{index_path}.tmp", index_path)
+        self._indexes[(symbol, timeframe)] = segments
+        self._digits[(symbol, timeframe)] = digits
+        return None
+
+    def ticks_digits(self, symbol: str, timeframe: TimeFrames) -> int or None:
+        """Digits of the ticks of a compact folder, None when its prices are floats"""
+        self._index(symbol, timeframe)
+        return self._digits[(symbol, timeframe)]
+
+    def _columns(self, symbol: str, timeframe: TimeFrames, segment: dict) -> Dict[str, np.ndarray]:
+        key = (symbol, timeframe, segment["name"])
+        if key not in self._segments:
+            folder = os.path.join(self._folder(symbol, timeframe), segment["name"])
+            self._segments[key] = {column: np.load(os.path.join(folder, f"{column}.npy"), mmap_mode="r")
+                                   for column in COLUMNS}
+        return self._segments[key]
+
+    def first_time(self, symbol: str, timeframe: TimeFrames) -> int or None:
+        segments = self._index(symbol, timeframe)
+        return segments[0]["start"] if segments else None
+
+    def last_time(self, symbol: str, timeframe: TimeFrames) -> int or None:
+        segments = self._index(symbol, timeframe)
+        return segments[-1]["end"] if segments else None
+
+    def append(self, symbol: str, timeframe: TimeFrames, rates: np.ndarray, digits: int) -> int:
+        """Save the closed bars newer than the last stored one as a new segment. Return the number of bars saved"""
+        last_time = self.last_time(symbol, timeframe)
+        if last_time is not None:
+            rates = rates[rates["time"] > last_time]
+        if len(rates) == 0:
+            return 0
+        segments = list(self._index(symbol, timeframe))
+        stored_digits = self._digits[(symbol, timeframe)] if segments else (digits if self.compact_bars else None)
+        if stored_digits is not None and stored_digits != digits:
+            raise ValueError(f"The bars of {symbol} {timeframe.value} are stored with {stored_digits} digits, "
+                             f"not {digits}")
+        name = f"{len(segments):06d}" if not segments else f"{int(segments[-1]['name']) + 1:06d}"
+        folder = os.path.join(self._folder(symbol, timeframe), name)
+        os.makedirs(folder, exist_ok=True)
+        if stored_digits is not None:
+            columns = CompactBars.from_rates(rates, digits).columns
+        else:
+            columns = {column: rates[column].astype(dtype) for column, dtype in COLUMNS.items()}
+            for column in ["open", "high", "low", "close"]:
+                np.round(columns[column], digits, out=columns[column])
+        for column in COLUMNS:
+            np.save(os.path.join(folder, f"{column}.npy"), columns[column])
+        segments.append({"name": name, "start": int(rates["time"][0]), "end": int(rates["time"][-1]),
+                         "rows": len(rates)})
+        self._write_index(symbol, timeframe, segments, stored_digits)
+        return len(rates)
+
+    def compact(self, symbol: str, timeframe: TimeFrames) -> None:
+        """Rewrite all the segments as a single one, so every range is read without copies"""
+        segments = self._index(symbol, timeframe)
+        if len(segments) < 2:
+            return None
+        columns = self.read_columns(symbol, timeframe, segments[0]["start"], segments[-1]["end"])
+        name = f"{int(segments[-1]['name']) + 1:06d}"
+        folder = os.path.join(self._folder(symbol, timeframe), name)
+        os.makedirs(folder, exist_ok=True)
+        for column in COLUMNS:
+            np.save(os.path.join(folder, f"{column}.npy"), columns[column])
+        self._write_index(symbol, timeframe, [{"name": name, "start": segments[0]["start"],
+                                               "end": segments[-1]["end"], "rows": len(columns["time"])}],
+                          self._digits[(symbol, timeframe)])
+        for segment in segments:
+            self._segments.pop((symbol, timeframe, segment["name"]), None)
+            old_folder = os.path.join(self._folder(symbol, timeframe), segment["name"])
+            for column in COLUMNS:
+                os.remove(os.path.join(old_folder, f"{column}.npy"))
+            os.rmdir(old_folder)
+        return None
+
+    def read_columns(self, symbol: str, timeframe: TimeFrames, start: int, end: int) -> Dict[str, np.ndarray]:
+        """
+        Columns of the bars between the server timestamps (both included)
+        Views of the memory-mapped files when the range is inside one segment
+        """
+        segments = self._index(symbol, timeframe)
+        first = bisect_left([segment["end"] for segment in segments], start)
+        last = bisect_right([segment["start"] for segment in segments], end)
+        parts = []
+        for segment in segments[first:last]:
+            columns = self._columns(symbol, timeframe, segment)
+            times = columns["time"]
+            i = int(np.searchsorted(times, start, side="left"))
+            j = int(np.searchsorted(times, end, side="right"))
+            if j > i:
+                parts.append({column: values[i:j] for column, values in columns.items()})
+        if len(parts) == 1:
+            return parts[0]
+        if len(parts) == 0:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+        return {column: np.concatenate([part[column] for part in parts]) for column in COLUMNS}
+
+    def read(self, symbol: str, timeframe: TimeFrames, start: int, end: int, digits: int,
+             delta_timezone: int) -> DataFrame or None:
+        """
+        Same dataframe returned by the MarketDataAPI, the prices were already rounded when saved
+        The columns may be read-only views of the files, copy the dataframe before changing its values
+        The dataframes of a compact folder are converted from the ticks, with the digits stored
+        """
+        columns = self.read_columns(symbol, timeframe, start, end)
+        count = len(columns["time"])
+        if count == 0:
+            return None
+        stored_digits = self.ticks_digits(symbol, timeframe)
+        if stored_digits is not None:
+            return CompactBars(stored_digits, columns).to_dataframe(delta_timezone)
+        index = pd.DatetimeIndex(((columns["time"] + delta_timezone * 3600) * 1_000_000_000).view("datetime64[ns]"),
+                                 name="Date")
+        data = {"_Digits": np.full(count, digits, dtype=np.int64)}
+        data.update({name: np.asarray(columns[column]) for name, column in DATAFRAME_COLUMNS.items()})
+        return pd.DataFrame(data, index=index, copy=False)
+
+    def read_compact(self, symbol: str, timeframe: TimeFrames, start: int, end: int, digits: int) -> CompactBars:
+        """CompactBars of the bars between the server timestamps, the float folders are compacted when read"""
+        columns = self.read_columns(symbol, timeframe, start, end)
+        stored_digits = self.ticks_digits(symbol, timeframe)
+        if stored_digits is not None:
+            return CompactBars(stored_digits, columns)
+        return CompactBars.from_rates(columns, digits)
@@ -1,24 +1,52 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 import pandas as pd
 import sqlite3
-from typing import TYPE_CHECKING
+from typing import Iterator, Sequence, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from sqlite3 import Cursor
 
 
 class Database(ABC):
+    # -- CONNECTION OF batch, THE QUERIES OUTSIDE OF IT OPEN AND COMMIT THEIR OWN
+    _connection: sqlite3.Connection or None = None
+
     def __init__(self, db_path: str) -> None:
         self.path = db_path
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """The queries inside run on one connection and are committed once at the end, instead of once each"""
+        if self._connection is not None:
+            yield None
+            return None
+        self._connection = sqlite3.connect(self.path)
+        try:
+            yield None
+            self._connection.commit()
+        finally:
+            self._connection.close()
+            self._connection = None
+        return None
+
     @abstractmethod
     def update(self, state) -> None:
         pass
 
-    def get_table(self, table_name: str) -> pd.DataFrame:
-        with sqlite3.connect(self.path) as db:
-            df = pd.read_sql_query(f"SELECT * FROM {table_name}", db)
+    def get_table(self, table_name: str, where: str or None = None, params: Sequence = ()) -> pd.DataFrame:
+        """Rows of the table, or only the ones matching where, with its ? placeholders bound to params"""
+        query = f"SELECT * FROM {table_name}" if where is None else f"SELECT * FROM {table_name} WHERE {where}"
+        # -- SAME DATAFRAME OF pd.read_sql_query, WITHOUT ITS DATE PARSING PASS OVER THE COLUMNS
+        if self._connection is not None:
+            cursor = self._connection.execute(query, params)
+        else:
+            with sqlite3.connect(self.path) as db:
+                cursor = db.execute(query, params)
+        rows = cursor.fetchall()
+        columns = [description[0] for description in cursor.description]
+        df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
         return df
 
     def print_table(self, table_name: str) -> None:
@@ -49,6 +77,9 @@ class Database(ABC):
         return None
 
     def _execute(self, query: str) -> None:
+        if self._connection is not None:
+            self._connection.execute(query)
+            return None
         with sqlite3.connect(self.path) as db:
             c: Cursor = db.cursor()
             c.execute(query)
@@ -0,0 +1,96 @@
+from api import TimeFrames
+from api.rates import rates_to_dataframe
+from api.simulated import mt5_rates
+from database import BarStore
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def store(tmp_path) -> BarStore:
+    return BarStore(str(tmp_path))
+
+
+def test_read_is_the_api_dataframe(store: BarStore) -> None:
+    rates = mt5_rates(500)
+    assert store.append("EURUSD", TimeFrames.M1, rates, 5) == 500
+    start, end = int(rates["time"][100]), int(rates["time"][199])
+    dataframe = store.read("EURUSD", TimeFrames.M1, start, end, 5, -6)
+    expected = rates_to_dataframe(rates[100:200], 5, -6)
+    pd.testing.assert_frame_equal(dataframe, expected)
+
+
+def test_read_inside_one_segment_does_not_copy(store: BarStore) -> None:
+    rates = mt5_rates(500)
+    store.append("EURUSD", TimeFrames.M1, rates, 5)
+    columns = store.read_columns("EURUSD", TimeFrames.M1, int(rates["time"][10]), int(rates["time"][20]))
+    dataframe = store.read("EURUSD", TimeFrames.M1, int(rates["time"][10]), int(rates["time"][20]), 5, 0)
+    assert np.shares_memory(dataframe["Close"].to_numpy(), columns["close"])
+
+
+def test_append_only_saves_newer_bars(store: BarStore) -> None:
+    rates = mt5_rates(300)
+    store.append("EURUSD", TimeFrames.M1, rates[:200], 5)
+    assert store.append("EURUSD", TimeFrames.M1, rates[150:], 5) == 100
+    assert store.append("EURUSD", TimeFrames.M1, rates[:200], 5) == 0
+    assert store.first_time("EURUSD", TimeFrames.M1) == rates["time"][0]
+    assert store.last_time("EURUSD", TimeFrames.M1) == rates["time"][-1]
+
+    columns = store.read_columns("EURUSD", TimeFrames.M1, int(rates["time"][190]), int(rates["time"][209]))
+    assert list(columns["time"]) == list(rates["time"][190:210])
+
+
+def test_index_is_persisted(store: BarStore) -> None:
+    rates = mt5_rates(300)
+    store.append("EURUSD", TimeFrames.M1, rates[:100], 5)
+    store.append("EURUSD", TimeFrames.M1, rates[100:], 5)
+    reopened = BarStore(store.path)
+    assert reopened.last_time("EURUSD", TimeFrames.M1) == rates["time"][-1]
+    assert reopened.first_time("EURUSD", TimeFrames.M5) is None
+    dataframe = reopened.read("EURUSD", TimeFrames.M1, 0, int(rates["time"][-1]), 5, 0)
+    assert len(dataframe) == 300
+
+
+def test_compact_keeps_the_bars(store: BarStore) -> None:
+    rates = mt5_rates(300)
+    for part in range(3):
+        store.append("EURUSD", TimeFrames.M1, rates[part * 100:(part + 1) * 100], 5)
+    before = store.read("EURUSD", TimeFrames.M1, 0, int(rates["time"][-1]), 5, 0)
+    store.compact("EURUSD", TimeFrames.M1)
+    after = store.read("EURUSD", TimeFrames.M1, 0, int(rates["time"][-1]), 5, 0)
+    pd.testing.assert_frame_equal(before, after)
+    assert len(BarStore(store.path)._index("EURUSD", TimeFrames.M1)) == 1
+
+
+def test_read_outside_the_stored_range(store: BarStore) -> None:
+    rates = mt5_rates(100)
+    store.append("EURUSD", TimeFrames.M1, rates, 5)
+    assert store.read("EURUSD", TimeFrames.M1, int(rates["time"][-1]) + 60, int(rates["time"][-1]) + 600, 5, 0) is None
+    assert store.read("GBPUSD", TimeFrames.M1, 0, int(rates["time"][-1]), 5, 0) is None
+
+
+def test_compact_bars_read_as_the_api_dataframe(tmp_path) -> None:
+    store = BarStore(str(tmp_path), compact_bars=True)
+    rates = mt5_rates(300)
+    store.append("EURUSD", TimeFrames.M1, rates[:200], 5)
+    store.append("EURUSD", TimeFrames.M1, rates[150:], 5)
+    assert store.ticks_digits("EURUSD", TimeFrames.M1) == 5
+    assert store.read_columns("EURUSD", TimeFrames.M1, 0, int(rates["time"][-1]))["close"].dtype == np.int32
+    dataframe = store.read("EURUSD", TimeFrames.M1, int(rates["time"][100]), int(rates["time"][249]), 5, -6)
+    pd.testing.assert_frame_equal(dataframe, rates_to_dataframe(rates[100:250], 5, -6))
+    store.compact("EURUSD", TimeFrames.M1)
+    reopened = BarStore(str(tmp_path))
+    assert reopened.ticks_digits("EURUSD", TimeFrames.M1) == 5
+    pd.testing.assert_frame_equal(reopened.read("EURUSD", TimeFrames.M1, 0, int(rates["time"][-1]), 5, 0),
+                                  rates_to_dataframe(rates, 5, 0))
+    with pytest.raises(ValueError):
+        store.append("EURUSD", TimeFrames.M1, mt5_rates(10, start=int(rates["time"][-1]) + 60), 3)
+
+
+def test_read_compact_of_float_bars(store: BarStore) -> None:
+    rates = mt5_rates(100)
+    store.append("EURUSD", TimeFrames.M1, rates, 5)
+    assert store.ticks_digits("EURUSD", TimeFrames.M1) is None
+    bars = store.read_compact("EURUSD", TimeFrames.M1, 0, int(rates["time"][-1]), 5)
+    pd.testing.assert_frame_equal(bars.to_dataframe(0), rates_to_dataframe(rates, 5, 0))
@@ -1,6 +1,8 @@
-from database import Database
+from database import Database, TradeDatabase
 import os
 import pytest
+import sqlite3
+from symbols_info import SymbolsInfo
 
 
 @pytest.fixture
@@ -40,3 +42,26 @@ def test_insert_into_table(db: Database):
     assert table["age"].iloc[2] == 44
     assert table["name"].iloc[3] == "Brenda"
     assert table["age"].iloc[3] == 21
+
+
+def test_batch_commits_once_at_the_end(tmp_path):
+    db = TradeDatabase(str(tmp_path / "trades.db"), SymbolsInfo())
+    db.create_table("Teste", "name TEXT NOT NULL, age INT NOT NULL")
+    with db.batch():
+        db.insert_into_table("Teste", "name, age", "'Rodrigo', 25")
+        db.insert_into_table("Teste", "name, age", "'Pedro', 24")
+        # -- THE QUERIES OF THE BATCH SEE ITS WRITES, THE OTHER CONNECTIONS DO NOT
+        assert len(db.get_table("Teste")) == 2
+        with sqlite3.connect(db.path) as other:
+            assert other.execute("SELECT COUNT(*) FROM Teste").fetchone()[0] == 0
+    assert list(db.get_table("Teste")["name"]) == ["Rodrigo", "Pedro"]
+
+
+def test_where_values_are_bound_as_parameters(tmp_path):
+    db = TradeDatabase(str(tmp_path / "trades.db"), SymbolsInfo())
+    db.create_table("Teste", "name TEXT NOT NULL, age INT NOT NULL")
+    db.insert_into_table("Teste", "name, age", "'Joao', 44")
+    db.insert_into_table("Teste", "name, age", "'Brenda', 21")
+    assert list(db.get_table("Teste", where="age >= ? AND age < ?", params=(40, 50))["name"]) == ["Joao"]
+    # -- A QUOTE IN THE VALUE IS PART OF THE VALUE, NOT OF THE QUERY
+    assert db.get_table("Teste", where="name = ?", params=("' OR '1' = '1",)).empty
@@ -1,4 +1,6 @@
 from indicators.atr import ATR
+from indicators.cache import IndicatorsCache
 from indicators.ema import EMA
 from indicators.ema_crossover import EMACrossover
+from indicators.indicator import Bar, Indicator, StreamingIndicator
 from indicators.manager import Manager
@@ -1,49 +1,100 @@
 from __future__ import annotations
-from indicators.indicator import Indicator
+from collections import deque
+from indicators.indicator import StreamingIndicator
 import numpy as np
-from typing import TYPE_CHECKING
+from typing import List, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from pandas import DataFrame
+    from pandas import DataFrame, Series
+    from shared_data_structures import BarFrame
 
 
-class ATR(Indicator):
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    TR[i] = max(High[i], Close[i - 1]) - min(Low[i], Close[i - 1])
+    The first bar has no previous close, its true range is High - Low. The bars are on the last axis
+    """
+    previous_close = np.empty_like(close)
+    previous_close[..., 0] = close[..., 0]
+    previous_close[..., 1:] = close[..., :-1]
+    return np.maximum(high, previous_close) - np.minimum(low, previous_close)
+
+
+def average_true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """
+    ATR[i] = mean(TR[i - period + 1], ..., TR[i]) for i >= period and 0 before it,
+    so the average only has true ranges with a previous close
+    The moving sums come from one cumulative sum of the centered true ranges, which keeps it exact on long series
+    The bars are on the last axis, 2D arrays (symbols x bars) are computed at once
+    """
+    count = close.shape[-1]
+    atr = np.zeros(close.shape, dtype=np.float64)
+    if count <= period:
+        return atr
+    tr = true_range(high, low, close)[..., 1:]
+    mean = tr.mean(axis=-1, keepdims=True)
+    sums = np.cumsum(tr - mean, axis=-1)
+    atr[..., period] = sums[..., period - 1] / period + mean[..., 0]
+    atr[..., period + 1:] = (sums[..., period:] - sums[..., :-period]) / period + mean
+    return atr
+
+
+class ATR(StreamingIndicator):
     def __init__(self, name: str, period: int) -> None:
-        Indicator.__init__(self, name)
+        StreamingIndicator.__init__(self, name)
         self.period = period
+        self.reset()
+
+    @property
+    def params(self) -> tuple:
+        return (self.period,)
 
-    def calculate(self, dataframe: DataFrame) -> DataFrame:
+    @property
+    def inputs(self) -> List[str]:
+        return ["High", "Low", "Close"]
+
+    @property
+    def batchable(self) -> bool:
+        return True
+
+    def warmup(self, tolerance: float) -> int:
+        """The average of period true ranges is exact, each one needs the previous close"""
+        return self.period + 1
+
+    def calculate(self, dataframe: DataFrame or BarFrame) -> DataFrame or BarFrame:
         return self._atr(dataframe)
 
-    def _atr(self, dataframe: DataFrame) -> DataFrame:
-        dataframe[self.name] = self._atr_values(dataframe, self.period)
+    def _atr(self, dataframe: DataFrame or BarFrame) -> DataFrame or BarFrame:
+        dataframe[self.name] = average_true_range(np.asarray(dataframe["High"], dtype=np.float64),
+                                                  np.asarray(dataframe["Low"], dtype=np.float64),
+                                                  np.asarray(dataframe["Close"], dtype=np.float64),
+                                                  self.period)
         return dataframe
 
-    def _average_true_range(self, data: DataFrame, period: int) -> list:
-        high = data["High"].to_list()
-        low = data["Low"].to_list()
-        close = data["Close"].to_list()
-        tr = data["TR"].to_list()
-        atr = data["TR"].rolling(period).mean().to_list()
-        atr_values = []
-        for i in range(len(data)):
-            if i < period:
-                atr_values.append(0)
-            elif i == period:
-                atr_values.append(atr[i])
-            else:
-                tr[i] = max(high[i], close[i - 1]) - min(low[i], close[i - 1])
-                atr_value = atr_values[i-1] + ((tr[i] - tr[i - period]) / period)
-                atr_values.append(atr_value)
-        return atr_values
-
-    def _atr_values(self, data: DataFrame, period: int) -> list:
-        df = data[['High', 'Low', 'Close']].copy()
-        df["Closeshift"] = df["Close"].shift(1)
-        df["Highshift"] = df["High"].shift(1)
-        df["Lowshift"] = df["Low"].shift(1)
-        df["TRmax"] = np.where(df["Close"] >= df["Highshift"], df["Close"], df["Highshift"])
-        df["TRmin"] = np.where(df["Close"] <= df["Lowshift"], df["Close"], df["Lowshift"])
-        df["TR"] = df["TRmax"] - df["TRmin"]
-        df["ATR"] = self._average_true_range(df, period)
-        return df["ATR"].to_list()
+    def _reset_state(self) -> None:
+        self._count = 0
+        self._previous_close = None
+        self._value = 0.0
+        # -- TRUE RANGES OF THE LAST period BARS, THE OLDEST ONE LEAVES THE AVERAGE ON THE NEXT BAR
+        self._true_ranges = deque(maxlen=self.period)
+        return None
+
+    def _step(self, bar: Series) -> Tuple[tuple, float]:
+        """Same values of average_true_range, with a running average after the first period"""
+        close = bar["Close"]
+        if self._count == 0:
+            return (None, close, 0.0), 0.0
+        true_range = max(bar["High"], self._previous_close) - min(bar["Low"], self._previous_close)
+        value = 0.0
+        if self._count == self.period:
+            value = (sum(self._true_ranges) + true_range) / self.period
+        elif self._count > self.period:
+            value = self._value + (true_range - self._true_ranges[0]) / self.period
+        return (true_range, close, value), value
+
+    def _commit(self, state: tuple) -> None:
+        true_range, self._previous_close, self._value = state
+        if true_range is not None:
+            self._true_ranges.append(true_range)
+        self._count += 1
+        return None
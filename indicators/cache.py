@@ -0,0 +1,134 @@
+from __future__ import annotations
+import copy
+from indicators.indicator import Bar
+import pandas as pd
+from shared_data_structures import BarFrame, LRUCache
+from typing import Any, Dict, FrozenSet, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from api import TimeFrames
+    from indicators import Manager
+    from pandas import DataFrame
+
+
+class IndicatorsCache:
+    """
+    Memoized compute_all of an indicators Manager. The last bar of the dataframes is the forming one
+    The closed bars are computed once per (symbol, timeframe, plan fingerprint, window) and kept in a bounded LRU,
+    the window is its first bar time, its length and its last closed bar time. The forming bar is streamed
+    (StreamingIndicator.update) on top of a copy of the plan per symbol and timeframe, so a new tick costs
+    O(indicators). The stream starts at the first bar of the dataframe, like compute_all, so the forming bar has
+    the values compute_all gives it
+    Works on pandas DataFrames and BarFrames, the result is of the same type of the input. The output
+    columns reserved in a BarFrame are not market data, they are not part of the forming bar
+    The dataframes returned are shared, copy them before changing their values
+    """
+    def __init__(self, manager: Manager, max_entries: int = 256) -> None:
+        self._manager = manager
+        self._results = LRUCache(max_entries)
+        # -- STREAM OF THE PLAN BY (symbol, timeframe, fingerprint), WITH THE TIME OF THE BAR IT STARTED AT
+        self._streams: Dict[tuple, Tuple[Any, Manager]] = {}
+        # -- LAST RESULT BY (symbol, timeframe), RETURNED AS IT IS WHILE THE FORMING BAR DOES NOT CHANGE
+        self._last: Dict[Tuple[str, TimeFrames], tuple] = {}
+        self._outputs: Tuple[tuple, FrozenSet[str]] = ((), frozenset())
+        self.hits = 0
+        self.misses = 0
+        self.forming_updates = 0
+
+    @property
+    def evictions(self) -> int:
+        return self._results.evictions
+
+    def clear(self) -> None:
+        self._results.clear()
+        self._streams.clear()
+        self._last.clear()
+        return None
+
+    def _market_columns(self, fingerprint: tuple, dataframe: DataFrame or BarFrame) -> List[str]:
+        """Columns of the dataframe not written by the indicators"""
+        if self._outputs[0] != fingerprint:
+            self._outputs = (fingerprint, frozenset(self._manager.outputs))
+        return [column for column in dataframe.columns if column not in self._outputs[1]]
+
+    def compute_all(self, symbol: str, timeframe: TimeFrames,
+                    dataframe: DataFrame or BarFrame) -> DataFrame or BarFrame:
+        return self.compute_batch(timeframe, {symbol: dataframe})[symbol]
+
+    def compute_batch(self, timeframe: TimeFrames,
+                      frames: Dict[str, DataFrame or BarFrame]) -> Dict[str, DataFrame or BarFrame]:
+        """compute_all of the dataframes of many symbols, the ones missing are computed in one Manager.compute_batch"""
+        fingerprint = self._manager.fingerprint
+        # -- WITHOUT A STREAMING MODE, A NEW FORMING BAR IS COMPUTED AGAIN WITH ITS CLOSED BARS
+        streamable = self._manager.streamable
+        results, missing = {}, {}
+        for symbol, dataframe in frames.items():
+            if len(dataframe) < 2:
+                self.misses += 1
+                results[symbol] = self._manager.compute_all(dataframe.copy())
+                continue
+            # -- THE VALUES DEPEND ON THE FIRST BAR OF THE WINDOW TOO (THE EMA'S START THERE)
+            key = (symbol, timeframe, fingerprint, dataframe.index[0], len(dataframe), dataframe.index[-2])
+            columns = self._market_columns(fingerprint, dataframe)
+            forming = (dataframe.index[-1],) + tuple(dataframe[column].iat[-1] for column in columns)
+
+            last = self._last.get((symbol, timeframe))
+            if last is not None and last[0] == key and last[1] == forming:
+                self.hits += 1
+                results[symbol] = last[2]
+                continue
+
+            # -- THE LRU KEEPS THE WHOLE RESULT, ITS CLOSED BARS ARE REUSED AND ITS FORMING BAR IS REPLACED
+            computed = self._results.get(key)
+            if computed is None or computed.index[-1] != forming[0] or not streamable:
+                self.misses += 1
+                missing[symbol] = (key, forming, dataframe.copy())
+                continue
+            self.hits += 1
+            self.forming_updates += 1
+            bar = self._stream(symbol, timeframe, fingerprint, dataframe, columns, forming)
+            values_by_column = {}
+            for column in computed.columns:
+                values = computed[column].to_numpy().copy()
+                values[-1] = bar[column]
+                values_by_column[column] = values
+            if isinstance(computed, BarFrame):
+                result = BarFrame(computed.index, values_by_column)
+            else:
+                result = pd.DataFrame(values_by_column, index=computed.index, copy=False)
+            self._last[(symbol, timeframe)] = (key, forming, result)
+            results[symbol] = result
+
+        if missing:
+            computed = self._manager.compute_batch({symbol: dataframe for symbol, (_, _, dataframe) in missing.items()})
+            for symbol, (key, forming, _) in missing.items():
+                self._results.put(key, computed[symbol])
+                self._last[(symbol, timeframe)] = (key, forming, computed[symbol])
+                results[symbol] = computed[symbol]
+        return {symbol: results[symbol] for symbol in frames}
+
+    def _stream(self, symbol: str, timeframe: TimeFrames, fingerprint: tuple, dataframe: DataFrame or BarFrame,
+                columns: List[str], forming: tuple) -> Bar:
+        """
+        Indicators of the forming bar from the streaming state of the symbol and timeframe
+        Only the bars from the last one streamed on are updated. All the bars are streamed again when the
+        dataframe starts at another bar (a new bar closed), the recursive indicators depend on the first bar
+        """
+        started, stream = self._streams.get((symbol, timeframe, fingerprint), (None, None))
+        if stream is None or started != dataframe.index[0]:
+            if stream is None:
+                stream = copy.deepcopy(self._manager)
+            self._streams[(symbol, timeframe, fingerprint)] = (dataframe.index[0], stream)
+            stream.reset()
+        start = len(dataframe)
+        if stream.last_time is not None:
+            start = int(dataframe.index.searchsorted(stream.last_time))
+        if start >= len(dataframe) or dataframe.index[start] != stream.last_time:
+            stream.reset()
+            start = 0
+        if start < len(dataframe) - 1:
+            values_by_column = {column: dataframe[column].to_numpy() for column in columns}
+            for i in range(start, len(dataframe) - 1):
+                stream.update(Bar(dataframe.index[i],
+                                  {column: values[i] for column, values in values_by_column.items()}))
+        return stream.update(Bar(forming[0], zip(columns, forming[1:])))
@@ -1,20 +1,105 @@
 from __future__ import annotations
-from indicators.indicator import Indicator
-from typing import TYPE_CHECKING
+from indicators.indicator import StreamingIndicator
+import math
+import numpy as np
+from typing import List, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from pandas import DataFrame
+    from pandas import DataFrame, Series
+    from shared_data_structures import BarFrame
 
+# -- LARGEST DECAY FACTOR (decay ** -i) INSIDE A CHUNK, FAR FROM THE FLOAT64 OVERFLOW
+MAX_CHUNK_SCALE = 1e150
 
-class EMA(Indicator):
+
+def exponential_moving_average(values: np.ndarray, span: int or np.ndarray, min_periods: int = 0,
+                               max_chunk: int or None = None) -> np.ndarray:
+    """
+    Same values of Series.ewm(span=span, min_periods=min_periods).mean() (adjust=True, no missing values),
+    along the last axis, so 2D values (rows x bars) are computed at once. span is one for all the rows
+    or one per row (greater than 1)
+    EMA[t] = sum(decay ** i * values[t - i]) / sum(decay ** i), both sums as cumulative sums of
+    values * decay ** -i per chunk of at most max_chunk bars, carrying the sums of the previous chunk
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count = values.shape[-1]
+    ema = np.empty(values.shape, dtype=np.float64)
+    decay = (1 - 2 / (np.asarray(span, dtype=np.float64) + 1))[..., np.newaxis]
+    if decay.size == 1 and decay.item() <= 0:
+        ema[...] = values
+        ema[..., :max(min_periods, 1) - 1] = np.nan
+        return ema
+    if np.any(decay <= 0):
+        raise ValueError(f"The spans of each row must be greater than 1, not {span}")
+    chunk = max(1, min(count, int(np.log(MAX_CHUNK_SCALE) / -np.log(decay.min())), max_chunk or count))
+    numerator = np.zeros(values.shape[:-1] + (1,))
+    denominator = np.zeros(decay.shape)
+    for start in range(0, count, chunk):
+        end = min(start + chunk, count)
+        exponents = np.arange(end - start, dtype=np.float64)
+        weights = decay ** exponents
+        carried = decay * weights
+        scale = 1 / weights
+        numerators = weights * np.cumsum(values[..., start:end] * scale, axis=-1) + carried * numerator
+        denominators = weights * np.cumsum(scale, axis=-1) + carried * denominator
+        ema[..., start:end] = numerators / denominators
+        numerator, denominator = numerators[..., -1:], denominators[..., -1:]
+    ema[..., :max(min_periods, 1) - 1] = np.nan
+    return ema
+
+
+class EMA(StreamingIndicator):
     def __init__(self, name: str, period: int) -> None:
-        Indicator.__init__(self, name)
+        StreamingIndicator.__init__(self, name)
         self.period = period
+        self.reset()
+
+    @property
+    def params(self) -> tuple:
+        return (self.period,)
+
+    @property
+    def inputs(self) -> List[str]:
+        return ["Close"]
 
-    def calculate(self, dataframe: DataFrame) -> DataFrame:
+    @property
+    def batchable(self) -> bool:
+        return True
+
+    def warmup(self, tolerance: float) -> int:
+        """The bars left out of the average weigh decay ** bars of the whole history"""
+        decay = 1 - 2 / (self.period + 1)
+        if decay <= 0:
+            return self.period
+        return max(self.period, math.ceil(math.log(tolerance) / math.log(decay)))
+
+    def calculate(self, dataframe: DataFrame or BarFrame) -> DataFrame or BarFrame:
         return self._ema(dataframe)
 
-    def _ema(self, dataframe: DataFrame) -> DataFrame:
-        dataframe[self.name] = dataframe["Close"].ewm(span=self.period, min_periods=self.period).mean()
-        dataframe = dataframe.fillna(method="bfill")
+    def _ema(self, dataframe: DataFrame or BarFrame) -> DataFrame or BarFrame:
+        """The bars before the period are back filled with the first value"""
+        ema = exponential_moving_average(np.asarray(dataframe["Close"]), self.period, self.period)
+        if ema.shape[-1] >= self.period:
+            ema[..., :self.period - 1] = ema[..., self.period - 1:self.period]
+        dataframe[self.name] = ema
         return dataframe
+
+    def _reset_state(self) -> None:
+        # -- SAME WEIGHTS OF ewm(adjust=True): SUM OF THE DECAYED CLOSES AND SUM OF THE DECAYED WEIGHTS
+        self._numerator = 0.0
+        self._denominator = 0.0
+        self._count = 0
+        return None
+
+    def _step(self, bar: Series) -> Tuple[Tuple[float, float, int], float]:
+        """Before the period there is no value, the batch calculate back fills these bars"""
+        decay = 1 - 2 / (self.period + 1)
+        numerator = bar["Close"] + decay * self._numerator
+        denominator = 1 + decay * self._denominator
+        count = self._count + 1
+        value = numerator / denominator if count >= self.period else np.nan
+        return (numerator, denominator, count), value
+
+    def _commit(self, state: Tuple[float, float, int]) -> None:
+        self._numerator, self._denominator, self._count = state
+        return None
@@ -1,39 +1,81 @@
 from __future__ import annotations
+from indicators.ema import EMA
+from indicators.indicator import Indicator, StreamingIndicator
 import numpy as np
-from indicators.indicator import Indicator
-from typing import TYPE_CHECKING
+from typing import List, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from pandas import DataFrame
+    from pandas import DataFrame, Series
+    from shared_data_structures import BarFrame
 
 
-class EMACrossover(Indicator):
+class EMACrossover(StreamingIndicator):
     def __init__(self, name: str, fast_period: int, slow_period: int) -> None:
-        Indicator.__init__(self, name)
+        StreamingIndicator.__init__(self, name)
         self.fast = fast_period
         self.slow = slow_period
+        self.reset()
 
-    def calculate(self, dataframe: DataFrame) -> DataFrame:
+    @property
+    def params(self) -> tuple:
+        return self.fast, self.slow
+
+    @property
+    def inputs(self) -> List[str]:
+        return [f"EMA{self.fast}", f"EMA{self.slow}"]
+
+    @property
+    def batchable(self) -> bool:
+        return True
+
+    def warmup(self, tolerance: float) -> int:
+        """The crossover compares the EMA's of the bar and of the previous one"""
+        return 2
+
+    def dependencies(self) -> List[Indicator]:
+        return [EMA(f"EMA{self.fast}", self.fast), EMA(f"EMA{self.slow}", self.slow)]
+
+    def calculate(self, dataframe: DataFrame or BarFrame) -> DataFrame or BarFrame:
         return self._ema_crossover(dataframe)
 
-    def _ema_crossover(self, dataframe: DataFrame) -> DataFrame:
+    def _ema_crossover(self, dataframe: DataFrame or BarFrame) -> DataFrame or BarFrame:
         try:
-            dataframe[f"EMA{self.fast}_Shift"] = dataframe[f"EMA{self.fast}"].shift()
-            dataframe[f"EMA{self.slow}_Shift"] = dataframe[f"EMA{self.slow}"].shift()
+            fast = np.asarray(dataframe[f"EMA{self.fast}"], dtype=np.float64)
+            slow = np.asarray(dataframe[f"EMA{self.slow}"], dtype=np.float64)
         except KeyError:
             print("Indicator not in dataframe, first compute the Fast and Slow EMA's")
             raise KeyError
+        # -- VALUES OF THE PREVIOUS BAR (LAST AXIS), THE FIRST BAR HAS NONE
+        fast_shift = np.full_like(fast, np.nan)
+        fast_shift[..., 1:] = fast[..., :-1]
+        slow_shift = np.full_like(slow, np.nan)
+        slow_shift[..., 1:] = slow[..., :-1]
 
-        condition1_up = dataframe[f"EMA{self.fast}"].to_numpy() > dataframe[f"EMA{self.slow}"].to_numpy()
-        condition2_up = dataframe[f"EMA{self.fast}_Shift"].to_numpy() < dataframe[f"EMA{self.slow}_Shift"].to_numpy()
-        cross_up = np.logical_and(condition1_up, condition2_up)
-
-        condition1_down = dataframe[f"EMA{self.fast}"].to_numpy() < dataframe[f"EMA{self.slow}"].to_numpy()
-        condition2_down = dataframe[f"EMA{self.fast}_Shift"].to_numpy() > dataframe[f"EMA{self.slow}_Shift"].to_numpy()
-        cross_down = np.logical_and(condition1_down, condition2_down)
+        cross_up = np.logical_and(fast > slow, fast_shift < slow_shift)
+        cross_down = np.logical_and(fast < slow, fast_shift > slow_shift)
 
         dataframe[self.name] = np.where(cross_up, 1, np.where(cross_down, -1, 0))
-
-        del dataframe[f"EMA{self.fast}_Shift"]
-        del dataframe[f"EMA{self.slow}_Shift"]
         return dataframe
+
+    def _reset_state(self) -> None:
+        self._previous_fast = np.nan
+        self._previous_slow = np.nan
+        return None
+
+    def _step(self, bar: Series) -> Tuple[Tuple[float, float], int]:
+        """The bar needs the Fast and Slow EMA's, update them first"""
+        try:
+            fast, slow = bar[f"EMA{self.fast}"], bar[f"EMA{self.slow}"]
+        except KeyError:
+            print("Indicator not in bar, first update the Fast and Slow EMA's")
+            raise KeyError
+        value = 0
+        if fast > slow and self._previous_fast < self._previous_slow:
+            value = 1
+        elif fast < slow and self._previous_fast > self._previous_slow:
+            value = -1
+        return (fast, slow), value
+
+    def _commit(self, state: Tuple[float, float]) -> None:
+        self._previous_fast, self._previous_slow = state
+        return None
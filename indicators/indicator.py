@@ -1,16 +1,105 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import Any, List, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from pandas import DataFrame
+    from pandas import DataFrame, Series
+    from shared_data_structures import BarFrame
+
+
+class Bar(dict):
+    """Values of one bar by column, named by its time like a dataframe row"""
+    def __init__(self, name: Any, values: Any) -> None:
+        dict.__init__(self, values)
+        self.name = name
 
 
 class Indicator(ABC):
-    """Calculate an indicator on a pandas DataFrame"""
+    """Calculate an indicator on a pandas DataFrame or a BarFrame (the columns are read as numpy arrays)"""
     def __init__(self, name: str) -> None:
         self.name = name
 
     @abstractmethod
-    def calculate(self, dataframe: DataFrame) -> DataFrame:
+    def calculate(self, dataframe: DataFrame or BarFrame) -> DataFrame or BarFrame:
+        pass
+
+    @property
+    def params(self) -> tuple:
+        """Parameters that change the values, two indicators of the same class and params are the same"""
+        return ()
+
+    @property
+    def key(self) -> tuple:
+        return (type(self).__name__,) + self.params
+
+    @property
+    def inputs(self) -> List[str]:
+        """Columns read by calculate"""
+        return []
+
+    @property
+    def outputs(self) -> List[str]:
+        """Columns written by calculate"""
+        return [self.name]
+
+    @property
+    def batchable(self) -> bool:
+        """calculate also works on 2D columns (symbols x bars), along the last axis"""
+        return False
+
+    def warmup(self, tolerance: float) -> int:
+        """
+        Bars read back by the value of one bar, with the inputs already converged, so its error is below
+        tolerance (relative to the range of the inputs). The indicators with a longer memory override it
+        """
+        return 1
+
+    def dependencies(self) -> List[Indicator]:
+        """Indicators that write the inputs not in the market data"""
+        return []
+
+    def reset(self) -> None:
+        """Forget the bars already streamed, nothing to forget without a streaming mode"""
+        return None
+
+
+class StreamingIndicator(Indicator):
+    """
+    Indicator with a streaming mode (update) too. It keeps the recursive state, so each new bar costs O(1)
+    """
+    def __init__(self, name: str) -> None:
+        Indicator.__init__(self, name)
+        self._time = None
+        self._pending = None
+
+    def reset(self) -> None:
+        self._time = None
+        self._pending = None
+        self._reset_state()
+        return None
+
+    def update(self, bar: Series or Bar) -> float:
+        """
+        Value of the indicator on the bar (a dataframe row or a Bar, named by its time)
+        A bar with the time of the last one is the same forming bar, its previous update is replaced
+        """
+        if self._time is None or bar.name != self._time:
+            if self._pending is not None:
+                self._commit(self._pending)
+            self._time = bar.name
+        self._pending, value = self._step(bar)
+        return value
+
+    @abstractmethod
+    def _reset_state(self) -> None:
+        pass
+
+    @abstractmethod
+    def _step(self, bar: Series) -> Tuple[Any, float]:
+        """State after the bar and the indicator value, without changing the state of the previous bars"""
+        pass
+
+    @abstractmethod
+    def _commit(self, state: Any) -> None:
+        """Keep the state of a bar that is closed"""
         pass
@@ -1,22 +1,197 @@
 from __future__ import annotations
-from typing import List, TYPE_CHECKING
+from collections import defaultdict
+from indicators.indicator import Bar, StreamingIndicator
+import numpy as np
+from shared_data_structures import BarFrame
+from typing import Dict, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from indicators import Indicator
-    from pandas import DataFrame
+    from pandas import DataFrame, Series
+
+# -- ERROR OF THE LAST BAR, RELATIVE TO THE RANGE OF THE INPUTS, ACCEPTED FROM THE BARS LEFT OUT
+WARMUP_TOLERANCE = 1e-3
 
 
 class Manager:
+    """
+    Graph of the indicators. The indicators are computed after the ones writing their inputs,
+    and the same indicator (class and params) is computed once even if it was added with other names
+    The plan (order of computation) is built once and kept until the indicators change
+    """
     def __init__(self) -> None:
         self._indicators: List[Indicator] = []
+        self._by_key: Dict[tuple, Indicator] = {}
+        self._by_name: Dict[str, Indicator] = {}
+        # -- OTHER NAMES OF THE INDICATORS ALREADY ADDED, THEIR COLUMNS ARE COPIES
+        self._aliases: Dict[str, List[str]] = defaultdict(list)
+        self._plan: List[Indicator] or None = None
+        self._fingerprint: tuple or None = None
+        self.last_time = None
+
+    @property
+    def indicators(self) -> List[Indicator]:
+        return list(self._indicators)
+
+    @property
+    def plan(self) -> List[Indicator]:
+        if self._plan is None:
+            self._build_plan()
+        return self._plan
+
+    @property
+    def fingerprint(self) -> tuple:
+        """Identity of the plan, two plans with the same fingerprint write the same columns"""
+        if self._plan is None:
+            self._build_plan()
+        return self._fingerprint
+
+    @property
+    def outputs(self) -> List[str]:
+        """Columns written by compute_all, to reserve them in a BarFrame"""
+        return [column for indicator in self.plan for column in indicator.outputs + self._aliases[indicator.name]]
+
+    @property
+    def streamable(self) -> bool:
+        """Every indicator of the plan has a streaming mode, so update works"""
+        return all(isinstance(indicator, StreamingIndicator) for indicator in self.plan)
+
+    @property
+    def market_inputs(self) -> List[str]:
+        """Columns read by the indicators and not written by any of them"""
+        outputs = set(self.outputs)
+        inputs = [column for indicator in self.plan for column in indicator.inputs if column not in outputs]
+        return list(dict.fromkeys(inputs))
+
+    def required_bars(self, tolerance: float = WARMUP_TOLERANCE) -> int:
+        """
+        Bars needed for the indicators of the last bar to converge within tolerance
+        The warmups add up along the inputs: an indicator reads back its warmup on converged inputs
+        """
+        providers = {column: indicator for indicator in self.plan
+                     for column in indicator.outputs + self._aliases[indicator.name]}
+        required: Dict[tuple, int] = {}
+        for indicator in self.plan:
+            inputs = [required[providers[column].key] for column in indicator.inputs if column in providers]
+            required[indicator.key] = indicator.warmup(tolerance) + max(inputs, default=1) - 1
+        return max(required.values(), default=1)
 
     def add(self, indicator: Indicator) -> None:
-        return self._indicators.append(indicator)
+        """Add the indicator and the indicators it depends on, the ones already added are reused"""
+        for dependency in indicator.dependencies():
+            self.add(dependency)
+        existing = self._by_key.get(indicator.key)
+        if existing is not None:
+            if indicator.name != existing.name and indicator.name not in self._aliases[existing.name]:
+                self._check_name(indicator)
+                self._aliases[existing.name].append(indicator.name)
+                self._by_name[indicator.name] = existing
+                self._plan = None
+            return None
+        self._check_name(indicator)
+        self._indicators.append(indicator)
+        self._by_key[indicator.key] = indicator
+        self._by_name[indicator.name] = indicator
+        self._plan = None
+        return None
+
+    def _check_name(self, indicator: Indicator) -> None:
+        if indicator.name in self._by_name:
+            raise ValueError(f"{indicator.name} is already the name of {self._by_name[indicator.name].key}, "
+                             f"it can not be {indicator.key}")
+        return None
 
     def clear(self) -> None:
         self._indicators.clear()
+        self._by_key.clear()
+        self._by_name.clear()
+        self._aliases.clear()
+        self._plan = None
+        self.last_time = None
 
-    def compute_all(self, dataframe: DataFrame) -> DataFrame:
+    def _build_plan(self) -> None:
+        """Depth first topological order, the indicators without dependencies keep the order they were added"""
+        providers = {}
         for indicator in self._indicators:
+            for column in indicator.outputs + self._aliases[indicator.name]:
+                providers[column] = indicator
+        plan, visiting, done = [], set(), set()
+
+        def visit(indicator: Indicator) -> None:
+            if indicator.key in done:
+                return None
+            if indicator.key in visiting:
+                raise ValueError(f"The inputs of {indicator.name} depend on its own outputs")
+            visiting.add(indicator.key)
+            for column in indicator.inputs:
+                if column in providers:
+                    visit(providers[column])
+            visiting.discard(indicator.key)
+            done.add(indicator.key)
+            plan.append(indicator)
+            return None
+
+        for indicator in self._indicators:
+            visit(indicator)
+        self._plan = plan
+        self._fingerprint = tuple((indicator.key, indicator.name, tuple(self._aliases[indicator.name]))
+                                  for indicator in plan)
+        return None
+
+    def compute_all(self, dataframe: DataFrame or BarFrame) -> DataFrame or BarFrame:
+        for indicator in self.plan:
+            missing = [column for column in indicator.inputs if column not in dataframe]
+            if missing:
+                raise KeyError(f"{indicator.name} needs the columns {missing}, add the indicators that write them")
             dataframe = indicator.calculate(dataframe)
+            for alias in self._aliases[indicator.name]:
+                dataframe[alias] = dataframe[indicator.name]
         return dataframe
+
+    def compute_batch(self, frames: Dict[str, DataFrame or BarFrame]) -> Dict[str, DataFrame or BarFrame]:
+        """
+        compute_all of the dataframes of many symbols (same timeframe) in one pass per indicator
+        The input columns of the dataframes with the same number of bars are stacked as 2D arrays
+        (symbols x bars), each indicator is computed once on them and its rows are written back in each
+        dataframe. When an indicator of the plan is not batchable, each dataframe is computed on its own
+        """
+        if not all(indicator.batchable for indicator in self.plan):
+            return {symbol: self.compute_all(frame) for symbol, frame in frames.items()}
+        groups: Dict[int, List[str]] = defaultdict(list)
+        for symbol, frame in frames.items():
+            groups[len(frame)].append(symbol)
+        outputs = self.outputs
+        results = {}
+        for count, symbols in groups.items():
+            if len(symbols) == 1:
+                results[symbols[0]] = self.compute_all(frames[symbols[0]])
+                continue
+            columns = {column: np.stack([np.asarray(frames[symbol][column], dtype=np.float64) for symbol in symbols])
+                       for column in self.market_inputs if all(column in frames[symbol] for symbol in symbols)}
+            batch = self.compute_all(BarFrame(np.arange(count), columns))
+            for row, symbol in enumerate(symbols):
+                frame = frames[symbol]
+                for column in outputs:
+                    frame[column] = batch[column].to_numpy()[row]
+                results[symbol] = frame
+        return {symbol: results[symbol] for symbol in frames}
+
+    def reset(self) -> None:
+        """Forget the bars streamed by every indicator"""
+        for indicator in self._indicators:
+            indicator.reset()
+        self.last_time = None
+        return None
+
+    def update(self, bar: Series or Bar) -> Bar:
+        """Stream one bar through the indicators, in the same order of compute_all"""
+        if not self.streamable:
+            names = [indicator.name for indicator in self.plan if not isinstance(indicator, StreamingIndicator)]
+            raise ValueError(f"{names} have no streaming mode, compute them with compute_all")
+        bar = Bar(bar.name, bar)
+        for indicator in self.plan:
+            bar[indicator.name] = indicator.update(bar)
+            for alias in self._aliases[indicator.name]:
+                bar[alias] = bar[indicator.name]
+        self.last_time = bar.name
+        return bar
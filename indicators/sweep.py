@@ -0,0 +1,75 @@
+from __future__ import annotations
+from indicators.atr import true_range
+from indicators.ema import exponential_moving_average
+import numpy as np
+from typing import Iterator, Sequence, Tuple
+
+# -- LARGEST TEMPORARY ARRAYS OF A SWEEP
+MAX_BYTES = 64 * 2 ** 20
+
+
+def ema_sweep(close: np.ndarray, spans: Sequence[int], max_bytes: int = MAX_BYTES) -> np.ndarray:
+    """
+    EMA of the closes for each span as a (bars x spans) array, same values of indicators.EMA
+    All the spans are computed at once, in chunks of bars that keep the temporary arrays under max_bytes
+    """
+    close = np.asarray(close, dtype=np.float64)
+    spans = np.asarray(spans, dtype=np.int64)
+    count = len(close)
+    # -- ABOUT 4 TEMPORARY (spans x chunk) ARRAYS PER CHUNK
+    max_chunk = max(1, max_bytes // (4 * 8 * len(spans)))
+    ema = exponential_moving_average(np.broadcast_to(close, (len(spans), count)), spans, max_chunk=max_chunk)
+    # -- THE BARS BEFORE EACH SPAN ARE BACK FILLED WITH ITS FIRST VALUE, LIKE indicators.EMA
+    for row, span in enumerate(spans):
+        if count >= span:
+            ema[row, :span - 1] = ema[row, span - 1]
+        else:
+            ema[row] = np.nan
+    return ema.T
+
+
+def atr_sweep(high: np.ndarray, low: np.ndarray, close: np.ndarray, periods: Sequence[int]) -> np.ndarray:
+    """
+    ATR for each period as a (bars x periods) array, same values of indicators.ATR
+    The true ranges and their cumulative sum are computed once for all the periods
+    """
+    high, low, close = (np.asarray(values, dtype=np.float64) for values in (high, low, close))
+    count = len(close)
+    atr = np.zeros((count, len(periods)), dtype=np.float64)
+    if count < 2:
+        return atr
+    tr = true_range(high, low, close)[1:]
+    mean = tr.mean()
+    sums = np.cumsum(tr - mean)
+    for column, period in enumerate(periods):
+        if count <= period:
+            continue
+        atr[period, column] = sums[period - 1] / period + mean
+        atr[period + 1:, column] = (sums[period:] - sums[:-period]) / period + mean
+    return atr
+
+
+def crossover_sweep(close: np.ndarray, fast_spans: Sequence[int], slow_spans: Sequence[int],
+                    max_bytes: int = MAX_BYTES) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Crossovers of every (fast, slow) pair with fast < slow, same values of indicators.EMACrossover
+    Yields the pairs (n x 2) and their crossovers (bars x n, int8: 1 up, -1 down, 0 none) in chunks of pairs
+    that keep each chunk under max_bytes. The EMA of each span is computed once
+    """
+    spans = np.unique(np.concatenate([np.asarray(fast_spans), np.asarray(slow_spans)]))
+    ema = ema_sweep(close, spans, max_bytes)
+    position = {span: column for column, span in enumerate(spans)}
+    pairs = np.array([(fast, slow) for fast in fast_spans for slow in slow_spans if fast < slow],
+                     dtype=np.int64).reshape(-1, 2)
+    # -- THE DIFFERENCES (float64) AND THE CROSSOVERS (int8) OF A CHUNK
+    chunk = max(1, max_bytes // (9 * max(len(ema), 1)))
+    for start in range(0, len(pairs), chunk):
+        chunk_pairs = pairs[start:start + chunk]
+        fast = [position[span] for span in chunk_pairs[:, 0]]
+        slow = [position[span] for span in chunk_pairs[:, 1]]
+        difference = ema[:, fast] - ema[:, slow]
+        crossovers = np.zeros(difference.shape, dtype=np.int8)
+        crossovers[1:][(difference[1:] > 0) & (difference[:-1] < 0)] = 1
+        crossovers[1:][(difference[1:] < 0) & (difference[:-1] > 0)] = -1
+        yield chunk_pairs, crossovers
+    return None
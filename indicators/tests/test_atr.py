@@ -0,0 +1,44 @@
+from .mock_data import btc_dataframe
+from api.simulated import random_dataframe
+import indicators
+from indicators.atr import average_true_range, true_range
+import numpy as np
+from pandas import DataFrame
+import pytest
+
+
+def reference_atr(dataframe: DataFrame, period: int) -> list:
+    high, low, close = dataframe["High"].to_list(), dataframe["Low"].to_list(), dataframe["Close"].to_list()
+    tr = [high[0] - low[0]] + [max(high[i], close[i - 1]) - min(low[i], close[i - 1]) for i in range(1, len(close))]
+    return [sum(tr[i - period + 1:i + 1]) / period if i >= period else 0 for i in range(len(close))]
+
+
+def test_true_range() -> None:
+    high = np.array([10.0, 12.0, 11.0])
+    low = np.array([9.0, 11.0, 8.0])
+    close = np.array([9.5, 11.5, 10.0])
+    np.testing.assert_array_equal(true_range(high, low, close), [1.0, 2.5, 3.5])
+
+
+@pytest.mark.parametrize("period", [1, 5, 14, 20])
+def test_average_true_range(period: int) -> None:
+    dataframe = random_dataframe(500, seed=period)
+    atr = indicators.ATR("ATR", period).calculate(dataframe.copy())["ATR"].to_numpy()
+    np.testing.assert_allclose(atr, reference_atr(dataframe, period), rtol=1e-10, atol=1e-15)
+
+
+def test_short_dataframe() -> None:
+    dataframe = btc_dataframe()
+    atr = indicators.ATR("ATR20", 20).calculate(dataframe.copy())["ATR20"]
+    assert (atr == 0).all()
+    high, low, close = (dataframe[column].to_numpy() for column in ["High", "Low", "Close"])
+    assert average_true_range(high, low, close, 19)[-1] == pytest.approx(reference_atr(dataframe, 19)[-1])
+
+
+def test_long_series_keeps_precision() -> None:
+    rng = np.random.default_rng(0)
+    close = 30000 + np.cumsum(rng.normal(0, 10, 2_000_000))
+    high, low = close + rng.uniform(0, 5, len(close)), close - rng.uniform(0, 5, len(close))
+    atr = average_true_range(high, low, close, 20)
+    tr = true_range(high, low, close)
+    assert atr[-1] == pytest.approx(tr[-20:].mean(), rel=1e-9)
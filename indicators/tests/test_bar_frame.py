@@ -0,0 +1,91 @@
+from api import TimeFrames
+from api.simulated import random_dataframe
+import indicators
+from indicators.ema import exponential_moving_average
+import numpy as np
+from pandas import DataFrame
+import pandas as pd
+import pytest
+from shared_data_structures import BarFrame
+import signals
+
+
+def manager() -> indicators.Manager:
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR20", 20))
+    indicators_manager.add(indicators.EMA("EMA72", 72))
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    return indicators_manager
+
+
+@pytest.fixture
+def dataframe() -> DataFrame:
+    return random_dataframe(150)
+
+
+@pytest.mark.parametrize("span", [1, 2, 3, 21, 200, 3000])
+def test_ema_kernel_matches_pandas(span: int) -> None:
+    closes = random_dataframe(5000)["Close"].to_numpy()
+    expected = pd.Series(closes).ewm(span=span, min_periods=span).mean().to_numpy()
+    np.testing.assert_allclose(exponential_moving_average(closes, span, span), expected, rtol=1e-10)
+
+
+def test_compute_all_matches_dataframe(dataframe: DataFrame) -> None:
+    indicators_manager = manager()
+    bars = BarFrame.from_pandas(dataframe, reserve=indicators_manager.outputs)
+    slots = {name: bars[name].to_numpy() for name in indicators_manager.outputs}
+    result = indicators_manager.compute_all(bars)
+    expected = indicators_manager.compute_all(dataframe.copy())
+    assert result.columns == list(expected.columns)
+    for name in expected.columns:
+        np.testing.assert_allclose(result[name].to_numpy(dtype=np.float64),
+                                   expected[name].to_numpy(dtype=np.float64), rtol=1e-10)
+    # -- THE OUTPUTS WERE WRITTEN IN THE RESERVED SLOTS
+    for name, slot in slots.items():
+        assert np.shares_memory(result[name], slot)
+
+
+def test_to_pandas(dataframe: DataFrame) -> None:
+    bars = BarFrame.from_pandas(dataframe)
+    pd.testing.assert_frame_equal(bars.to_pandas(), dataframe, check_freq=False)
+    assert bars.to_pandas() is bars.to_pandas()
+    bars = bars.copy()
+    bars["Close"] = 1.0
+    assert (bars.to_pandas()["Close"] == 1.0).all()
+
+
+def test_positional_access(dataframe: DataFrame) -> None:
+    bars = BarFrame.from_pandas(dataframe)
+    assert bars["Close"].iloc[-1] == dataframe["Close"].iloc[-1]
+    assert bars["Low"].iat[-2] == dataframe["Low"].iat[-2]
+    assert len(bars.tail(10)) == 10
+    assert bars.tail(10)["High"][0] == dataframe["High"].iloc[-10]
+
+
+def test_cache_returns_bar_frames(dataframe: DataFrame) -> None:
+    indicators_manager = manager()
+    cache = indicators.IndicatorsCache(indicators_manager)
+    bars = BarFrame.from_pandas(dataframe, reserve=indicators_manager.outputs)
+    first = cache.compute_all("EURUSD", "M1", bars)
+    assert isinstance(first, BarFrame)
+    again = BarFrame.from_pandas(dataframe, reserve=indicators_manager.outputs)
+    assert cache.compute_all("EURUSD", "M1", again) is first
+
+    forming = dataframe.copy()
+    forming.iloc[-1, forming.columns.get_loc("Close")] += 1e-4
+    forming.iloc[-1, forming.columns.get_loc("High")] += 1e-4
+    result = cache.compute_all("EURUSD", "M1", BarFrame.from_pandas(forming, reserve=indicators_manager.outputs))
+    expected = manager().compute_all(forming.copy())
+    assert isinstance(result, BarFrame)
+    assert cache.forming_updates == 1
+    np.testing.assert_allclose(result.to_pandas().to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64),
+                               rtol=1e-9)
+
+
+def test_signals_read_bar_frames(dataframe: DataFrame) -> None:
+    indicators_manager = manager()
+    signals_manager = signals.Manager()
+    signals_manager.add(signals.EMACrossover("EMACrossover", "EMACrossover3_21"))
+    bars = indicators_manager.compute_all(BarFrame.from_pandas(dataframe, reserve=indicators_manager.outputs))
+    expected = signals_manager.compute_signals("EURUSD", TimeFrames.M1, indicators_manager.compute_all(dataframe.copy()))
+    assert signals_manager.compute_signals("EURUSD", TimeFrames.M1, bars) == expected
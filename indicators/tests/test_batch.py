@@ -0,0 +1,83 @@
+from api.simulated import random_dataframe
+import indicators
+from indicators.atr import average_true_range
+from indicators.ema import exponential_moving_average
+import numpy as np
+from pandas import DataFrame
+import pandas as pd
+from shared_data_structures import BarFrame
+from typing import Dict
+
+
+class Close(indicators.Indicator):
+    """Indicator without a batch mode"""
+    def calculate(self, dataframe: DataFrame) -> DataFrame:
+        dataframe[self.name] = dataframe["Close"] * 1
+        return dataframe
+
+
+def manager() -> indicators.Manager:
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR20", 20))
+    indicators_manager.add(indicators.EMA("EMA72", 72))
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    return indicators_manager
+
+
+def symbols_dataframes() -> Dict[str, DataFrame]:
+    dataframes = {f"SYMBOL{seed}": random_dataframe(120, seed=seed) for seed in range(6)}
+    dataframes["SHORT"] = random_dataframe(50, seed=10)
+    return dataframes
+
+
+def test_kernels_along_the_last_axis() -> None:
+    dataframes = list(symbols_dataframes().values())[:4]
+    high, low, close = (np.stack([dataframe[column].to_numpy() for dataframe in dataframes])
+                        for column in ["High", "Low", "Close"])
+    ema = exponential_moving_average(close, 21, 21)
+    atr = average_true_range(high, low, close, 20)
+    for row in range(len(dataframes)):
+        np.testing.assert_array_equal(ema[row], exponential_moving_average(close[row], 21, 21))
+        np.testing.assert_allclose(atr[row], average_true_range(high[row], low[row], close[row], 20), rtol=1e-12)
+
+
+def test_compute_batch_matches_compute_all() -> None:
+    dataframes = symbols_dataframes()
+    results = manager().compute_batch({symbol: dataframe.copy() for symbol, dataframe in dataframes.items()})
+    assert list(results) == list(dataframes)
+    for symbol, dataframe in dataframes.items():
+        expected = manager().compute_all(dataframe.copy())
+        pd.testing.assert_frame_equal(results[symbol], expected, check_exact=False, rtol=1e-10)
+
+
+def test_compute_batch_of_bar_frames() -> None:
+    indicators_manager = manager()
+    frames = {symbol: BarFrame.from_pandas(dataframe, reserve=indicators_manager.outputs)
+              for symbol, dataframe in symbols_dataframes().items()}
+    results = indicators_manager.compute_batch(frames)
+    for symbol, dataframe in symbols_dataframes().items():
+        assert results[symbol] is frames[symbol]
+        expected = manager().compute_all(dataframe)
+        np.testing.assert_allclose(results[symbol].to_pandas().to_numpy(dtype=np.float64),
+                                   expected.to_numpy(dtype=np.float64), rtol=1e-10)
+
+
+def test_indicators_without_batch_mode_are_computed_per_symbol() -> None:
+    indicators_manager = manager()
+    indicators_manager.add(Close("Close2"))
+    dataframes = symbols_dataframes()
+    results = indicators_manager.compute_batch({symbol: dataframe.copy() for symbol, dataframe in dataframes.items()})
+    for symbol, dataframe in dataframes.items():
+        assert (results[symbol]["Close2"] == dataframe["Close"]).all()
+
+
+def test_cache_computes_the_misses_in_one_batch() -> None:
+    cache = indicators.IndicatorsCache(manager())
+    dataframes = symbols_dataframes()
+    first = cache.compute_batch("M1", dataframes)
+    assert cache.misses == len(dataframes)
+    again = cache.compute_batch("M1", dataframes)
+    assert cache.hits == len(dataframes)
+    for symbol in dataframes:
+        assert again[symbol] is first[symbol]
+        assert cache.compute_all(symbol, "M1", dataframes[symbol]) is first[symbol]
@@ -0,0 +1,86 @@
+from api.simulated import random_dataframe
+import indicators
+import numpy as np
+from pandas import DataFrame
+import pandas as pd
+import pytest
+
+
+def manager() -> indicators.Manager:
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR20", 20))
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    return indicators_manager
+
+
+@pytest.fixture
+def dataframe() -> DataFrame:
+    return random_dataframe(150)
+
+
+def test_unchanged_bars_are_not_computed_again(dataframe: DataFrame) -> None:
+    cache = indicators.IndicatorsCache(manager())
+    first = cache.compute_all("EURUSD", "M1", dataframe.iloc[:100])
+    assert cache.compute_all("EURUSD", "M1", dataframe.iloc[:100]) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    pd.testing.assert_frame_equal(first, manager().compute_all(dataframe.iloc[:100].copy()))
+
+
+def test_forming_bar_is_streamed(dataframe: DataFrame) -> None:
+    cache = indicators.IndicatorsCache(manager())
+    cache.compute_all("EURUSD", "M1", dataframe.iloc[:100])
+    for close in [1.1, 1.2, 1.0]:
+        forming = dataframe.iloc[:100].copy()
+        forming.iloc[-1, forming.columns.get_loc("Close")] = close
+        forming.iloc[-1, forming.columns.get_loc("High")] = max(close, forming["High"].iat[-1])
+        forming.iloc[-1, forming.columns.get_loc("Low")] = min(close, forming["Low"].iat[-1])
+        result = cache.compute_all("EURUSD", "M1", forming)
+        expected = manager().compute_all(forming.copy())
+        assert list(result.columns) == list(expected.columns)
+        assert (result.index == expected.index).all()
+        np.testing.assert_allclose(result.to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64),
+                                   rtol=1e-9)
+    assert cache.misses == 1
+    assert cache.forming_updates == 3
+
+
+def test_forming_bar_after_a_new_closed_bar_is_the_one_of_compute_all(dataframe: DataFrame) -> None:
+    cache = indicators.IndicatorsCache(manager())
+    for start in range(3):
+        window = dataframe.iloc[start:start + 100]
+        cache.compute_all("EURUSD", "M1", window)
+        forming = window.copy()
+        forming.iloc[-1, forming.columns.get_loc("Close")] += 0.01
+        forming.iloc[-1, forming.columns.get_loc("High")] = max(forming["Close"].iat[-1], forming["High"].iat[-1])
+        result = cache.compute_all("EURUSD", "M1", forming)
+        # -- THE STREAM STARTS AGAIN AT THE FIRST BAR OF THE WINDOW, NOT AT THE FIRST BAR EVER STREAMED
+        np.testing.assert_allclose(result.to_numpy(dtype=np.float64),
+                                   manager().compute_all(forming.copy()).to_numpy(dtype=np.float64), rtol=1e-12)
+    assert cache.forming_updates == 3
+
+
+def test_new_closed_bar_is_a_miss(dataframe: DataFrame) -> None:
+    cache = indicators.IndicatorsCache(manager())
+    cache.compute_all("EURUSD", "M1", dataframe.iloc[:100])
+    cache.compute_all("EURUSD", "M1", dataframe.iloc[1:101])
+    cache.compute_all("GBPUSD", "M1", dataframe.iloc[:100])
+    assert cache.misses == 3
+
+
+def test_least_recently_used_is_evicted(dataframe: DataFrame) -> None:
+    cache = indicators.IndicatorsCache(manager(), max_entries=1)
+    cache.compute_all("EURUSD", "M1", dataframe.iloc[:100])
+    cache.compute_all("GBPUSD", "M1", dataframe.iloc[:100])
+    assert cache.evictions == 1
+    forming = dataframe.iloc[:100].copy()
+    forming.iloc[-1, forming.columns.get_loc("Close")] = 1.2
+    cache.compute_all("EURUSD", "M1", forming)
+    assert cache.misses == 3
+
+
+def test_windows_of_different_lengths_ending_on_the_same_bar_are_computed_apart(dataframe: DataFrame) -> None:
+    cache = indicators.IndicatorsCache(manager())
+    cache.compute_all("EURUSD", "M1", dataframe.iloc[:100])
+    result = cache.compute_all("EURUSD", "M1", dataframe.iloc[60:100])
+    pd.testing.assert_frame_equal(result, manager().compute_all(dataframe.iloc[60:100].copy()))
+    assert cache.misses == 2
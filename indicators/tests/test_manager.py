@@ -24,3 +24,46 @@ def test_calculate_all_indicators(dataframe: DataFrame):
     dataframe_columns = df.columns.to_list()
     assert "EMA17" in dataframe_columns
     assert "EMA72" in dataframe_columns
+
+
+def test_dependencies_are_added_and_ordered(dataframe: DataFrame):
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_7", 3, 7))
+    assert [indicator.name for indicator in indicators_manager.plan] == ["EMA3", "EMA7", "EMACrossover3_7"]
+    df = indicators_manager.compute_all(dataframe)
+    assert {"EMA3", "EMA7", "EMACrossover3_7"} <= set(df.columns)
+
+
+def test_same_indicator_is_computed_once(dataframe: DataFrame):
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.EMA("FastEMA", 3))
+    indicators_manager.add(indicators.EMA("EMA3", 3))
+    indicators_manager.add(indicators.EMA("EMA3", 3))
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_7", 3, 7))
+    assert [indicator.name for indicator in indicators_manager.plan] == ["FastEMA", "EMA7", "EMACrossover3_7"]
+    df = indicators_manager.compute_all(dataframe)
+    assert (df["EMA3"] == df["FastEMA"]).all()
+
+
+def test_name_of_another_indicator():
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.EMA("EMA3", 5))
+    with pytest.raises(ValueError):
+        indicators_manager.add(indicators.EMACrossover("EMACrossover3_7", 3, 7))
+
+
+def test_plan_is_built_once(dataframe: DataFrame):
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR5", 5))
+    plan = indicators_manager.plan
+    indicators_manager.compute_all(dataframe.copy())
+    assert indicators_manager.plan is plan
+    indicators_manager.add(indicators.EMA("EMA3", 3))
+    assert indicators_manager.plan is not plan
+
+
+def test_missing_input(dataframe: DataFrame):
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR5", 5))
+    with pytest.raises(KeyError):
+        indicators_manager.compute_all(dataframe.drop(columns=["High"]))
@@ -0,0 +1,106 @@
+from api.simulated import random_dataframe
+import indicators
+import numpy as np
+from pandas import DataFrame
+import pytest
+
+
+@pytest.fixture
+def dataframe() -> DataFrame:
+    return random_dataframe(300)
+
+
+def stream(indicator: indicators.StreamingIndicator, dataframe: DataFrame) -> np.ndarray:
+    return np.array([indicator.update(bar) for _, bar in dataframe.iterrows()], dtype=np.float64)
+
+
+@pytest.mark.parametrize("period", [3, 21, 72])
+def test_ema_matches_calculate(dataframe: DataFrame, period: int) -> None:
+    expected = indicators.EMA("EMA", period).calculate(dataframe.copy())["EMA"].to_numpy()
+    values = stream(indicators.EMA("EMA", period), dataframe)
+    assert np.isnan(values[:period - 1]).all()
+    np.testing.assert_allclose(values[period - 1:], expected[period - 1:], rtol=1e-12)
+
+
+@pytest.mark.parametrize("period", [1, 14, 20])
+def test_atr_matches_calculate(dataframe: DataFrame, period: int) -> None:
+    expected = indicators.ATR("ATR", period).calculate(dataframe.copy())["ATR"].to_numpy()
+    values = stream(indicators.ATR("ATR", period), dataframe)
+    np.testing.assert_allclose(values, expected, rtol=1e-9, atol=1e-12)
+
+
+def test_manager_matches_compute_all(dataframe: DataFrame) -> None:
+    manager = indicators.Manager()
+    manager.add(indicators.ATR("ATR20", 20))
+    manager.add(indicators.EMA("EMA3", 3))
+    manager.add(indicators.EMA("EMA21", 21))
+    manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    expected = manager.compute_all(dataframe.copy())
+    streamed = DataFrame([manager.update(bar) for _, bar in dataframe.iterrows()])
+    warm = slice(21, None)
+    for column in ["ATR20", "EMA3", "EMA21"]:
+        np.testing.assert_allclose(streamed[column].to_numpy()[warm], expected[column].to_numpy()[warm], rtol=1e-9)
+    assert (streamed["EMACrossover3_21"].to_numpy()[warm] == expected["EMACrossover3_21"].to_numpy()[warm]).all()
+    assert (expected["EMACrossover3_21"].to_numpy()[warm] != 0).any()
+
+
+def test_forming_bar_updates_replace_each_other(dataframe: DataFrame) -> None:
+    ema, atr = indicators.EMA("EMA", 5), indicators.ATR("ATR", 5)
+    for _, bar in dataframe.iloc[:-1].iterrows():
+        ema.update(bar)
+        atr.update(bar)
+    last = dataframe.iloc[-1].copy()
+    forming = last.copy()
+    forming["Close"] = forming["Low"]
+    ema.update(forming)
+    atr.update(forming)
+    expected_ema = indicators.EMA("EMA", 5).calculate(dataframe.copy())["EMA"].iat[-1]
+    expected_atr = indicators.ATR("ATR", 5).calculate(dataframe.copy())["ATR"].iat[-1]
+    assert ema.update(last) == pytest.approx(expected_ema, rel=1e-12)
+    assert atr.update(last) == pytest.approx(expected_atr, rel=1e-9)
+
+
+def test_reset(dataframe: DataFrame) -> None:
+    ema = indicators.EMA("EMA", 3)
+    first = stream(ema, dataframe)
+    ema.reset()
+    np.testing.assert_array_equal(stream(ema, dataframe), first)
+
+
+class Close(indicators.Indicator):
+    """Indicator without a streaming mode"""
+    def calculate(self, dataframe: DataFrame) -> DataFrame:
+        dataframe[self.name] = dataframe["Close"] * 1
+        return dataframe
+
+
+def test_indicators_must_implement_the_streaming_mode() -> None:
+    class NoStep(indicators.StreamingIndicator):
+        def calculate(self, dataframe: DataFrame) -> DataFrame:
+            return dataframe
+
+    with pytest.raises(TypeError):
+        NoStep("NoStep")
+
+
+def test_manager_without_streaming_mode_does_not_update(dataframe: DataFrame) -> None:
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.EMA("EMA3", 3))
+    indicators_manager.add(Close("Close1"))
+    assert not indicators_manager.streamable
+    # -- NOTHING IS STREAMED, THE EMA DOES NOT GET THE BAR
+    with pytest.raises(ValueError, match="Close1"):
+        indicators_manager.update(dataframe.iloc[0])
+    assert indicators_manager.last_time is None
+
+
+def test_cache_computes_the_forming_bar_without_streaming_mode(dataframe: DataFrame) -> None:
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.EMA("EMA3", 3))
+    indicators_manager.add(Close("Close1"))
+    cache = indicators.IndicatorsCache(indicators_manager)
+    cache.compute_all("EURUSD", "M1", dataframe.iloc[:100])
+    forming = dataframe.iloc[:100].copy()
+    forming.iloc[-1, forming.columns.get_loc("Close")] = 1.2
+    assert cache.compute_all("EURUSD", "M1", forming)["Close1"].iat[-1] == 1.2
+    assert (cache.misses, cache.forming_updates) == (2, 0)
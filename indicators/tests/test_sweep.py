@@ -0,0 +1,50 @@
+from api.simulated import random_dataframe
+import indicators
+from indicators.sweep import atr_sweep, crossover_sweep, ema_sweep
+import numpy as np
+from pandas import DataFrame
+import pytest
+
+
+@pytest.fixture
+def dataframe() -> DataFrame:
+    return random_dataframe(600)
+
+
+def test_ema_sweep(dataframe: DataFrame) -> None:
+    spans = list(range(2, 201))
+    ema = ema_sweep(dataframe["Close"].to_numpy(), spans, max_bytes=2 ** 16)
+    assert ema.shape == (len(dataframe), len(spans))
+    for column, span in enumerate(spans):
+        expected = indicators.EMA(f"EMA{span}", span).calculate(dataframe.copy())[f"EMA{span}"].to_numpy()
+        np.testing.assert_allclose(ema[:, column], expected, rtol=1e-10)
+
+
+def test_ema_sweep_of_spans_longer_than_the_bars(dataframe: DataFrame) -> None:
+    ema = ema_sweep(dataframe["Close"].to_numpy()[:10], [5, 20])
+    assert not np.isnan(ema[:, 0]).any()
+    assert np.isnan(ema[:, 1]).all()
+
+
+def test_atr_sweep(dataframe: DataFrame) -> None:
+    periods = [5, 10, 14, 20, 50]
+    atr = atr_sweep(dataframe["High"], dataframe["Low"], dataframe["Close"], periods)
+    for column, period in enumerate(periods):
+        expected = indicators.ATR(f"ATR{period}", period).calculate(dataframe.copy())[f"ATR{period}"].to_numpy()
+        np.testing.assert_allclose(atr[:, column], expected, rtol=1e-10, atol=1e-12)
+
+
+def test_crossover_sweep(dataframe: DataFrame) -> None:
+    fast_spans, slow_spans = [2, 3, 5, 8], [5, 13, 21, 34]
+    chunks = list(crossover_sweep(dataframe["Close"].to_numpy(), fast_spans, slow_spans, max_bytes=9 * 600 * 3))
+    assert len(chunks) > 1
+    pairs = np.concatenate([chunk_pairs for chunk_pairs, _ in chunks])
+    assert [tuple(pair) for pair in pairs] == [(fast, slow) for fast in fast_spans for slow in slow_spans
+                                               if fast < slow]
+    for chunk_pairs, crossovers in chunks:
+        assert crossovers.shape == (len(dataframe), len(chunk_pairs))
+        for column, (fast, slow) in enumerate(chunk_pairs):
+            manager = indicators.Manager()
+            manager.add(indicators.EMACrossover("Crossover", fast, slow))
+            expected = manager.compute_all(dataframe.copy())["Crossover"].to_numpy()
+            np.testing.assert_array_equal(crossovers[:, column], expected)
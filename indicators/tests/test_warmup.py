@@ -0,0 +1,38 @@
+from api.simulated import random_dataframe
+import indicators
+import pytest
+
+
+def manager() -> indicators.Manager:
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.ATR("ATR20", 20))
+    indicators_manager.add(indicators.EMA("EMA72", 72))
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    return indicators_manager
+
+
+def test_warmups() -> None:
+    assert indicators.ATR("ATR20", 20).warmup(1e-3) == 21
+    assert indicators.EMA("EMA72", 72).warmup(1e-3) == 249
+    assert indicators.EMA("EMA72", 72).warmup(1e-6) > indicators.EMA("EMA72", 72).warmup(1e-3)
+    assert indicators.EMA("EMA3", 3).warmup(0.5) == 3
+
+
+def test_required_bars_follow_the_inputs() -> None:
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    assert indicators_manager.required_bars(1e-3) == indicators.EMA("EMA21", 21).warmup(1e-3) + 1
+    assert manager().required_bars(1e-3) == 249
+    assert indicators.Manager().required_bars() == 1
+
+
+@pytest.mark.parametrize("tolerance", [1e-2, 1e-3, 1e-5])
+def test_required_bars_converge(tolerance: float) -> None:
+    dataframe = random_dataframe(2000)
+    bars = manager().required_bars(tolerance)
+    full = manager().compute_all(dataframe.copy())
+    short = manager().compute_all(dataframe.iloc[-bars:].copy())
+    scale = dataframe["Close"].max() - dataframe["Close"].min()
+    for column in ["EMA72", "EMA3", "EMA21", "ATR20"]:
+        assert abs(short[column].iat[-1] - full[column].iat[-1]) <= tolerance * scale
+    assert short["EMACrossover3_21"].iat[-1] == full["EMACrossover3_21"].iat[-1]
@@ -1,24 +1,29 @@
 from broker_account import BrokerAccountMT5
-from api import MetaTrader5API, MT5Credentials, TimeFrames
+from api import (MarketData, MarketDataPrefetcher, MarketDataRequest, MetaTrader5API, MT5Credentials, Resampler,
+                 TickBars, TimeFrames)
 import bot
+from collections import defaultdict
 from database import TradeDatabase
-from datetime import datetime
 from dotenv import load_dotenv
 import indicators
+from itertools import chain
 import os
 import pandas as pd
 from risk_management import AccountRiskManager, AccountRiskSettings, TradeRiskManager, TradeRiskSettings
-from shared_data_structures import StrategySettings
+from scheduler import Scheduler
+from shared_data_structures import BarFrame, StrategySettings
 import signals
 import strategies
-from symbols_info import SymbolsInfo, SymbolStrategyConfig, SymbolStrategyInfo
+from symbols_info import can_check_new_position, SymbolsInfo, SymbolStrategyConfig, SymbolStrategyInfo
 import sys
-from typing import List
+from typing import Dict, Iterator, List, Set, Tuple
 
 load_dotenv()
 pd.set_option('display.max_columns', 500)  # número de colunas
 pd.set_option('display.width', 1500)  # largura máxima da tabela
 
+POSITIONS_TASK = "POSITIONS"
+
 
 def mt5_connection(mt5_api: MetaTrader5API) -> None:
     mt5_credentials = MT5Credentials(path=os.getenv("MT5_PATH") or "",
@@ -56,12 +61,91 @@ def add_strategies(manager: strategies.Manager, s: List[strategies.Strategy]) ->
     return None
 
 
-def can_check_new_position(last_check: datetime, wait_to_check: int) -> bool:
-    minutes_awaited = (datetime.today() - last_check).seconds // 60
-    return minutes_awaited > wait_to_check
+def symbol_timeframes(symbols_info: SymbolsInfo, symbol: str) -> List[TimeFrames]:
+    timeframes = []
+    for strategy_info in symbols_info.info[symbol]:
+        for config in strategy_info.configs:
+            if config.timeframe not in timeframes:
+                timeframes.append(config.timeframe)
+    return timeframes
+
+
+def schedule_work(scheduler: Scheduler, symbols_info: SymbolsInfo, positions_interval: float) -> None:
+    """One task for each bar close of each symbol and timeframe, and one task for the position management"""
+    for symbol in symbols_info.symbols:
+        for timeframe in symbol_timeframes(symbols_info, symbol):
+            scheduler.every_bar_close((symbol, timeframe), timeframe)
+    scheduler.every(POSITIONS_TASK, seconds=positions_interval)
+    return None
 
 
-def main(symbols_info: SymbolsInfo) -> None:
+def pairs_with_positions(symbols_info: SymbolsInfo, broker_acc: BrokerAccountMT5) -> Set[Tuple[str, TimeFrames]]:
+    pairs = set()
+    for symbol in symbols_info.symbols:
+        for strategy_info in symbols_info.info[symbol]:
+            for config in strategy_info.configs:
+                positions = broker_acc.get_positions_by(strategy_info.strategy.magic, config.timeframe.value)
+                if any(position.symbol == symbol for position in positions):
+                    pairs.add((symbol, config.timeframe))
+    return pairs
+
+
+def market_data_batches(symbols_info: SymbolsInfo, bars: int,
+                        pairs: Set[Tuple[str, TimeFrames]]) -> List[List[MarketDataRequest]]:
+    """One batch per symbol, with one request for each of its timeframes in pairs"""
+    batches = []
+    for symbol in symbols_info.symbols:
+        batch = [MarketDataRequest(symbol=symbol, timeframe=timeframe, bars=bars)
+                 for timeframe in symbol_timeframes(symbols_info, symbol) if (symbol, timeframe) in pairs]
+        if batch:
+            batches.append(batch)
+    return batches
+
+
+def tick_market_data(tick_bars: TickBars, mt5_api: MetaTrader5API, symbols_info: SymbolsInfo, bars: int,
+                     pairs: Set[Tuple[str, TimeFrames]],
+                     with_positions: Set[Tuple[str, TimeFrames]] or None = None) -> Iterator[List[MarketData]]:
+    """
+    Market data of the pairs built from the ticks, one list per symbol
+    Only the ticks after the last update are requested, the bars are seeded once per symbol
+    with_positions are the pairs found with positions when the positions task ran, the symbols without any are
+    forgotten. None (the positions were not checked on this wake) keeps every symbol seeded
+    """
+    if with_positions is not None:
+        symbols_with_positions = {symbol for symbol, _ in with_positions}
+        for symbol in tick_bars.symbols:
+            if symbol not in symbols_with_positions:
+                tick_bars.remove(symbol)
+    symbols = {symbol for symbol, _ in pairs}
+    for symbol in symbols_info.symbols:
+        if symbol not in symbols:
+            continue
+        timeframes = symbol_timeframes(symbols_info, symbol)
+        if not tick_bars.is_seeded(symbol, timeframes) and not tick_bars.seed(symbol, timeframes, bars):
+            continue
+        tick_bars.update(symbol)
+        attributes = mt5_api.get_symbol_attributes(symbol)
+        yield [MarketData(request=MarketDataRequest(symbol=symbol, timeframe=timeframe, bars=bars),
+                          dataframe=tick_bars.dataframe(symbol, timeframe, bars),
+                          attributes=attributes)
+               for timeframe in timeframes if (symbol, timeframe) in pairs]
+
+
+def compute_indicators(indicators_cache: indicators.IndicatorsCache, outputs: List[str],
+                       market_data: List[List[MarketData]]) -> Dict[Tuple[str, TimeFrames], BarFrame]:
+    """Indicators of the market data by (symbol, timeframe), one batch per timeframe for all its symbols"""
+    frames: Dict[TimeFrames, Dict[str, BarFrame]] = defaultdict(dict)
+    for data in chain.from_iterable(market_data):
+        if data.dataframe is not None:
+            # -- NUMPY COLUMNS WITH THE INDICATOR OUTPUTS ALREADY ALLOCATED
+            frames[data.request.timeframe][data.request.symbol] = BarFrame.from_pandas(data.dataframe,
+                                                                                        reserve=outputs)
+    return {(symbol, timeframe): frame
+            for timeframe, by_symbol in frames.items()
+            for symbol, frame in indicators_cache.compute_batch(timeframe, by_symbol).items()}
+
+
+def main(symbols_info: SymbolsInfo, positions_interval: float = 5.0) -> None:
     mt5api = MetaTrader5API(delta_timezone=-6)
     mt5_connection(mt5api)
 
@@ -75,16 +159,53 @@ def main(symbols_info: SymbolsInfo) -> None:
 
     acc_risk = AccountRiskManager(db, trade_risk, symbols_info)
 
+    # -- THE INDICATORS PLAN AND THE SIGNALS ARE BUILT ONCE
     indicators_manager = indicators.Manager()
+    add_indicators(indicators_manager)
     signals_manager = signals.Manager()
+    add_signals(signals_manager)
+    # -- THE INDICATORS AND SIGNALS OF UNCHANGED BARS ARE NOT COMPUTED AGAIN
+    indicators_cache = indicators.IndicatorsCache(indicators_manager)
+    signals_cache = signals.SignalsCache(signals_manager)
+    signals_registry = signals.SignalRegistry()
+    # -- ONLY THE BARS THE INDICATORS NEED TO CONVERGE ARE REQUESTED
+    bars = indicators_manager.required_bars()
+
+    # -- ONE REQUEST PER SYMBOL, ITS HIGHER TIMEFRAMES ARE RESAMPLED FROM THE LOWEST ONE
+    prefetcher = MarketDataPrefetcher(mt5api, max_workers=8, timeout=10.0, resampler=Resampler(mt5api))
+    tick_bars = TickBars(mt5api, max_bars=max(1000, bars))
+
+    # -- WAKE UP ONLY WHEN A BAR CLOSES OR WHEN THE OPEN POSITIONS NEED TO BE CHECKED
+    scheduler = Scheduler(delta_timezone=mt5api.delta_timezone)
+    schedule_work(scheduler, symbols_info, positions_interval)
 
     run = True
     while run:
         try:
+            due = scheduler.wait()
+            # -- THE SYMBOL SNAPSHOTS OF THE LAST LOOP ARE DROPPED, ITS BROKER CALLS SAVED ARE LOGGED
+            mt5api.new_tick()
+            print(f"SYMBOL SNAPSHOTS: {mt5api.symbol_snapshots.saved_last_tick} broker calls saved in the last loop")
             broker_acc.sync_db()
 
-            # -- LOOP THROUGH EACH SYMBOL REGISTERED IN SYMBOLS_INFO
-            for symbol in symbols_info.symbols:
+            closed_bars = {key for key in due if key != POSITIONS_TASK}
+            with_positions = pairs_with_positions(symbols_info, broker_acc) if POSITIONS_TASK in due else None
+            batches = market_data_batches(symbols_info, bars=bars, pairs=closed_bars)
+
+            # -- THE MARKET DATA OF ALL THE SYMBOLS WITH WORK DUE IS REQUESTED AT ONCE, THE INDICATORS OF A TIMEFRAME
+            # -- ARE COMPUTED FOR ALL ITS SYMBOLS TOGETHER, SO THE LOOP WAITS FOR THE SLOWEST FETCH, NOT THEIR SUM
+            # -- THE POSITIONS BETWEEN BAR CLOSES ARE MANAGED WITH THE BARS BUILT FROM THE TICKS
+            all_market_data = list(chain(prefetcher.iterate(batches, lookahead=len(batches)),
+                                         tick_market_data(tick_bars, mt5api, symbols_info, bars,
+                                                          (with_positions or set()) - closed_bars,
+                                                          with_positions)))
+            # -- COMPUTE INDICATORS, ONE PASS PER TIMEFRAME FOR ALL THE SYMBOLS
+            computed = compute_indicators(indicators_cache, indicators_manager.outputs, all_market_data)
+
+            # -- LOOP THROUGH EACH SYMBOL WITH WORK DUE
+            for market_data in all_market_data:
+                symbol = market_data[0].request.symbol
+                symbol_data = {data.request.timeframe: data for data in market_data}
 
                 # -- LOOP THROUGH EACH STRATEGY_INFO REGISTERED FOR EACH SYMBOL
                 for strategy_info in symbols_info.info[symbol]:
@@ -93,6 +214,9 @@ def main(symbols_info: SymbolsInfo) -> None:
                     # -- LOOP THROUGH EACH STRATEGY_CONFIGURATION REGISTERED FOR EACH STRATEGY_INFO
                     for config in strategy_info.configs:
                         config: SymbolStrategyConfig
+                        data = symbol_data.get(config.timeframe)
+                        if data is None or data.dataframe is None or data.attributes is None:
+                            continue
 
                         # -- MAIN PROGRAM EXECUTION -- #
                         # -- CONFIGURE ACCOUNT RISK MANAGEMENT
@@ -102,20 +226,19 @@ def main(symbols_info: SymbolsInfo) -> None:
                                                                      op_per_day=config.op_per_day)
 
                         # -- CONFIGURE TRADE RISK MANAGEMENT
-                        trade_risk.symbol_attributes = mt5api.get_symbol_attributes(symbol)
+                        trade_risk.symbol_attributes = data.attributes
                         trade_risk.risk_settings = TradeRiskSettings(timeframe=config.timeframe,
                                                                      op_goal=config.op_goal,
                                                                      op_stop=config.op_stop)
 
-                        # -- CREATE DATAFRAME AND COMPUTE INDICATORS
-                        dataframe = mt5api.create_dataframe_from_bars(symbol, config.timeframe, 0, 100)
-                        add_indicators(indicators_manager)
-                        dataframe = indicators_manager.compute_all(dataframe)
-                        # print(dataframe.tail(3), end="\n\n")
+                        dataframe = computed[(symbol, config.timeframe)]
+                        # print(dataframe.to_pandas().tail(3), end="\n\n")
 
                         # -- COMPUTE SIGNALS
-                        add_signals(signals_manager)
-                        signals_results = signals_manager.compute_signals(symbol, config.timeframe, dataframe)
+                        # -- ONLY THE SIGNALS THE STRATEGY READS, SHARED BY THE STRATEGIES IN THE REGISTRY
+                        signals_results = signals_cache.compute_signals(symbol, config.timeframe, dataframe,
+                                                                        strategy.required_signals)
+                        signals_registry.update(signals_results)
                         # print("Signals:", [(s.name, s.timeframe, s.value) for s in signals_results], end="\n\n")
 
                         # -- COMPUTE STRATEGIES
@@ -125,19 +248,25 @@ def main(symbols_info: SymbolsInfo) -> None:
                                                                         can_open_multiple_positions=config.multiple_positions))
 
                         # -- CHECK CURRENT POSITIONS
-                        positions = broker_acc.get_positions_by(strategy.magic)
+                        positions = broker_acc.get_positions_by(strategy.magic, config.timeframe.value)
                         for position in positions:
+                            if position.symbol != symbol:
+                                continue
                             strategy.check_protect(position, mt5api, trade_risk, dataframe)
                             strategy.check_close(position, mt5api, trade_risk, dataframe)
 
+                        # -- NEW POSITIONS ARE ONLY CHECKED WHEN THE BAR CLOSES
                         # -- CHECK THE WAITING TIME INTERVAL BEFORE CHECKING THE NEW POSITION
                         # -- PREVENTS MULTIPLE TRIES TO OPEN THE SAME POSITION
+                        if (symbol, config.timeframe) not in closed_bars:
+                            continue
                         if can_check_new_position(config.last_check, config.wait_to_check):
-                            strategy.check_new_position(symbol, config.timeframe, dataframe, signals_results)
+                            strategy.check_new_position(symbol, config.timeframe, dataframe, signals_registry)
 
         except KeyboardInterrupt:
             run = False
 
+    prefetcher.shutdown()
     mt5api.shutdown()
     return None
 
@@ -169,19 +298,19 @@ if __name__ == "__main__":
     }
     s_info = SymbolsInfo()
     s_info.add(SymbolStrategyInfo("BTCUSD",
-                                  strategies.EMACrossover("EMACrossover", magic_number=99),
+                                  strategies.EMACrossover("EMACrossover", magic_number=99, trail_atr=1.0),
                                   [SymbolStrategyConfig(**m15_config),
                                    SymbolStrategyConfig(**h1_config)]))
     s_info.add(SymbolStrategyInfo("ETHUSD",
-                                  strategies.EMACrossover("EMACrossover", magic_number=99),
+                                  strategies.EMACrossover("EMACrossover", magic_number=99, trail_atr=1.0),
                                   [SymbolStrategyConfig(**m15_config),
                                    SymbolStrategyConfig(**h1_config)]))
     s_info.add(SymbolStrategyInfo("EURUSD",
-                                  strategies.EMACrossover("EMACrossover", magic_number=99),
+                                  strategies.EMACrossover("EMACrossover", magic_number=99, trail_atr=1.0),
                                   [SymbolStrategyConfig(**m15_config),
                                    SymbolStrategyConfig(**h1_config)]))
     s_info.add(SymbolStrategyInfo("GBPUSD",
-                                  strategies.EMACrossover("EMACrossover", magic_number=99),
+                                  strategies.EMACrossover("EMACrossover", magic_number=99, trail_atr=1.0),
                                   [SymbolStrategyConfig(**m15_config),
                                    SymbolStrategyConfig(**h1_config)]))
     main(s_info)
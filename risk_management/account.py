@@ -1,10 +1,10 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from datetime import date
+from datetime import datetime, timedelta
 from design_patterns.observer_pattern import Observer
 import pandas as pd
 from shared_data_structures import WaitToCheckAgainState
-from typing import TYPE_CHECKING
+from typing import Callable, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from database import Database
@@ -23,11 +23,13 @@ class AccountRiskSettings:
 
 
 class AccountRiskManager(Observer):
-    def __init__(self, db: Database, trade_risk: TradeRiskManager, symbols_info: SymbolsInfo) -> None:
+    def __init__(self, db: Database, trade_risk: TradeRiskManager, symbols_info: SymbolsInfo,
+                 clock: Callable[[], datetime] = datetime.today) -> None:
         self._trade_risk = trade_risk
         self._symbols_info = symbols_info
         self._comment = ""
         self._db = db
+        self._clock = clock
         self._settings: AccountRiskSettings or None = None
 
     @property
@@ -59,8 +61,6 @@ class AccountRiskManager(Observer):
     def _can_open_trade(self, state: StrategyState) -> bool:
         orders = self._get_db_orders(state.symbol, state.timeframe, state.strategy)
         positions = self._get_db_positions(state.symbol, state.timeframe, state.strategy)
-        trades = self._get_db_trades_of_today()
-        today_profit = trades["profit"].sum()
 
         if not state.settings.can_open_multiple_positions and (len(positions) + len(orders)) > 0:
             self._comment = f"Cannot open multiple positions on {state.symbol}"
@@ -77,6 +77,10 @@ class AccountRiskManager(Observer):
                 self._comment = f"Already have positions or pending orders enough on {state.symbol}"
                 return False
 
+        # -- THE TRADES ARE ONLY READ WHEN THE POSITIONS DO NOT BLOCK THE TRADE ALREADY
+        trades = self._get_db_trades_of_today()
+        today_profit = trades["profit"].sum()
+
         if 0 < self.risk_settings.op_per_day <= len(trades) + len(positions):
             self._comment = f"Too many trades for today on {state.symbol}"
             return False
@@ -88,10 +92,13 @@ class AccountRiskManager(Observer):
         return True
 
     def _get_db_trades_of_today(self) -> DataFrame:
-        trades = self._db.get_table("Trades")
+        # -- THE OPEN TIMES ARE "YYYY-MM-DD HH:MM:SS" TEXTS, THE DAY IS A RANGE OF TEXTS AND ONLY ITS TRADES ARE READ
+        today = self._clock().date()
+        trades = self._db.get_table("Trades", where="open_time >= ? AND open_time < ?",
+                                    params=(str(today), str(today + timedelta(days=1))))
         trades['open_time'] = pd.to_datetime(trades['open_time'], format="%Y-%m-%d %H:%M:%S")
-        trades['open_day'] = [date(trade.year, trade.month, trade.day) for trade in trades['open_time'].to_list()]
-        return trades[trades['open_day'] == date.today()]
+        trades['open_day'] = trades['open_time'].dt.date
+        return trades[trades['open_day'] == today]
 
     def _get_db_orders(self, symbol: str, timeframe: str, strategy: str) -> DataFrame:
         orders = self._db.get_table("Orders")
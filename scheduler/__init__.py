@@ -0,0 +1 @@
+from scheduler.scheduler import Scheduler, ScheduledTask, next_bar_close
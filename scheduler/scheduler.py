@@ -0,0 +1,103 @@
+from __future__ import annotations
+from api import TimeFrames
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import heapq
+import time
+from typing import Any, Callable, Hashable, List
+
+
+def next_bar_close(timeframe: TimeFrames, now: datetime, delta_timezone: int) -> datetime:
+    """
+    Close time of the bar forming at now
+    The bars are aligned to the broker server time, which is the local time minus the delta_timezone hours
+    """
+    server_now = now - timedelta(hours=delta_timezone)
+    midnight = datetime(server_now.year, server_now.month, server_now.day)
+    if timeframe == TimeFrames.MN1:
+        close = datetime(server_now.year + server_now.month // 12, server_now.month % 12 + 1, 1)
+    elif timeframe == TimeFrames.W1:
+        # MT5 weekly bars open on Sunday
+        week_open = midnight - timedelta(days=(server_now.weekday() + 1) % 7)
+        close = week_open + timedelta(days=7)
+    else:
+        seconds = timeframe.seconds
+        elapsed = (server_now - midnight).total_seconds()
+        close = midnight + timedelta(seconds=(elapsed // seconds + 1) * seconds)
+    return close + timedelta(hours=delta_timezone)
+
+
+@dataclass(order=True)
+class ScheduledTask:
+    due: datetime
+    sequence: int
+    key: Hashable = field(compare=False)
+    timeframe: TimeFrames or None = field(compare=False, default=None)
+    interval: float = field(compare=False, default=0.0)
+
+
+class Scheduler:
+    """
+    Priority queue of the work that is due
+    A task runs when the bar of its timeframe closes (plus a small delay for the terminal to build the new bar)
+    or at a fixed interval in seconds
+    """
+    def __init__(self, delta_timezone: int, bar_close_delay: float = 1.0,
+                 clock: Callable[[], datetime] = datetime.today, sleep: Callable[[float], Any] = time.sleep) -> None:
+        self.delta_timezone = delta_timezone
+        self.bar_close_delay = bar_close_delay
+        self._clock = clock
+        self._sleep = sleep
+        self._queue: List[ScheduledTask] = []
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def every_bar_close(self, key: Hashable, timeframe: TimeFrames, run_now: bool = True) -> None:
+        due = self._clock() if run_now else self._next_bar_close(timeframe, self._clock())
+        self._push(ScheduledTask(due=due, sequence=self._next_sequence(), key=key, timeframe=timeframe))
+        return None
+
+    def every(self, key: Hashable, seconds: float, run_now: bool = True) -> None:
+        due = self._clock() if run_now else self._clock() + timedelta(seconds=seconds)
+        self._push(ScheduledTask(due=due, sequence=self._next_sequence(), key=key, interval=seconds))
+        return None
+
+    def next_due(self) -> datetime or None:
+        return self._queue[0].due if self._queue else None
+
+    def due(self) -> List[Hashable]:
+        """Pop the keys of the tasks that are due and schedule their next run"""
+        now = self._clock()
+        keys = []
+        while self._queue and self._queue[0].due <= now:
+            task = heapq.heappop(self._queue)
+            keys.append(task.key)
+            if task.timeframe is not None:
+                task.due = self._next_bar_close(task.timeframe, now)
+            else:
+                task.due = max(task.due + timedelta(seconds=task.interval), now)
+            task.sequence = self._next_sequence()
+            self._push(task)
+        return keys
+
+    def wait(self) -> List[Hashable]:
+        """Sleep until the next task is due and return the keys of all the due tasks"""
+        next_due = self.next_due()
+        if next_due is not None:
+            remaining = (next_due - self._clock()).total_seconds()
+            if remaining > 0:
+                self._sleep(remaining)
+        return self.due()
+
+    def _next_bar_close(self, timeframe: TimeFrames, now: datetime) -> datetime:
+        return next_bar_close(timeframe, now, self.delta_timezone) + timedelta(seconds=self.bar_close_delay)
+
+    def _push(self, task: ScheduledTask) -> None:
+        heapq.heappush(self._queue, task)
+        return None
+
+    def _next_sequence(self) -> int:
+        self._sequence += 1
+        return self._sequence
@@ -0,0 +1,53 @@
+from api import TimeFrames
+from datetime import datetime, timedelta
+import pytest
+from scheduler import Scheduler, next_bar_close
+
+
+class FakeClock:
+    def __init__(self, now: datetime) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock(datetime(2022, 8, 3, 10, 7, 30))
+
+
+def test_next_bar_close_intraday() -> None:
+    now = datetime(2022, 8, 3, 10, 7, 30)
+    assert next_bar_close(TimeFrames.M15, now, 0) == datetime(2022, 8, 3, 10, 15)
+    assert next_bar_close(TimeFrames.H1, now, 0) == datetime(2022, 8, 3, 11, 0)
+    assert next_bar_close(TimeFrames.M15, datetime(2022, 8, 3, 10, 15), 0) == datetime(2022, 8, 3, 10, 30)
+
+
+def test_next_bar_close_respects_delta_timezone() -> None:
+    # Server time is local time + 6 hours, so the server midnight is at 18:00 local time
+    now = datetime(2022, 8, 3, 10, 7, 30)
+    assert next_bar_close(TimeFrames.H4, now, -6) == datetime(2022, 8, 3, 14, 0)
+    assert next_bar_close(TimeFrames.D1, now, -6) == datetime(2022, 8, 3, 18, 0)
+
+
+def test_next_bar_close_week_and_month() -> None:
+    now = datetime(2022, 12, 14, 10, 0)  # Wednesday
+    assert next_bar_close(TimeFrames.W1, now, 0) == datetime(2022, 12, 18)
+    assert next_bar_close(TimeFrames.MN1, now, 0) == datetime(2023, 1, 1)
+
+
+def test_tasks_run_when_due(clock: FakeClock) -> None:
+    scheduler = Scheduler(delta_timezone=0, bar_close_delay=0, clock=clock, sleep=clock.sleep)
+    scheduler.every_bar_close("M15", TimeFrames.M15)
+    scheduler.every_bar_close("H1", TimeFrames.H1)
+    scheduler.every("positions", seconds=300)
+    assert scheduler.wait() == ["M15", "H1", "positions"]
+    assert scheduler.wait() == ["positions"]
+    assert clock.now == datetime(2022, 8, 3, 10, 12, 30)
+    assert scheduler.wait() == ["M15"]
+    assert clock.now == datetime(2022, 8, 3, 10, 15)
+    assert scheduler.due() == []
@@ -1,3 +1,5 @@
+from shared_data_structures.bar_frame import BarFrame, Column
+from shared_data_structures.lru_cache import LRUCache
 from shared_data_structures.structures import OrderExecution, OrderSendRequest, OrderSendResponse, OrderType, \
     StrategyState, StrategySettings, OrderRequestState, NewPositionDatabase, NewTradeDatabase, PlacedOrderDatabase, \
     CanceledOrderDatabase, DeletePositionDatabase, WaitToCheckAgainState
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Iterator, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+class Column(np.ndarray):
+    """
+    Numpy column of a BarFrame. iloc, iat and to_numpy are the column itself,
+    so the code written for the pandas Series (column.iloc[-1]) reads it with O(1) numpy indexing
+    """
+    @property
+    def iloc(self) -> Column:
+        return self
+
+    @property
+    def iat(self) -> Column:
+        return self
+
+    def to_numpy(self, dtype=None) -> np.ndarray:
+        return self.view(np.ndarray) if dtype is None else np.asarray(self, dtype=dtype)
+
+
+class BarFrame:
+    """
+    Bars of one symbol and timeframe in contiguous numpy columns, with the columns of the standard dataframe
+    The indicator outputs may be reserved beforehand, writing a reserved column fills its slot in place
+    when the values fit its dtype (an integer output is kept as float64 in a NaN slot)
+    The columns read from a dataframe may be views of it, write the market data columns only in a copy
+    to_pandas builds the dataframe once, for debugging and research
+    """
+    def __init__(self, index: np.ndarray, columns: Dict[str, np.ndarray]) -> None:
+        self.index = np.asarray(index)
+        self._columns: Dict[str, np.ndarray] = {name: np.asarray(values) for name, values in columns.items()}
+        self._dataframe: DataFrame or None = None
+
+    @classmethod
+    def from_pandas(cls, dataframe: DataFrame, reserve: Iterable[str] = ()) -> BarFrame:
+        """Columns of the dataframe (without copies when they are already contiguous) and empty reserved columns"""
+        columns = {name: np.ascontiguousarray(dataframe[name].to_numpy()) for name in dataframe.columns}
+        frame = cls(dataframe.index.to_numpy(), columns)
+        frame.reserve(reserve)
+        return frame
+
+    def reserve(self, names: Iterable[str]) -> None:
+        """Allocate the columns not in the frame yet, filled with NaN"""
+        for name in names:
+            if name not in self._columns:
+                self._columns[name] = np.full(len(self.index), np.nan)
+        return None
+
+    def to_pandas(self) -> DataFrame:
+        if self._dataframe is None:
+            self._dataframe = pd.DataFrame(self._columns, index=pd.DatetimeIndex(self.index, name="Date"))
+        return self._dataframe
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __getitem__(self, name: str) -> Column:
+        return self._columns[name].view(Column)
+
+    def __setitem__(self, name: str, values: np.ndarray or float) -> None:
+        slot = self._columns.get(name)
+        values = np.asarray(values)
+        if slot is not None and (values.ndim == 0 or (slot.shape == values.shape
+                                                      and np.can_cast(values.dtype, slot.dtype, "safe"))):
+            slot[...] = values
+        elif values.ndim == 0:
+            self._columns[name] = np.full(len(self.index), values)
+        else:
+            self._columns[name] = values.view(np.ndarray)
+        self._dataframe = None
+        return None
+
+    def __delitem__(self, name: str) -> None:
+        del self._columns[name]
+        self._dataframe = None
+        return None
+
+    def copy(self) -> BarFrame:
+        return BarFrame(self.index.copy(), {name: values.copy() for name, values in self._columns.items()})
+
+    def tail(self, count: int) -> BarFrame:
+        """Views of the last bars"""
+        return BarFrame(self.index[-count:], {name: values[-count:] for name, values in self._columns.items()})
@@ -1,3 +1,5 @@
+from signals.cache import SignalsCache
 from signals.ema_crossover import EMACrossover
 from signals.manager import Manager
-from signals.signal import Signal, SignalObj
+from signals.registry import SignalRegistry
+from signals.signal import SeriesSignal, Signal, SignalObj
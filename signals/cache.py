@@ -0,0 +1,52 @@
+from __future__ import annotations
+from shared_data_structures import LRUCache
+from typing import Iterable, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from api import TimeFrames
+    from pandas import DataFrame
+    from shared_data_structures import BarFrame
+    from signals import Manager, SignalObj
+
+
+class SignalsCache:
+    """
+    Memoized compute_signals of a signals Manager, by (symbol, timeframe, signals fingerprint, window), the window
+    is the first bar time, the length and the last closed bar time of the dataframe
+    When a signal reads the forming bar, the forming bar values are part of the key too
+    Only the signals with the names given are computed, the names are part of the key
+    """
+    def __init__(self, manager: Manager, max_entries: int = 256) -> None:
+        self._manager = manager
+        self._results = LRUCache(max_entries)
+
+    @property
+    def hits(self) -> int:
+        return self._results.hits
+
+    @property
+    def misses(self) -> int:
+        return self._results.misses
+
+    @property
+    def evictions(self) -> int:
+        return self._results.evictions
+
+    def clear(self) -> None:
+        self._results.clear()
+        return None
+
+    def compute_signals(self, symbol: str, timeframe: TimeFrames, dataframe: DataFrame or BarFrame,
+                        names: Iterable[str] or None = None) -> List[SignalObj]:
+        if len(dataframe) < 2:
+            return self._manager.compute_signals(symbol, timeframe, dataframe, names)
+        names = None if names is None else frozenset(names)
+        key = (symbol, timeframe, self._manager.fingerprint, names, dataframe.index[0], len(dataframe),
+               dataframe.index[-2])
+        if any(signal.reads_forming_bar for signal in self._manager.selected(names)):
+            key += (dataframe.index[-1], tuple(dataframe[column].iat[-1] for column in dataframe.columns))
+        results = self._results.get(key)
+        if results is None:
+            results = self._manager.compute_signals(symbol, timeframe, dataframe, names)
+            self._results.put(key, results)
+        return results
@@ -1,26 +1,46 @@
 from __future__ import annotations
-from signals.signal import Signal, SignalObj
+import numpy as np
+from signals.signal import SeriesSignal, SignalObj
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from api import TimeFrames
     from pandas import DataFrame
+    from shared_data_structures import BarFrame
 
 
-class EMACrossover(Signal):
+class EMACrossover(SeriesSignal):
     def __init__(self, name: str, ema_crossover_indicator_name: str, shift: int = 0) -> None:
-        Signal.__init__(self, name)
+        SeriesSignal.__init__(self, name)
         self.indicator_name = ema_crossover_indicator_name
         self.shift = shift
 
+    @property
+    def params(self) -> tuple:
+        return self.indicator_name, self.shift
+
+    @property
+    def reads_forming_bar(self) -> bool:
+        return self.shift == 0
+
     def get_signal(self, symbol: str, timeframe: TimeFrames, dataframe: DataFrame) -> SignalObj:
         return self._ema_crossover(symbol, timeframe, dataframe, self.shift)
 
+    def get_signal_series(self, dataframe: DataFrame or BarFrame) -> np.ndarray:
+        """The crossover column shifted by shift bars"""
+        values = np.asarray(dataframe[self.indicator_name])
+        series = np.zeros(len(values), dtype=values.dtype)
+        # -- A SHIFT PAST THE LAST BAR LEAVES NO BAR WITH A VALUE
+        if self.shift < len(values):
+            series[self.shift:] = values[:len(values) - self.shift]
+        return series
+
     def _ema_crossover(self, symbol: str, timeframe: TimeFrames, dataframe: DataFrame, shift) -> SignalObj:
         signal = dataframe[self.indicator_name].iloc[-(shift+1)]
         return SignalObj(
             name=self.name,
             symbol=symbol,
             timeframe=timeframe.value,
-            value=signal
+            value=signal,
+            time=dataframe.index[-(shift+1)]
         )
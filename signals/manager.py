@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, TYPE_CHECKING
+from typing import Iterable, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from api import TimeFrames
@@ -19,7 +19,24 @@ class Manager:
         self.signals.clear()
         self.results.clear()
 
-    def compute_signals(self, symbol: str, timeframe: TimeFrames, dataframe: DataFrame) -> List[SignalObj]:
-        for signal in self.signals:
-            self.results.append(signal.get_signal(symbol, timeframe, dataframe))
+    @property
+    def fingerprint(self) -> tuple:
+        """Identity of the signals, the same fingerprint computes the same results"""
+        return tuple(signal.key for signal in self.signals)
+
+    @property
+    def reads_forming_bar(self) -> bool:
+        return any(signal.reads_forming_bar for signal in self.signals)
+
+    def selected(self, names: Iterable[str] or None = None) -> List[Signal]:
+        """The signals with the names, all of them when names is None"""
+        if names is None:
+            return list(self.signals)
+        names = set(names)
+        return [signal for signal in self.signals if signal.name in names]
+
+    def compute_signals(self, symbol: str, timeframe: TimeFrames, dataframe: DataFrame,
+                        names: Iterable[str] or None = None) -> List[SignalObj]:
+        """Results of the signals with the names (the ones a strategy reads), all of them when names is None"""
+        self.results = [signal.get_signal(symbol, timeframe, dataframe) for signal in self.selected(names)]
         return self.results
@@ -0,0 +1,30 @@
+from __future__ import annotations
+from typing import Dict, Iterable, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from signals import SignalObj
+
+
+class SignalRegistry:
+    """
+    Latest result of each signal by (signal name, symbol, timeframe), shared by every strategy that reads it
+    A key keeps only its last SignalObj (with the time of its bar), so a lookup is O(1) however many
+    symbols, timeframes and strategies were computed
+    """
+    def __init__(self) -> None:
+        self._signals: Dict[Tuple[str, str, str], SignalObj] = {}
+
+    def __len__(self) -> int:
+        return len(self._signals)
+
+    def update(self, results: Iterable[SignalObj]) -> None:
+        for result in results:
+            self._signals[(result.name, result.symbol, result.timeframe)] = result
+        return None
+
+    def get(self, name: str, symbol: str, timeframe: str) -> SignalObj or None:
+        return self._signals.get((name, symbol, timeframe))
+
+    def clear(self) -> None:
+        self._signals.clear()
+        return None
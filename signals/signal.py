@@ -1,11 +1,13 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import Any, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from api import TimeFrames
+    import numpy as np
     from pandas import DataFrame
+    from shared_data_structures import BarFrame
 
 
 @dataclass
@@ -14,12 +16,39 @@ class SignalObj:
     symbol: str
     timeframe: str
     value: int
+    # -- TIME OF THE BAR THE VALUE WAS READ FROM
+    time: Any = None
 
 
 class Signal(ABC):
     def __init__(self, name: str):
         self.name = name
 
+    @property
+    def params(self) -> tuple:
+        """Parameters that change the value, two signals of the same class and params are the same"""
+        return ()
+
+    @property
+    def key(self) -> tuple:
+        return (type(self).__name__, self.name) + self.params
+
+    @property
+    def reads_forming_bar(self) -> bool:
+        """False when the value only depends on the closed bars"""
+        return True
+
     @abstractmethod
     def get_signal(self, symbol: str, timeframe: TimeFrames, dataframe: DataFrame) -> SignalObj:
         pass
+
+
+class SeriesSignal(Signal):
+    """Signal with a series mode too, the values of every bar in one call"""
+    @abstractmethod
+    def get_signal_series(self, dataframe: DataFrame or BarFrame) -> np.ndarray:
+        """
+        Value of get_signal for every bar as the last one, in one call over the whole history
+        The bars without a value yet (before the shift) are 0
+        """
+        pass
@@ -0,0 +1,46 @@
+from .mock_data import btc_dataframe
+from api import TimeFrames
+import signals
+from pandas import DataFrame
+import pytest
+
+
+@pytest.fixture
+def dataframe() -> DataFrame:
+    dataframe = btc_dataframe()
+    dataframe["EMACrossover_17_34"] = [0] * (len(dataframe) - 2) + [1, 0]
+    return dataframe
+
+
+def manager(shift: int) -> signals.Manager:
+    signals_manager = signals.Manager()
+    signals_manager.add(signals.EMACrossover("EMACrossover", "EMACrossover_17_34", shift=shift))
+    return signals_manager
+
+
+def test_closed_bar_signals_ignore_the_forming_bar(dataframe: DataFrame) -> None:
+    cache = signals.SignalsCache(manager(shift=1))
+    first = cache.compute_signals("BTCUSD", TimeFrames.H1, dataframe)
+    forming = dataframe.copy()
+    forming.iloc[-1, forming.columns.get_loc("Close")] += 10
+    assert cache.compute_signals("BTCUSD", TimeFrames.H1, forming) is first
+    assert first[0].value == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_forming_bar_signals_are_keyed_on_it(dataframe: DataFrame) -> None:
+    cache = signals.SignalsCache(manager(shift=0))
+    cache.compute_signals("BTCUSD", TimeFrames.H1, dataframe)
+    cache.compute_signals("BTCUSD", TimeFrames.H1, dataframe)
+    forming = dataframe.copy()
+    forming.iloc[-1, forming.columns.get_loc("EMACrossover_17_34")] = -1
+    assert cache.compute_signals("BTCUSD", TimeFrames.H1, forming)[0].value == -1
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+
+def test_windows_of_different_lengths_ending_on_the_same_bar_are_computed_apart(dataframe: DataFrame) -> None:
+    cache = signals.SignalsCache(manager(shift=1))
+    first = cache.compute_signals("BTCUSD", TimeFrames.H1, dataframe)
+    assert cache.compute_signals("BTCUSD", TimeFrames.H1, dataframe.iloc[10:]) is not first
+    assert (cache.hits, cache.misses) == (0, 2)
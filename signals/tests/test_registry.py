@@ -0,0 +1,53 @@
+from .mock_data import btc_dataframe
+from api import TimeFrames
+import signals
+from pandas import DataFrame
+import pytest
+
+
+@pytest.fixture
+def dataframe() -> DataFrame:
+    dataframe = btc_dataframe()
+    dataframe["EMACrossover_17_34"] = [0] * (len(dataframe) - 2) + [1, 0]
+    dataframe["EMACrossover_3_21"] = [0] * (len(dataframe) - 1) + [-1]
+    return dataframe
+
+
+def manager() -> signals.Manager:
+    signals_manager = signals.Manager()
+    signals_manager.add(signals.EMACrossover("EMACrossover", "EMACrossover_17_34", shift=1))
+    signals_manager.add(signals.EMACrossover("FastCrossover", "EMACrossover_3_21", shift=0))
+    return signals_manager
+
+
+def test_latest_signal_by_name_symbol_and_timeframe(dataframe: DataFrame) -> None:
+    registry = signals.SignalRegistry()
+    signals_manager = manager()
+    registry.update(signals_manager.compute_signals("BTCUSD", TimeFrames.H1, dataframe))
+    registry.update(signals_manager.compute_signals("ETHUSD", TimeFrames.H1, dataframe.iloc[:-1]))
+    registry.update(signals_manager.compute_signals("BTCUSD", TimeFrames.H1, dataframe))
+    assert len(registry) == 4
+    signal = registry.get("EMACrossover", "BTCUSD", "H1")
+    assert (signal.value, signal.time) == (1, dataframe.index[-2])
+    assert registry.get("FastCrossover", "BTCUSD", "H1").time == dataframe.index[-1]
+    assert registry.get("EMACrossover", "ETHUSD", "H1").value == 0
+    assert registry.get("EMACrossover", "BTCUSD", "M15") is None
+
+
+def test_only_the_signals_named_are_computed(dataframe: DataFrame) -> None:
+    results = manager().compute_signals("BTCUSD", TimeFrames.H1, dataframe, ["FastCrossover"])
+    assert [result.name for result in results] == ["FastCrossover"]
+    assert len(manager().compute_signals("BTCUSD", TimeFrames.H1, dataframe)) == 2
+
+
+def test_cache_keys_on_the_names(dataframe: DataFrame) -> None:
+    cache = signals.SignalsCache(manager())
+    slow = cache.compute_signals("BTCUSD", TimeFrames.H1, dataframe, ["EMACrossover"])
+    fast = cache.compute_signals("BTCUSD", TimeFrames.H1, dataframe, ["FastCrossover"])
+    assert [result.name for result in slow] == ["EMACrossover"]
+    assert [result.name for result in fast] == ["FastCrossover"]
+    # -- ONLY THE CLOSED BARS ARE IN THE KEY OF THE SIGNALS THAT DO NOT READ THE FORMING BAR
+    forming = dataframe.copy()
+    forming.iloc[-1, forming.columns.get_loc("Close")] += 10
+    assert cache.compute_signals("BTCUSD", TimeFrames.H1, forming, ["EMACrossover"]) is slow
+    assert cache.compute_signals("BTCUSD", TimeFrames.H1, forming, ["FastCrossover"]) is not fast
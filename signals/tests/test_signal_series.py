@@ -0,0 +1,57 @@
+from api import TimeFrames
+from api.simulated import random_dataframe
+import indicators
+import numpy as np
+from pandas import DataFrame
+import pytest
+from shared_data_structures import BarFrame
+import signals
+
+
+@pytest.fixture
+def dataframe() -> DataFrame:
+    indicators_manager = indicators.Manager()
+    indicators_manager.add(indicators.EMACrossover("EMACrossover3_21", 3, 21))
+    return indicators_manager.compute_all(random_dataframe(400))
+
+
+@pytest.mark.parametrize("shift", [0, 1, 3])
+def test_series_matches_the_signal_of_each_bar(dataframe: DataFrame, shift: int) -> None:
+    signal = signals.EMACrossover("EMACrossover", "EMACrossover3_21", shift=shift)
+    series = signal.get_signal_series(dataframe)
+    assert len(series) == len(dataframe)
+    assert (series[:shift] == 0).all()
+    expected = [signal.get_signal("EURUSD", TimeFrames.M1, dataframe.iloc[:bar + 1]).value
+                for bar in range(shift, len(dataframe))]
+    np.testing.assert_array_equal(series[shift:], expected)
+    assert (series != 0).any()
+
+
+@pytest.mark.parametrize("bars", [0, 4, 6])
+def test_series_shorter_than_the_shift_is_zero(dataframe: DataFrame, bars: int) -> None:
+    signal = signals.EMACrossover("EMACrossover", "EMACrossover3_21", shift=6)
+    series = signal.get_signal_series(dataframe.iloc[:bars])
+    assert len(series) == bars
+    assert (series == 0).all()
+
+
+def test_series_of_bar_frames(dataframe: DataFrame) -> None:
+    signal = signals.EMACrossover("EMACrossover", "EMACrossover3_21", shift=1)
+    np.testing.assert_array_equal(signal.get_signal_series(BarFrame.from_pandas(dataframe)),
+                                  signal.get_signal_series(dataframe))
+
+
+def test_signals_without_series() -> None:
+    class Constant(signals.Signal):
+        def get_signal(self, symbol, timeframe, dataframe):
+            return signals.SignalObj(self.name, symbol, timeframe.value, 1)
+
+    class NoSeries(signals.SeriesSignal):
+        def get_signal(self, symbol, timeframe, dataframe):
+            return signals.SignalObj(self.name, symbol, timeframe.value, 1)
+
+    assert not isinstance(Constant("Constant"), signals.SeriesSignal)
+    assert isinstance(signals.EMACrossover("EMACrossover", "EMACrossover3_21"), signals.SeriesSignal)
+    # -- A SERIES SIGNAL MUST IMPLEMENT get_signal_series
+    with pytest.raises(TypeError):
+        NoSeries("NoSeries")
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from api.compact import price_to_ticks
 from shared_data_structures.structures import StrategyState, OrderType, OrderExecution
 from strategies.strategy import Strategy
 from typing import List, TYPE_CHECKING
@@ -7,17 +8,29 @@ if TYPE_CHECKING:
     from api import Attributes, MarketDataAPI, Position, TimeFrames
     from pandas import DataFrame
     from risk_management import TradeRiskManager
-    from signals import SignalObj
+    from signals import SignalRegistry
 
 
 class EMACrossover(Strategy):
-    def check_new_position(self, symbol: str, timeframe: TimeFrames, dataframe: DataFrame, signals: List[SignalObj]) -> None:
+    def __init__(self, name: str, magic_number: int, stop_atr: float = 0.5, trail_atr: float or None = None) -> None:
+        super().__init__(name, magic_number)
+        # -- OFFSET OF THE STOP LOSS BEYOND THE LOW/HIGH OF THE PREVIOUS BAR, IN ATR20
+        self.stop_atr = stop_atr
+        # -- INTRA-BAR STOP: THE POSITION IS CLOSED WHEN THE FORMING BAR BREAKS THE LOW/HIGH OF THE PREVIOUS BAR BY
+        # -- trail_atr ATR20. None DISABLES IT
+        self.trail_atr = trail_atr
+
+    @property
+    def required_signals(self) -> List[str]:
+        return ["EMACrossover"]
+
+    def check_new_position(self, symbol: str, timeframe: TimeFrames, dataframe: DataFrame, signals: SignalRegistry) -> None:
         self._reset_state()
         self._check_signals(symbol, timeframe.value, signals)
         self._change_state_new_position(symbol, timeframe.value, dataframe)
         self._notify()
 
-    def _check_signals(self, symbol: str, timeframe: str, signals: List[SignalObj]) -> None:
+    def _check_signals(self, symbol: str, timeframe: str, signals: SignalRegistry) -> None:
         ema_crossover = self._get_specific_signal("EMACrossover", symbol, timeframe, signals)
         if ema_crossover.value == 1:
             self._is_buy = True
@@ -43,7 +56,7 @@ class EMACrossover(Strategy):
                                     price=dataframe["Close"].iloc[-1],
                                     spread=dataframe["Spread"].iloc[-1],
                                     digits=dataframe["_Digits"].iloc[-1],
-                                    stop_loss=dataframe["Low"].iloc[-2] - dataframe["ATR20"].iloc[-1] * 0.5,
+                                    stop_loss=dataframe["Low"].iloc[-2] - dataframe["ATR20"].iloc[-1] * self.stop_atr,
                                     stop_gain=0.0,
                                     limit_price=0.0,
                                     stop_limit=0.0,
@@ -60,7 +73,7 @@ class EMACrossover(Strategy):
                                     price=dataframe["Close"].iloc[-1],
                                     spread=dataframe["Spread"].iloc[-1],
                                     digits=dataframe["_Digits"].iloc[-1],
-                                    stop_loss=dataframe["High"].iloc[-2] + dataframe["ATR20"].iloc[-1] * 0.5,
+                                    stop_loss=dataframe["High"].iloc[-2] + dataframe["ATR20"].iloc[-1] * self.stop_atr,
                                     stop_gain=0.0,
                                     limit_price=0.0,
                                     stop_limit=0.0,
@@ -70,7 +83,8 @@ class EMACrossover(Strategy):
         self._reset_state()
         symbol_attr = api.get_symbol_attributes(position.symbol)
         stop_loss = position.price_open
-        if position.stop_loss == round(stop_loss, symbol_attr.digits):
+        # -- THE PRICES ARE COMPARED IN TICKS, SO THE SAME PRICE IS EQUAL WHATEVER ITS FLOAT ERROR
+        if price_to_ticks(position.stop_loss, symbol_attr.digits) == price_to_ticks(stop_loss, symbol_attr.digits):
             return None
         if not self._is_to_protect(position, trade_risk):
             return None
@@ -114,7 +128,7 @@ class EMACrossover(Strategy):
 
     def check_close(self, position: Position, api: MarketDataAPI, trade_risk: TradeRiskManager, dataframe: DataFrame) -> None:
         self._reset_state()
-        if not self._is_to_close(position, trade_risk):
+        if not self._is_to_close(position, trade_risk) and not self._is_trail_broken(position, dataframe):
             return None
         symbol_attr = api.get_symbol_attributes(position.symbol)
         self._change_state_close(position, symbol_attr)
@@ -134,6 +148,19 @@ class EMACrossover(Strategy):
 
         return False
 
+    def _is_trail_broken(self, position: Position, dataframe: DataFrame) -> bool:
+        """The forming bar (built from the ticks between the bar closes) went through the trailing stop"""
+        if self.trail_atr is None or len(dataframe) < 2 or not self._is_the_right_position(position):
+            return False
+        offset = dataframe["ATR20"].iloc[-1] * self.trail_atr
+        if position.type == OrderType.BUY:
+            is_broken = dataframe["Low"].iloc[-1] < dataframe["Low"].iloc[-2] - offset
+        else:
+            is_broken = dataframe["High"].iloc[-1] > dataframe["High"].iloc[-2] + offset
+        if is_broken:
+            print(f"{position.symbol} - check close: trailing stop of {self.trail_atr} ATR broken inside the bar")
+        return bool(is_broken)
+
     def _is_the_right_position(self, position: Position) -> bool:
         return position.magic == self.magic and position.timeframe == self._settings.timeframe
 
@@ -2,11 +2,11 @@ from __future__ import annotations
 from typing import List, TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from api import MarketDataAPI, Position
+    from api import MarketDataAPI, PositionBook
     from design_patterns.observer_pattern import Observer
     from pandas import DataFrame
     from risk_management import TradeRiskManager
-    from signals import SignalObj
+    from signals import SignalRegistry
     from strategies import Strategy
 
 
@@ -25,18 +25,18 @@ class Manager:
             strategy.subscribe(observer)
         return None
 
-    def check_for_new_position(self, symbol: str, timeframe: str, dataframe: DataFrame, signals: List[SignalObj]) -> None:
+    def check_for_new_position(self, symbol: str, timeframe: str, dataframe: DataFrame, signals: SignalRegistry) -> None:
         for strategy in self.strategies:
             strategy.check_new_position(symbol, timeframe, dataframe, signals)
 
-    def check_for_protect(self, position: Position, api: MarketDataAPI, trade_risk: TradeRiskManager) -> None:
+    def check_for_protect(self, book: PositionBook, api: MarketDataAPI, trade_risk: TradeRiskManager,
+                          dataframe: DataFrame) -> None:
         for strategy in self.strategies:
-            if strategy.magic != position.magic:
-                continue
-            strategy.check_protect(position, api, trade_risk)
+            for position in book.by_magic(strategy.magic):
+                strategy.check_protect(position, api, trade_risk, dataframe)
 
-    def check_for_close(self, position: Position, api: MarketDataAPI, trade_risk: TradeRiskManager) -> None:
+    def check_for_close(self, book: PositionBook, api: MarketDataAPI, trade_risk: TradeRiskManager,
+                        dataframe: DataFrame) -> None:
         for strategy in self.strategies:
-            if strategy.magic != position.magic:
-                continue
-            strategy.check_close(position, api, trade_risk)
+            for position in book.by_magic(strategy.magic):
+                strategy.check_close(position, api, trade_risk, dataframe)
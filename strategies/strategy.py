@@ -9,7 +9,7 @@ if TYPE_CHECKING:
     from pandas import DataFrame
     from risk_management import TradeRiskManager
     from shared_data_structures import StrategyState, StrategySettings
-    from signals import SignalObj
+    from signals import SignalObj, SignalRegistry
 
 
 @dataclass
@@ -43,12 +43,15 @@ class Strategy(Subject):
             ob.update(self._state)
         return None
 
-    def _get_specific_signal(self, name: str, symbol: str, timeframe: str, signals: List[SignalObj]) -> SignalObj or None:
-        for signal in signals:
-            if signal.name == name and signal.symbol == symbol and signal.timeframe == timeframe:
-                return signal
+    @property
+    def required_signals(self) -> List[str] or None:
+        """Names of the signals read by the strategy, only those are computed for it. None computes all of them"""
         return None
 
+    def _get_specific_signal(self, name: str, symbol: str, timeframe: str,
+                             signals: SignalRegistry) -> SignalObj or None:
+        return signals.get(name, symbol, timeframe)
+
     def set_strategy_settings(self, settings: StrategySettings) -> None:
         self._settings = settings
 
@@ -60,7 +63,7 @@ class Strategy(Subject):
         self._state = None
 
     @abstractmethod
-    def check_new_position(self, symbol: str, timeframe: TimeFrames, dataframe: DataFrame, signals: List[SignalObj]) -> None:
+    def check_new_position(self, symbol: str, timeframe: TimeFrames, dataframe: DataFrame, signals: SignalRegistry) -> None:
         pass
 
     @abstractmethod
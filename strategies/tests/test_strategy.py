@@ -0,0 +1,63 @@
+from api import Position, TimeFrames
+import pandas as pd
+import pytest
+from risk_management import TradeRiskSettings
+from shared_data_structures import BarFrame, OrderExecution, OrderType, StrategySettings
+import signals
+from signals.tests.mock_data import btc_dataframe
+import strategies
+from strategies import Strategy
+from types import SimpleNamespace
+
+
+class NoSignalsStrategy(Strategy):
+    """Strategy that does not name the signals it reads"""
+    def check_new_position(self, symbol, timeframe, dataframe, signals_registry) -> None:
+        pass
+
+    def check_protect(self, position, api, trade_risk, dataframe) -> None:
+        pass
+
+    def check_close(self, position, api, trade_risk, dataframe) -> None:
+        pass
+
+
+def test_strategy_without_required_signals_gets_all_of_them() -> None:
+    dataframe = btc_dataframe()
+    dataframe["EMACrossover_17_34"] = [0] * (len(dataframe) - 2) + [1, 0]
+    dataframe["EMACrossover_3_21"] = 0
+    signals_manager = signals.Manager()
+    signals_manager.add(signals.EMACrossover("EMACrossover", "EMACrossover_17_34", shift=1))
+    signals_manager.add(signals.EMACrossover("FastCrossover", "EMACrossover_3_21", shift=1))
+    strategy = NoSignalsStrategy("NoSignals", magic_number=1)
+    assert strategy.required_signals is None
+    results = signals.SignalsCache(signals_manager).compute_signals("BTCUSD", TimeFrames.H1, dataframe,
+                                                                    strategy.required_signals)
+    assert [result.name for result in results] == ["EMACrossover", "FastCrossover"]
+
+
+class StatesObserver:
+    def __init__(self) -> None:
+        self.states = []
+
+    def update(self, state) -> None:
+        self.states.append(state)
+
+
+@pytest.mark.parametrize("low, is_closed", [(1.0960, False), (1.0940, True)])
+def test_forming_bar_through_the_trailing_stop_closes_the_position(low: float, is_closed: bool) -> None:
+    # -- PREVIOUS LOW 1.1000 AND ATR20 0.0050, THE TRAILING STOP OF 1 ATR IS AT 1.0950
+    dataframe = BarFrame.from_pandas(pd.DataFrame({"High": [1.1100, 1.1050], "Low": [1.1000, low],
+                                                   "ATR20": [0.0050, 0.0050]}))
+    position = Position(symbol="EURUSD", timeframe="M15", strategy="EMACrossover", ticket=1, price_open=1.1050,
+                        open_time="2022-08-01 10:00:00", type=OrderType.BUY, volume=0.1, profit=-5.0,
+                        stop_loss=1.0900, stop_gain=0.0, magic=99)
+    strategy = strategies.EMACrossover("EMACrossover", magic_number=99, trail_atr=1.0)
+    strategy.set_strategy_settings(StrategySettings(timeframe="M15", max_volume=1.0,
+                                                    can_open_multiple_positions=False))
+    observer = StatesObserver()
+    strategy.subscribe(observer)
+    trade_risk = SimpleNamespace(risk_settings=TradeRiskSettings(timeframe=TimeFrames.M15, op_goal=20, op_stop=10))
+    api = SimpleNamespace(get_symbol_attributes=lambda symbol: SimpleNamespace(symbol=symbol, spread=10, digits=5))
+    strategy.check_close(position, api, trade_risk, dataframe)
+    assert [state.action for state in observer.states] == ([OrderExecution.CLOSE_POSITION] if is_closed else [])
@@ -1 +1 @@
-from symbols_info.info import SymbolsInfo, SymbolStrategyConfig, SymbolStrategyInfo
+from symbols_info.info import can_check_new_position, SymbolsInfo, SymbolStrategyConfig, SymbolStrategyInfo
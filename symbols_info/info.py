@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from design_patterns.observer_pattern import Observer
 from datetime import datetime
 from shared_data_structures import WaitToCheckAgainState
-from typing import List, TYPE_CHECKING
+from typing import Callable, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from api import TimeFrames
@@ -25,11 +25,20 @@ class SymbolStrategyConfig:
     last_check: datetime = datetime(2022, 1, 1)
 
 
+def can_check_new_position(last_check: datetime, wait_to_check: int,
+                           clock: Callable[[], datetime] = datetime.today) -> bool:
+    """The wait_to_check minutes since the last check passed on the clock (the simulated one in a backtest)"""
+    minutes_awaited = (clock() - last_check).total_seconds() // 60
+    return minutes_awaited > wait_to_check
+
+
 class SymbolStrategyInfo:
-    def __init__(self, symbol: str, strategy: Strategy, configs: List[SymbolStrategyConfig]) -> None:
+    def __init__(self, symbol: str, strategy: Strategy, configs: List[SymbolStrategyConfig],
+                 clock: Callable[[], datetime] = datetime.today) -> None:
         self.symbol = symbol
         self.strategy = strategy
         self.configs = configs
+        self.clock = clock
 
     def update(self, state: WaitToCheckAgainState) -> None:
         if state.symbol != self.symbol or state.strategy != self.strategy.name:
@@ -38,7 +47,7 @@ class SymbolStrategyInfo:
         for config in self.configs:
             if config.timeframe.value != state.timeframe:
                 continue
-            config.last_check = datetime.today()
+            config.last_check = self.clock()
             print(f"Updating SYMBOL STRATEGY INFO Last Check --- {self.symbol}")
         return None
 
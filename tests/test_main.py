@@ -0,0 +1,61 @@
+from api import SimulatedMarketDataAPI, SimulatedSymbol, TickBars, TimeFrames
+import numpy as np
+import pandas as pd
+import pytest
+import strategies
+from symbols_info import SymbolsInfo, SymbolStrategyConfig, SymbolStrategyInfo
+
+# -- main RUNS ON THE MT5 TERMINAL, ITS PACKAGE ONLY INSTALLS ON WINDOWS
+pytest.importorskip("MetaTrader5")
+import main  # noqa: E402
+
+PAIR = ("EURUSD", TimeFrames.M1)
+
+
+@pytest.fixture
+def api() -> SimulatedMarketDataAPI:
+    m1_index = pd.date_range("2022-08-01 00:00", periods=10, freq="1min", name="Date")
+    m1_bars = pd.DataFrame({"Open": 1.1, "High": 1.1005, "Low": 1.0995, "Close": 1.1,
+                            "Volume": 0, "Trades": 6, "Spread": 10}, index=m1_index)
+    tick_index = pd.date_range("2022-08-01 00:00", periods=60, freq="10s")
+    bids = 1.1 + np.round(np.sin(np.arange(60)) * 0.0004, 5)
+    api = SimulatedMarketDataAPI()
+    api.add_symbol(SimulatedSymbol("EURUSD", digits=5), TimeFrames.M1, m1_bars)
+    api.add_ticks("EURUSD", pd.DataFrame({"Bid": bids, "Ask": bids + 0.0001}, index=tick_index))
+    api.start(pd.Timestamp("2022-08-01 00:00"))
+    api.advance(pd.Timestamp("2022-08-01 00:05:30"))
+    return api
+
+
+@pytest.fixture
+def symbols_info() -> SymbolsInfo:
+    symbols_info = SymbolsInfo()
+    symbols_info.add(SymbolStrategyInfo("EURUSD", strategies.EMACrossover("EMACrossover", magic_number=99),
+                                        [SymbolStrategyConfig(timeframe=TimeFrames.M1, capital=5000, day_goal=0,
+                                                              day_stop=0, op_per_day=0, op_goal=10, op_stop=5,
+                                                              max_volume=1.0, multiple_positions=False,
+                                                              wait_to_check=5)]))
+    return symbols_info
+
+
+def test_tick_bars_are_kept_between_positions_wakes(api: SimulatedMarketDataAPI, symbols_info: SymbolsInfo) -> None:
+    tick_bars = TickBars(api)
+    seeds = []
+    seed = tick_bars.seed
+    tick_bars.seed = lambda *args: seeds.append(args) or seed(*args)
+
+    def wake(closed_bars: set, with_positions: set or None) -> list:
+        return list(main.tick_market_data(tick_bars, api, symbols_info, 3,
+                                          (with_positions or set()) - closed_bars, with_positions))
+
+    # -- POSITIONS WAKE, BAR CLOSE WAKE, POSITIONS WAKE: THE TICK SERIES IS SEEDED ONCE
+    assert len(wake(set(), {PAIR})) == 1
+    assert wake({PAIR}, None) == []
+    assert tick_bars.symbols == ["EURUSD"]
+    api.advance(pd.Timestamp("2022-08-01 00:06:30"))
+    assert len(wake(set(), {PAIR})) == 1
+    assert len(seeds) == 1
+
+    # -- THE POSITIONS WERE CHECKED AND THERE ARE NONE LEFT: THE SYMBOL IS FORGOTTEN
+    assert wake(set(), set()) == []
+    assert tick_bars.symbols == []